@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+漂移监控的评分路径开销基准
+在 Pima 结构的合成训练数据上拟合训练分布概况，测量 DriftMonitor.update 在不同批大小下的耗时
+（重复多次取中位数），并检查：
+  1. 每次调用的耗时不超过预算（单患者请求）
+  2. 每行的平均耗时不超过预算（批量请求）
+  3. 对注入了偏移的流量，评估结果能检出漂移；对同分布流量不误报
+超出预算或检测结果不符时退出码为 1
+
+用法:
+    python benchmarks/bench_drift_monitor.py
+    python benchmarks/bench_drift_monitor.py --scale 2.0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import generate_synthetic_pima  # noqa: E402
+from drift_monitor import DriftProfile, DriftMonitor  # noqa: E402
+from feature_transform import RAW_FEATURES  # noqa: E402
+
+# 批大小 -> 每次调用的耗时预算（微秒）
+UPDATE_BUDGETS_US = {1: 50.0, 16: 80.0, 256: 600.0}
+
+
+def time_update(monitor, X, repeat):
+    """update 的中位耗时（微秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        monitor.update(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='漂移监控开销基准')
+    parser.add_argument('--repeat', type=int, default=2000, help='每个批大小的调用次数')
+    parser.add_argument('--scale', type=float, default=1.0, help='预算缩放系数（较慢的机器上调大）')
+    args = parser.parse_args()
+
+    train = generate_synthetic_pima(20000, seed=0)[RAW_FEATURES].to_numpy(dtype=float)
+    live = generate_synthetic_pima(20000, seed=1)[RAW_FEATURES].to_numpy(dtype=float)
+    profile = DriftProfile.fit(train, RAW_FEATURES)
+    ok = True
+
+    print(f"{'批大小':<10}{'耗时(us)':>12}{'每行(us)':>12}{'预算(us)':>12}  结果")
+    monitor = DriftMonitor(profile)
+    for batch_size, budget in UPDATE_BUDGETS_US.items():
+        elapsed = time_update(monitor, live[:batch_size], args.repeat)
+        passed = elapsed <= budget * args.scale
+        ok &= passed
+        print(f"{batch_size:<10}{elapsed:>12.2f}{elapsed / batch_size:>12.3f}{budget * args.scale:>12.1f}  "
+              f"{'通过' if passed else '超出预算'}")
+
+    # 同分布流量不应报告显著漂移；血糖整体升高 15% 应被检出
+    monitor = DriftMonitor(profile)
+    monitor.update(live)
+    same = monitor.evaluate(force=True)
+    shifted = live.copy()
+    shifted[:, RAW_FEATURES.index('Glucose')] *= 1.15
+    monitor.update(shifted)
+    drifted = monitor.evaluate(force=True)
+    detected = same['status'] != 'significant' and 'Glucose' in drifted['drifted']
+    ok &= detected
+    print(f"\n同分布流量: {same['status']}（最大 PSI {same['max_psi']:.4f}）")
+    print(f"血糖偏移 15%: {drifted['status']}（Glucose PSI {drifted['features']['Glucose']['psi']:.4f}）"
+          f"  {'通过' if detected else '未检出'}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动导入耗时基准
+每个模块在全新的解释器进程中导入（重复多次取最小值），检查：
+  1. 导入耗时不超过预算
+  2. 推理路径没有加载训练/绘图依赖（scikit-learn、matplotlib 等）
+超出预算或加载了禁止的依赖时退出码为 1
+
+用法:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 7 --scale 2.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 模块 -> (导入耗时预算（秒）, 导入后不应出现的依赖)
+IMPORT_BUDGETS = {
+    'risk_scoring': (0.4, ['pandas', 'sklearn', 'matplotlib', 'seaborn', 'pyarrow']),
+    'fusion_engine': (0.4, ['pandas', 'sklearn', 'matplotlib', 'seaborn', 'pyarrow']),
+    'drift_monitor': (0.4, ['pandas', 'sklearn', 'matplotlib', 'seaborn', 'pyarrow']),
+    'risk_scoring_service': (0.5, ['pandas', 'sklearn', 'matplotlib', 'seaborn', 'pyarrow']),
+    # pandas 2.x 自身会在导入时探测 pyarrow，这两个模块不检查 pyarrow
+    'diabetes_risk_prediction_system': (1.5, ['sklearn', 'matplotlib', 'seaborn', 'joblib']),
+    'data_preprocessing': (1.5, ['sklearn', 'matplotlib', 'seaborn']),
+}
+
+_CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module, forbidden, repeat=5):
+    """在新进程中导入模块 repeat 次，返回 (最小耗时, 加载的禁止依赖)"""
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _CHILD_SCRIPT.format(module=module, forbidden=forbidden)],
+                                cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['elapsed'])
+        loaded.update(result['loaded'])
+    return min(timings), sorted(loaded)
+
+
+def run(repeat=5, scale=1.0):
+    """测量所有模块，返回结果列表"""
+    results = []
+    for module, (budget, forbidden) in IMPORT_BUDGETS.items():
+        elapsed, loaded = measure_import(module, forbidden, repeat)
+        results.append({
+            'module': module,
+            'elapsed_s': elapsed,
+            'budget_s': budget * scale,
+            'forbidden_loaded': loaded,
+            'ok': elapsed <= budget * scale and not loaded
+        })
+    return results
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='冷启动导入耗时基准')
+    parser.add_argument('--repeat', type=int, default=5, help='每个模块的导入次数（取最小值）')
+    parser.add_argument('--scale', type=float, default=1.0, help='预算缩放系数（较慢的机器上调大）')
+    parser.add_argument('--json', help='将结果写入 JSON 文件')
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.scale)
+
+    print(f"{'模块':<34}{'耗时(s)':>10}{'预算(s)':>10}  结果")
+    for r in results:
+        status = '通过' if r['ok'] else '超出预算'
+        if r['forbidden_loaded']:
+            status = f"加载了 {', '.join(r['forbidden_loaded'])}"
+        print(f"{r['module']:<34}{r['elapsed_s']:>10.3f}{r['budget_s']:>10.3f}  {status}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    sys.exit(0 if all(r['ok'] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+糖尿病风险预测流程分阶段基准
+生成 Pima 数据集结构的合成数据（1千 ~ 1千万行），对每个规模在独立进程中
+依次运行各阶段，记录耗时和峰值内存（RSS），结果写为 JSON 并可与已保存的基线比较。
+参考运行的基线（默认规模，每个规模运行 3 次取中位数）提交在 benchmarks/baseline_pipeline.json，
+其中记录了运行环境；在不同的机器上比较前应先用 --save-baseline 重新生成。
+
+阶段: load_data, feature_engineering, prepare_data, train_base_models,
+      calculate_fusion_weights, fusion_predict, batch_prediction_demo, plots
+
+用法:
+    python benchmarks/bench_pipeline.py --sizes 1000,10000,100000 --output results.json
+    python benchmarks/bench_pipeline.py --repeat 3 --save-baseline benchmarks/baseline_pipeline.json
+    python benchmarks/bench_pipeline.py --compare                # 与提交的基线比较，允许耗时增幅 25%
+    python benchmarks/bench_pipeline.py --compare 0.5 --baseline benchmarks/baseline.json
+超出基线（耗时增幅超过 --compare 阈值，或扩展指数增量超过 EXPONENT_TOLERANCE）时退出码为 1
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# 提交的参考基线
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_pipeline.json')
+
+# 相对基线默认允许的耗时增幅
+DEFAULT_COMPARE_THRESHOLD = 0.25
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+MAX_SIZE = 10_000_000
+
+STAGES = ['load_data', 'feature_engineering', 'prepare_data', 'train_base_models',
+          'calculate_fusion_weights', 'fusion_predict', 'batch_prediction_demo', 'plots']
+
+# 小于该耗时（秒）的差异视为噪声，不判为回归
+NOISE_FLOOR_S = 0.05
+
+# 相邻规模间扩展指数（log 耗时比 / log 行数比）允许的增量
+EXPONENT_TOLERANCE = 0.3
+
+# 合成数据按块生成和写出的行数
+GENERATE_CHUNK_ROWS = 1_000_000
+
+
+def generate_synthetic_pima(n_rows, seed=0):
+    """
+    生成清洗后 Pima 数据集结构的合成数据（无零值缺失）
+    Outcome 由血糖、BMI、年龄和遗传因素的逻辑模型抽样，阳性比例约 35%
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Pregnancies': rng.poisson(3.8, n_rows).clip(0, 17),
+        'Glucose': rng.normal(121.7, 30.4, n_rows).clip(44, 199).round(),
+        'BloodPressure': rng.normal(72.4, 12.1, n_rows).clip(24, 122).round(),
+        'SkinThickness': rng.normal(29.1, 8.8, n_rows).clip(7, 99).round(),
+        'Insulin': rng.lognormal(4.8, 0.55, n_rows).clip(14, 846).round(),
+        'BMI': rng.normal(32.4, 6.9, n_rows).clip(18.2, 67.1).round(1),
+        'DiabetesPedigreeFunction': rng.gamma(2.0, 0.236, n_rows).clip(0.078, 2.42).round(3),
+        'Age': (21 + rng.gamma(1.6, 7.5, n_rows)).clip(21, 81).astype(int)
+    })
+    logit = (-9.0 + 0.035 * df['Glucose'] + 0.09 * df['BMI'] + 0.015 * df['Age']
+             + 0.9 * df['DiabetesPedigreeFunction'] + 0.12 * df['Pregnancies'])
+    df['Outcome'] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df
+
+
+def write_synthetic_dataset(path, n_rows, seed=0):
+    """按块生成并写出合成数据集（CSV 或 Parquet）"""
+    from columnar_io import ChunkedTableWriter
+
+    with ChunkedTableWriter(path) as writer:
+        for block, start in enumerate(range(0, n_rows, GENERATE_CHUNK_ROWS)):
+            writer.write(generate_synthetic_pima(min(GENERATE_CHUNK_ROWS, n_rows - start), seed + block))
+        return writer.path
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）；不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stages(n_rows, workdir, file_format='csv', parallel=False):
+    """在当前进程中运行一个规模的全部阶段，返回 {阶段: {'seconds', 'peak_rss_mb'}}"""
+    from diabetes_risk_prediction_system import DiabetesRiskPredictionSystem
+    # 预先导入训练和评估依赖，使各阶段耗时不包含模块的首次导入
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.linear_model  # noqa: F401
+    import sklearn.metrics  # noqa: F401
+    import sklearn.model_selection  # noqa: F401
+
+    data_path = write_synthetic_dataset(os.path.join(workdir, f'pima_{n_rows}.{file_format}'), n_rows)
+    system = DiabetesRiskPredictionSystem(output_dir=workdir, plot_mode='now')
+    results = {}
+
+    def timed(stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        results[stage] = {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+        return value
+
+    df = timed('load_data', system.load_data, data_path)
+    df_engineered = timed('feature_engineering', system.feature_engineering, df)
+    system.df_engineered = df_engineered
+    timed('prepare_data', system.prepare_data, df_engineered)
+    system.build_base_models()
+    timed('train_base_models', system.train_base_models, parallel=parallel)
+    timed('calculate_fusion_weights', system.calculate_fusion_weights)
+    timed('fusion_predict', system.fusion_predict, system.X_test, cache=False)
+    problem2_results = timed('batch_prediction_demo', system.batch_prediction_demo)
+
+    def plots():
+        problem1_results = system.evaluate_fusion_model()
+        system.create_problem1_visualizations(problem1_results)
+        system.create_problem2_visualizations(problem2_results)
+        system.renderer.close()
+
+    timed('plots', plots)
+    return results
+
+
+def run_size(n_rows, file_format='csv', parallel=False):
+    """在独立子进程中运行一个规模（峰值内存互不影响）"""
+    with tempfile.TemporaryDirectory() as workdir:
+        result_path = os.path.join(workdir, 'result.json')
+        command = [sys.executable, os.path.abspath(__file__), '--run-one', str(n_rows),
+                   '--format', file_format, '--workdir', workdir, '--result', result_path]
+        if parallel:
+            command.append('--parallel')
+        subprocess.run(command, cwd=REPO_ROOT, check=True)
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def median_results(runs):
+    """多次运行同一规模的结果合并：各阶段取耗时中位数和峰值内存最大值"""
+    merged = {}
+    for stage in runs[0]:
+        rss = [run[stage]['peak_rss_mb'] for run in runs if run[stage]['peak_rss_mb'] is not None]
+        merged[stage] = {'seconds': float(np.median([run[stage]['seconds'] for run in runs])),
+                         'peak_rss_mb': max(rss) if rss else None}
+    return merged
+
+
+def scaling_exponents(results):
+    """相邻规模之间各阶段的扩展指数：耗时 ∝ 行数^k"""
+    sizes = sorted(results, key=int)
+    exponents = {}
+    for small, large in zip(sizes, sizes[1:]):
+        for stage in STAGES:
+            t_small = results[small].get(stage, {}).get('seconds')
+            t_large = results[large].get(stage, {}).get('seconds')
+            # 耗时太短时比值主要是噪声
+            if t_small and t_large and max(t_small, t_large) >= NOISE_FLOOR_S:
+                exponents[f'{stage}@{small}-{large}'] = (math.log(t_large / t_small)
+                                                         / math.log(int(large) / int(small)))
+    return exponents
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    """
+    与基线比较，返回 (回归描述列表, 比较的阶段数)
+    tolerance: 相对基线允许的耗时增幅（0.25 表示最多慢 25%）
+    """
+    regressions = []
+    n_compared = 0
+    for size, stages in report['results'].items():
+        for stage, current in stages.items():
+            reference = baseline['results'].get(size, {}).get(stage)
+            if reference is None:
+                continue
+            n_compared += 1
+            limit = reference['seconds'] * (1 + tolerance)
+            if current['seconds'] > limit and current['seconds'] - reference['seconds'] > NOISE_FLOOR_S:
+                regressions.append(f"{stage} @ {size} 行: {current['seconds']:.3f}s > "
+                                   f"基线 {reference['seconds']:.3f}s × {1 + tolerance:.2f}")
+
+    for key, exponent in report['scaling_exponents'].items():
+        reference = baseline.get('scaling_exponents', {}).get(key)
+        if reference is not None and exponent > reference + EXPONENT_TOLERANCE:
+            regressions.append(f"扩展指数 {key}: {exponent:.2f} > 基线 {reference:.2f} + {EXPONENT_TOLERANCE}")
+    return regressions, n_compared
+
+
+def _environment():
+    import pandas as pd
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__
+    }
+
+
+def print_report(report):
+    print(f"\n{'规模':>10}  {'阶段':<26}{'耗时(s)':>10}{'峰值RSS(MB)':>14}")
+    for size, stages in report['results'].items():
+        for stage in STAGES:
+            if stage in stages:
+                rss = stages[stage]['peak_rss_mb']
+                rss_text = f"{rss:.1f}" if rss is not None else '-'
+                print(f"{int(size):>10}  {stage:<26}{stages[stage]['seconds']:>10.3f}{rss_text:>14}")
+    if report['scaling_exponents']:
+        print("\n扩展指数（耗时 ∝ 行数^k）:")
+        for key, exponent in report['scaling_exponents'].items():
+            print(f"  {key}: {exponent:.2f}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='糖尿病风险预测流程分阶段基准')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help=f'逗号分隔的数据行数（1000 ~ {MAX_SIZE}）')
+    parser.add_argument('--format', default='csv', choices=['csv', 'parquet'], help='合成数据文件格式')
+    parser.add_argument('--parallel', action='store_true', help='并行训练基础模型')
+    parser.add_argument('--repeat', type=int, default=1, help='每个规模运行的次数（各阶段取耗时中位数）')
+    parser.add_argument('--output', help='结果 JSON 文件')
+    parser.add_argument('--compare', type=float, nargs='?', const=DEFAULT_COMPARE_THRESHOLD, metavar='THRESHOLD',
+                        help=f'与基线比较，耗时增幅超过 THRESHOLD（默认 {DEFAULT_COMPARE_THRESHOLD}）时失败')
+    parser.add_argument('--baseline', help='基线 JSON 文件（由 --save-baseline 生成；指定时即进行比较），'
+                                           '默认为提交的 benchmarks/baseline_pipeline.json')
+    parser.add_argument('--save-baseline', help='将本次结果保存为基线')
+    # 子进程内部使用
+    parser.add_argument('--run-one', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        # 流程本身的输出不干扰基准结果
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_stages(args.run_one, args.workdir, args.format, args.parallel)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        return
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    if sizes[0] < 1 or sizes[-1] > MAX_SIZE:
+        parser.error(f'数据行数应在 1 ~ {MAX_SIZE} 之间')
+    if args.compare is not None and args.compare < 0:
+        parser.error('--compare 阈值不能为负数')
+    baseline_path = args.baseline or (DEFAULT_BASELINE if args.compare is not None else None)
+    threshold = DEFAULT_COMPARE_THRESHOLD if args.compare is None else args.compare
+
+    if args.repeat < 1:
+        parser.error('--repeat 应不小于 1')
+
+    report = {'environment': _environment(), 'format': args.format, 'parallel': args.parallel,
+              'repeat': args.repeat, 'results': {}}
+    for n_rows in sizes:
+        print(f"正在运行 {n_rows} 行...", flush=True)
+        runs = [run_size(n_rows, args.format, args.parallel) for _ in range(args.repeat)]
+        report['results'][str(n_rows)] = median_results(runs)
+    report['scaling_exponents'] = scaling_exponents(report['results'])
+    print_report(report)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n结果已保存到: {path}")
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions, n_compared = compare_with_baseline(report, baseline, threshold)
+        print(f"\n与基线 {baseline_path} 比较 {n_compared} 个阶段（允许耗时增幅 {threshold:.0%}）")
+        if n_compared == 0:
+            print("本次规模在基线中都不存在，未进行比较")
+            sys.exit(1)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回归:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n与基线相比无性能回归")
+
+
+if __name__ == "__main__":
+    main()
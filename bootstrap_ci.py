@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+评估指标的自助法（bootstrap）置信区间（仅依赖 NumPy）
+每批重复一次性抽取 (重复数, 样本数) 的下标矩阵，用 bincount 得到每个重复中各样本的出现次数，
+再由出现次数直接算出所有重复的混淆矩阵计数和 ROC AUC：
+  - 混淆矩阵: 出现次数矩阵 × 每个样本的 (TN, FP, FN, TP) 独热编码
+  - AUC: 评分只排序一次，按相同评分分组后用累计的阴性权重计算 Mann-Whitney U（并列计 0.5）
+不需要逐个重复调用 sklearn。重复的分批只取决于样本数和重复数，每批由 SeedSequence 派生独立的
+随机流，分配到进程池中并行计算，因此结果与进程数无关。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BOOTSTRAP_METRICS = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']
+
+# 每批重复的出现次数矩阵元素上限（控制每个任务的内存）
+BOOTSTRAP_BATCH_ELEMENTS = 1_000_000
+# 每批最多的重复数（小数据集也能分成多批并行）
+BOOTSTRAP_BATCH_REPLICATES = 250
+
+# 排序后的标签和评分分组，每个工作进程初始化时计算一次，之后的任务只传递种子和重复数
+_WORKER_DATA = {}
+
+
+def _confusion_metrics(counts):
+    """
+    counts: 形状 (重复数, 4) 的 TN/FP/FN/TP 计数
+    返回: 指标名 -> 每个重复的值（分母为 0 时记为 0，与 sklearn 一致）
+    """
+    tn, fp, fn, tp = counts.T.astype(np.float64)
+    total = tn + fp + fn + tp
+
+    def ratio(numerator, denominator):
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+    return {
+        'accuracy': ratio(tp + tn, total),
+        'precision': ratio(tp, tp + fp),
+        'recall': ratio(tp, tp + fn),
+        'f1': ratio(2 * tp, 2 * tp + fp + fn)
+    }
+
+
+def _init_worker(y_true, y_pred, scores):
+    """进程池初始化：按评分排序一次并缓存分组信息"""
+    _WORKER_DATA.update(_prepare(y_true, y_pred, scores))
+
+
+def _prepare(y_true, y_pred, scores):
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_pred = np.asarray(y_pred).astype(np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+
+    order = np.argsort(scores, kind='stable')
+    sorted_scores = scores[order]
+    # 相同评分组的起始位置（按评分升序）
+    group_starts = np.r_[0, np.flatnonzero(np.diff(sorted_scores)) + 1]
+    return {
+        'n': len(y_true),
+        'order': order,
+        'positive': y_true[order].astype(np.float64),
+        'group_starts': group_starts,
+        # 每个样本在混淆矩阵中的格子：0=TN, 1=FP, 2=FN, 3=TP
+        'cell': np.eye(4)[2 * y_true + y_pred]
+    }
+
+
+def _replicate_metrics(data, weights):
+    """
+    weights: 形状 (重复数, 样本数) 的出现次数
+    返回: 指标名 -> 每个重复的值
+    """
+    metrics = _confusion_metrics(weights @ data['cell'])
+
+    # AUC：按评分升序分组，U = Σ_组 阳性权重 × (更低评分的阴性权重 + 0.5 × 同组阴性权重)
+    sorted_weights = weights[:, data['order']]
+    positive = sorted_weights * data['positive']
+    negative = sorted_weights - positive
+    positive_groups = np.add.reduceat(positive, data['group_starts'], axis=1)
+    negative_groups = np.add.reduceat(negative, data['group_starts'], axis=1)
+    negative_below = np.cumsum(negative_groups, axis=1) - negative_groups
+    u = (positive_groups * (negative_below + 0.5 * negative_groups)).sum(axis=1)
+    pairs = positive_groups.sum(axis=1) * negative_groups.sum(axis=1)
+    # 重复中只有一个类别时 AUC 无定义
+    metrics['roc_auc'] = np.divide(u, pairs, out=np.full(len(u), np.nan), where=pairs > 0)
+    return metrics
+
+
+def _bootstrap_batch(seed, n_replicates):
+    """一批重复（进程池任务）：一次抽取全部下标"""
+    data = _WORKER_DATA
+    n = data['n']
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, n, size=(n_replicates, n))
+    offsets = (np.arange(n_replicates) * n)[:, None]
+    weights = np.bincount((indices + offsets).ravel(), minlength=n_replicates * n)
+    return _replicate_metrics(data, weights.reshape(n_replicates, n).astype(np.float64))
+
+
+def point_metrics(y_true, y_pred, scores):
+    """在完整样本上计算各指标（与自助重复使用同一套公式）"""
+    data = _prepare(y_true, y_pred, scores)
+    metrics = _replicate_metrics(data, np.ones((1, data['n'])))
+    return {name: float(values[0]) for name, values in metrics.items()}
+
+
+def bootstrap_confidence_intervals(y_true, y_pred, scores, n_bootstrap=2000, confidence=0.95,
+                                   random_state=0, n_jobs=None):
+    """
+    自助法百分位置信区间
+    y_true: 真实标签；y_pred: 预测标签；scores: 风险评分（用于 AUC）
+    n_bootstrap: 重复次数；confidence: 置信水平
+    n_jobs: 并行进程数（默认全部核心，1 表示在当前进程中计算）
+    返回: 指标名 -> {'estimate', 'lower', 'upper', 'std'}
+    """
+    n = len(y_true)
+    # 分批（及各批的随机流）与进程数无关，n_jobs 只决定进程池大小
+    batch_size = max(1, min(BOOTSTRAP_BATCH_REPLICATES, BOOTSTRAP_BATCH_ELEMENTS // max(n, 1)))
+    sizes = [min(batch_size, n_bootstrap - start) for start in range(0, n_bootstrap, batch_size)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+
+    n_jobs = max(1, min(n_jobs or os.cpu_count() or 1, len(sizes)))
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(y_true, y_pred, scores)) as executor:
+            batches = list(executor.map(_bootstrap_batch, seeds, sizes))
+    else:
+        _init_worker(y_true, y_pred, scores)
+        batches = [_bootstrap_batch(seed, size) for seed, size in zip(seeds, sizes)]
+
+    estimates = point_metrics(y_true, y_pred, scores)
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for name in BOOTSTRAP_METRICS:
+        values = np.concatenate([batch[name] for batch in batches])
+        values = values[~np.isnan(values)]
+        lower, upper = np.percentile(values, [tail, 100 - tail])
+        intervals[name] = {
+            'estimate': estimates[name],
+            'lower': float(lower),
+            'upper': float(upper),
+            'std': float(values.std(ddof=1))
+        }
+    return intervals
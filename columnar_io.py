@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+清洗后数据集的读写
+优先使用 Parquet 列式格式（支持列投影和行组过滤，读取时内存映射），
+未安装 pyarrow 或文件不存在时回退到 CSV
+也可以读取分区目录（data_preprocessing.py 增量模式的输出，每个分区一个文件）
+pyarrow 只在第一次读写 Parquet 时导入
+"""
+
+import glob
+import os
+import operator
+
+import pandas as pd
+
+# (pyarrow, pyarrow.parquet)，未安装时为 (None, None)；首次使用时导入
+_PYARROW = None
+
+# Parquet 行组大小（行），行组是过滤和并行读取的最小单位
+PARQUET_ROW_GROUP_SIZE = 128 * 1024
+
+_FILTER_OPERATORS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge
+}
+
+
+def _pyarrow():
+    """按需导入 pyarrow"""
+    global _PYARROW
+    if _PYARROW is None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            pa = pq = None
+        _PYARROW = (pa, pq)
+    return _PYARROW
+
+
+def is_parquet(path):
+    return str(path).lower().endswith(('.parquet', '.pq'))
+
+
+def csv_fallback_path(path):
+    """Parquet 路径对应的 CSV 路径"""
+    return os.path.splitext(path)[0] + '.csv'
+
+
+def _apply_filters(df, filters):
+    """在 DataFrame 上应用 pyarrow 风格的过滤条件 [(列, 运算符, 值), ...]（AND）"""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        if op == 'in':
+            mask &= df[column].isin(value)
+        elif op == 'not in':
+            mask &= ~df[column].isin(value)
+        else:
+            mask &= _FILTER_OPERATORS[op](df[column], value)
+    return df[mask].reset_index(drop=True)
+
+
+def write_table(df, path, encoding='utf-8-sig'):
+    """
+    保存数据表；path 以 .parquet 结尾且安装了 pyarrow 时写 Parquet，否则写 CSV
+    返回实际写入的路径
+    """
+    if is_parquet(path):
+        if _pyarrow()[1] is not None:
+            df.to_parquet(path, engine='pyarrow', index=False, row_group_size=PARQUET_ROW_GROUP_SIZE)
+            return path
+        path = csv_fallback_path(path)
+        print(f"未安装 pyarrow，改为保存 CSV: {path}")
+    df.to_csv(path, index=False, encoding=encoding)
+    return path
+
+
+def partition_files(directory):
+    """分区目录中的数据文件（CSV/Parquet，按文件名排序）"""
+    return sorted(glob.glob(os.path.join(directory, '*.csv')) +
+                  glob.glob(os.path.join(directory, '*.parquet')))
+
+
+def read_table(path, columns=None, filters=None):
+    """
+    读取数据表
+    path: 数据文件，或分区目录（按文件名顺序读取其中每个分区后合并）
+    columns: 只读取这些列（Parquet 只解码被选中的列）
+    filters: [(列, 运算符, 值), ...]，Parquet 借助行组统计跳过不满足条件的行组
+    Parquet 不可用时回退到同名 CSV
+    """
+    if os.path.isdir(path):
+        files = partition_files(path)
+        if not files:
+            raise FileNotFoundError(f"分区目录中没有 CSV/Parquet 文件: {path}")
+        return pd.concat([read_table(file, columns=columns, filters=filters) for file in files],
+                         ignore_index=True)
+
+    if is_parquet(path):
+        pq = _pyarrow()[1]
+        if pq is not None and os.path.exists(path):
+            table = pq.read_table(path, columns=columns, filters=filters, memory_map=True)
+            # 数值列无缺失值时转换为 NumPy 不需要复制
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        fallback = csv_fallback_path(path)
+        print(f"Parquet 不可用，回退读取 CSV: {fallback}")
+        path = fallback
+
+    df = pd.read_csv(path, usecols=columns)
+    if columns is not None:
+        df = df[columns]
+    if filters:
+        df = _apply_filters(df, filters)
+    return df
+
+
+def iter_table_chunks(path, chunksize, columns=None):
+    """按块迭代读取数据表（Parquet 按记录批次，CSV 按行块）"""
+    pq = _pyarrow()[1] if is_parquet(path) else None
+    if pq is not None and os.path.exists(path):
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        if is_parquet(path):
+            path = csv_fallback_path(path)
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+            yield chunk
+
+
+class ChunkedTableWriter:
+    """
+    分块写出数据表（流式预处理使用）
+    Parquet：每块写为一个行组；CSV：追加写入，只写一次表头
+    """
+
+    def __init__(self, path, encoding='utf-8-sig'):
+        if is_parquet(path) and _pyarrow()[1] is None:
+            path = csv_fallback_path(path)
+            print(f"未安装 pyarrow，改为保存 CSV: {path}")
+        self.path = path
+        self.encoding = encoding
+        self._writer = None
+        self._file = None
+
+    def write(self, df):
+        if is_parquet(self.path):
+            pa, pq = _pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                # 各块的列类型保持与第一块一致
+                table = table.cast(self._writer.schema)
+            self._writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        else:
+            header = self._file is None
+            if header:
+                self._file = open(self.path, 'w', encoding=self.encoding, newline='')
+            df.to_csv(self._file, index=False, header=header)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
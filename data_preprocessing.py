@@ -6,54 +6,120 @@ data Preprocessing for Diabetes Dataset
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler
 import sys
-import io
-
-# 设置标准输出编码为utf-8
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
-plt.rcParams['axes.unicode_minus'] = False
-
-def load_raw_data():
+import os
+import hashlib
+import json
+
+from quantile_sketch import QuantileSketch
+from pipeline_telemetry import traced, annotate
+from columnar_io import write_table, iter_table_chunks, partition_files, ChunkedTableWriter
+from report_rendering import (DEFAULT_OUTPUT_DIR, FigureRenderer,
+                              render_zero_value_comparison, render_distribution_comparison)
+
+# 需要处理零值的列（排除Pregnancies和Outcome）
+ZERO_COLUMNS = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+
+# 流式处理每块的行数
+STREAM_CHUNK_SIZE = 100000
+
+# 原始数据的默认路径（相对当前工作目录）与清洗后数据的文件名（保存在输出目录中）
+RAW_DATA_PATH = 'diabetes_data.csv'
+CLEANED_DATA_NAME = 'diabetes_data_cleaned.csv'
+
+# 增量预处理的统计清单
+# 版本 2：清洗后分区文件名带输入路径哈希
+MANIFEST_VERSION = 2
+MANIFEST_NAME = 'preprocessing_manifest.json'
+
+def _output_path(output_dir, filename):
+    """输出目录中的文件路径（目录不存在时创建）"""
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, filename)
+
+@traced
+def load_raw_data(input_path=RAW_DATA_PATH):
     """加载原始数据"""
     print("="*60)
     print("步骤1：加载原始数据")
     print("="*60)
 
-    df = pd.read_csv("C:/Users/王晋华/Desktop/diabetes_data.csv")
+    df = pd.read_csv(input_path)
+    annotate(rows=len(df))
     print(f"原始数据形状: {df.shape}")
     print(f"\n前5行数据:\n{df.head()}")
 
     return df
 
-def analyze_data_quality(df):
-    """分析数据质量"""
+@traced
+def compute_column_statistics(df):
+    """
+    一次向量化计算所有数值列的统计量（供质量分析、零值处理、异常值检测和统计对比共用）
+    返回: DataFrame，每行一个数值列，包含缺失值/零值个数、均值、标准差、最值、
+          四分位数、非零值中位数、IQR边界和异常值个数
+    """
+    numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    values = df[numeric_columns].to_numpy(dtype=np.float64)
+    n_rows = len(values)
+    annotate(rows=n_rows)
+
+    missing = np.isnan(values).sum(axis=0)
+    quantile = np.nanquantile if missing.any() else np.quantile
+    q1, median, q3 = quantile(values, [0.25, 0.5, 0.75], axis=0)
+    zero_mask = values == 0
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+    outlier_count = ((values < lower_bound) | (values > upper_bound)).sum(axis=0)
+
+    stats = pd.DataFrame({
+        'missing': missing,
+        'zero_count': zero_mask.sum(axis=0),
+        'mean': np.nanmean(values, axis=0),
+        'std': np.nanstd(values, axis=0, ddof=1),
+        'min': np.nanmin(values, axis=0),
+        'max': np.nanmax(values, axis=0),
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'nonzero_median': np.nanmedian(np.where(zero_mask, np.nan, values), axis=0),
+        'lower_bound': lower_bound,
+        'upper_bound': upper_bound,
+        'outlier_count': outlier_count
+    }, index=numeric_columns)
+    stats['zero_percentage'] = stats['zero_count'] / n_rows * 100
+    stats['outlier_percentage'] = stats['outlier_count'] / n_rows * 100
+    return stats
+
+@traced
+def analyze_data_quality(df, stats=None, output_dir=DEFAULT_OUTPUT_DIR):
+    """
+    分析数据质量
+    stats: compute_column_statistics(df) 的结果，未提供时自动计算
+    output_dir: 质量报告（data_quality_report.txt）的保存目录
+    """
     print("\n" + "="*60)
     print("步骤2：数据质量分析")
     print("="*60)
 
+    if stats is None:
+        stats = compute_column_statistics(df)
+
     # 检查缺失值
     missing = df.isnull().sum()
     print(f"\n缺失值统计:\n{missing}")
 
     # 检查零值（医学上不合理的零值）
-    zero_columns = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
-
     print("\n医学上不合理的零值统计:")
     zero_stats = {}
-    for col in zero_columns:
-        zero_count = (df[col] == 0).sum()
-        zero_percentage = (zero_count / len(df)) * 100
+    for col in ZERO_COLUMNS:
+        zero_count = int(stats.at[col, 'zero_count'])
+        zero_percentage = stats.at[col, 'zero_percentage']
         zero_stats[col] = {'count': zero_count, 'percentage': zero_percentage}
         print(f"{col}: {zero_count} ({zero_percentage:.2f}%)")
 
     # 保存质量分析结果
-    with open("C:/Users/王晋华/Desktop/data_quality_report.txt", "w", encoding='utf-8') as f:
+    with open(_output_path(output_dir, "data_quality_report.txt"), "w", encoding='utf-8') as f:
         f.write("="*60 + "\n")
         f.write("数据质量分析报告\n")
         f.write("="*60 + "\n\n")
@@ -70,73 +136,72 @@ def analyze_data_quality(df):
 
     return zero_stats
 
-def handle_zero_values(df):
-    """处理不合理的零值"""
+@traced
+def handle_zero_values(df, output_path=None, stats=None):
+    """
+    处理不合理的零值
+    output_path: 清洗后数据的保存路径（默认输出目录中的 diabetes_data_cleaned.csv）；
+                 以 .parquet 结尾时保存为 Parquet 列式格式
+    stats: compute_column_statistics(df) 的结果，未提供时自动计算
+    """
     print("\n" + "="*60)
     print("步骤3：处理不合理的零值")
     print("="*60)
 
-    df_cleaned = df.copy()
-
-    # 需要处理零值的列（排除Pregnancies和Outcome）
-    zero_columns = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+    if stats is None:
+        stats = compute_column_statistics(df)
 
-    replacement_values = {}
-    for col in zero_columns:
-        # 计算非零值的中位数
-        non_zero_values = df_cleaned[df_cleaned[col] != 0][col]
-        median_value = non_zero_values.median()
-        replacement_values[col] = median_value
+    # 需要处理零值的列（排除Pregnancies和Outcome）一次性替换
+    replacement_values = stats.loc[ZERO_COLUMNS, 'nonzero_median'].to_dict()
+    values = df[ZERO_COLUMNS].to_numpy(dtype=np.float64)
+    medians = np.array([replacement_values[col] for col in ZERO_COLUMNS])
+    zero_mask = values == 0
 
-        # 用中位数替换零值
-        zero_mask = df_cleaned[col] == 0
-        df_cleaned.loc[zero_mask, col] = median_value
+    df_cleaned = df.copy()
+    df_cleaned[ZERO_COLUMNS] = np.where(zero_mask, medians, values)
 
-        replaced_count = zero_mask.sum()
-        print(f"{col}: 替换 {replaced_count} 个零值，使用中位数 {median_value:.2f}")
+    for col, replaced_count in zip(ZERO_COLUMNS, zero_mask.sum(axis=0)):
+        print(f"{col}: 替换 {replaced_count} 个零值，使用中位数 {replacement_values[col]:.2f}")
 
     # 保存处理后的数据
-    df_cleaned.to_csv("C:/Users/王晋华/Desktop/diabetes_data_cleaned.csv", index=False, encoding='utf-8-sig')
-    print(f"\n清洗后的数据已保存到: diabetes_data_cleaned.csv")
+    if output_path is None:
+        output_path = _output_path(DEFAULT_OUTPUT_DIR, CLEANED_DATA_NAME)
+    saved_path = write_table(df_cleaned, output_path)
+    print(f"\n清洗后的数据已保存到: {saved_path}")
 
+    annotate(rows=len(df_cleaned))
     return df_cleaned, replacement_values
 
-def detect_outliers(df):
-    """检测异常值（使用IQR方法）"""
+@traced
+def detect_outliers(df, stats=None, output_dir=DEFAULT_OUTPUT_DIR):
+    """
+    检测异常值（使用IQR方法）
+    stats: compute_column_statistics(df) 的结果，未提供时自动计算
+    output_dir: 异常值报告（outlier_detection_report.txt）的保存目录
+    """
     print("\n" + "="*60)
     print("步骤4：异常值检测（IQR方法）")
     print("="*60)
 
-    outlier_report = {}
-
-    # 对数值型特征进行异常值检测
-    numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-    numeric_columns.remove('Outcome')  # 排除目标变量
-
-    for col in numeric_columns:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+    if stats is None:
+        stats = compute_column_statistics(df)
 
-        outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)]
-        outlier_count = len(outliers)
-        outlier_percentage = (outlier_count / len(df)) * 100
+    outlier_report = {}
 
+    # 对数值型特征进行异常值检测（排除目标变量）
+    for col, row in stats.drop(index='Outcome').iterrows():
         outlier_report[col] = {
-            'count': outlier_count,
-            'percentage': outlier_percentage,
-            'lower_bound': lower_bound,
-            'upper_bound': upper_bound
+            'count': int(row['outlier_count']),
+            'percentage': row['outlier_percentage'],
+            'lower_bound': row['lower_bound'],
+            'upper_bound': row['upper_bound']
         }
 
-        print(f"{col}: {outlier_count} 个异常值 ({outlier_percentage:.2f}%)")
-        print(f"  正常范围: [{lower_bound:.2f}, {upper_bound:.2f}]")
+        print(f"{col}: {outlier_report[col]['count']} 个异常值 ({row['outlier_percentage']:.2f}%)")
+        print(f"  正常范围: [{row['lower_bound']:.2f}, {row['upper_bound']:.2f}]")
 
     # 保存异常值检测报告
-    with open("C:/Users/王晋华/Desktop/outlier_detection_report.txt", "w", encoding='utf-8') as f:
+    with open(_output_path(output_dir, "outlier_detection_report.txt"), "w", encoding='utf-8') as f:
         f.write("="*60 + "\n")
         f.write("异常值检测报告（IQR方法）\n")
         f.write("="*60 + "\n\n")
@@ -149,146 +214,401 @@ def detect_outliers(df):
 
     return outlier_report
 
-def create_preprocessing_visualizations(df_original, df_cleaned):
-    """创建数据预处理前后对比可视化"""
+@traced
+def create_preprocessing_visualizations(df_original, df_cleaned, renderer=None):
+    """
+    创建数据预处理前后对比可视化
+    renderer: FigureRenderer；未提供时使用默认输出目录并等待渲染完成
+    """
+    own_renderer = renderer is None
+    if own_renderer:
+        renderer = FigureRenderer()
+    if not renderer.enabled:
+        return
+
     print("\n" + "="*60)
     print("步骤5：生成数据预处理可视化图")
     print("="*60)
 
     # 图1：数据清洗前后对比（零值处理）
-    zero_columns = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
-
-    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    zero_columns = ZERO_COLUMNS
 
     # 清洗前零值统计
     zero_counts_before = [((df_original[col] == 0).sum() / len(df_original) * 100) for col in zero_columns]
     # 清洗后零值统计（应该都是0）
     zero_counts_after = [((df_cleaned[col] == 0).sum() / len(df_cleaned) * 100) for col in zero_columns]
 
-    x = np.arange(len(zero_columns))
-    width = 0.35
-
-    axes[0].bar(x - width/2, zero_counts_before, width, label='清洗前', color='#e74c3c', alpha=0.8)
-    axes[0].bar(x + width/2, zero_counts_after, width, label='清洗后', color='#2ecc71', alpha=0.8)
-    axes[0].set_xlabel('特征', fontsize=12)
-    axes[0].set_ylabel('零值比例 (%)', fontsize=12)
-    axes[0].set_title('数据清洗前后零值比例对比', fontsize=14, fontweight='bold')
-    axes[0].set_xticks(x)
-    axes[0].set_xticklabels(zero_columns, rotation=45, ha='right')
-    axes[0].legend()
-    axes[0].grid(axis='y', alpha=0.3)
-
     # 数据完整性改善
     completeness_before = 100 - (df_original[zero_columns] == 0).any(axis=1).sum() / len(df_original) * 100
     completeness_after = 100
 
-    categories = ['清洗前', '清洗后']
-    completeness = [completeness_before, completeness_after]
-    colors = ['#e74c3c', '#2ecc71']
-
-    axes[1].bar(categories, completeness, color=colors, alpha=0.8, width=0.5)
-    axes[1].set_ylabel('数据完整性 (%)', fontsize=12)
-    axes[1].set_title('数据完整性提升情况', fontsize=14, fontweight='bold')
-    axes[1].set_ylim([0, 105])
-    axes[1].grid(axis='y', alpha=0.3)
-
-    # 在柱子上添加数值标签
-    for i, v in enumerate(completeness):
-        axes[1].text(i, v + 1, f'{v:.1f}%', ha='center', va='bottom', fontsize=11, fontweight='bold')
-
-    plt.tight_layout()
-    plt.savefig('C:/Users/王晋华/Desktop/数据预处理_零值处理对比分析.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print("已生成: 数据预处理_零值处理对比分析.png")
+    renderer.submit(render_zero_value_comparison, '数据预处理_零值处理对比分析.png',
+                    zero_columns=zero_columns, zero_before=zero_counts_before,
+                    zero_after=zero_counts_after, completeness=[completeness_before, completeness_after])
 
     # 图2：数据分布对比（处理前后）
-    fig, axes = plt.subplots(2, 3, figsize=(15, 8))
-    axes = axes.flatten()
-
     comparison_features = ['Glucose', 'BloodPressure', 'BMI', 'Insulin', 'SkinThickness', 'Age']
-
-    for idx, feature in enumerate(comparison_features):
+    data_before, data_after = [], []
+    for feature in comparison_features:
         # 清洗前数据（移除零值以便可视化）
-        data_before = df_original[df_original[feature] != 0][feature] if feature in zero_columns else df_original[feature]
+        column = df_original[feature].to_numpy()
+        data_before.append(column[column != 0] if feature in zero_columns else column)
         # 清洗后数据
-        data_after = df_cleaned[feature]
-
-        axes[idx].hist(data_before, bins=30, alpha=0.5, label='清洗前', color='#e74c3c', edgecolor='black')
-        axes[idx].hist(data_after, bins=30, alpha=0.5, label='清洗后', color='#2ecc71', edgecolor='black')
-        axes[idx].set_xlabel(feature, fontsize=10)
-        axes[idx].set_ylabel('频数', fontsize=10)
-        axes[idx].set_title(f'{feature} 分布对比', fontsize=11, fontweight='bold')
-        axes[idx].legend()
-        axes[idx].grid(alpha=0.3)
-
-    plt.tight_layout()
-    plt.savefig('C:/Users/王晋华/Desktop/数据预处理_特征分布对比分析.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print("已生成: 数据预处理_特征分布对比分析.png")
-
-def generate_statistics_comparison(df_original, df_cleaned):
-    """生成预处理前后的统计对比"""
+        data_after.append(df_cleaned[feature].to_numpy())
+
+    renderer.submit(render_distribution_comparison, '数据预处理_特征分布对比分析.png',
+                    features=comparison_features, data_before=data_before, data_after=data_after)
+
+    if own_renderer:
+        renderer.close()
+
+@traced
+def generate_statistics_comparison(df_original, df_cleaned, stats_original=None, stats_cleaned=None,
+                                   output_dir=DEFAULT_OUTPUT_DIR):
+    """
+    生成预处理前后的统计对比
+    stats_original / stats_cleaned: 清洗前后的 compute_column_statistics 结果，未提供时自动计算
+    output_dir: 对比报告（preprocessing_statistics_comparison.txt）的保存目录
+    """
     print("\n" + "="*60)
     print("步骤6：生成统计对比报告")
     print("="*60)
 
-    numeric_columns = df_original.select_dtypes(include=[np.number]).columns.tolist()
-    numeric_columns.remove('Outcome')
+    if stats_original is None:
+        stats_original = compute_column_statistics(df_original)
+    if stats_cleaned is None:
+        stats_cleaned = compute_column_statistics(df_cleaned)
+
+    numeric_columns = stats_original.index.drop('Outcome')
 
-    with open("C:/Users/王晋华/Desktop/preprocessing_statistics_comparison.txt", "w", encoding='utf-8') as f:
+    with open(_output_path(output_dir, "preprocessing_statistics_comparison.txt"), "w", encoding='utf-8') as f:
         f.write("="*60 + "\n")
         f.write("数据预处理前后统计对比\n")
         f.write("="*60 + "\n\n")
 
         for col in numeric_columns:
+            before, after = stats_original.loc[col], stats_cleaned.loc[col]
             f.write(f"\n特征: {col}\n")
             f.write("-" * 40 + "\n")
 
             # 清洗前统计
             f.write("清洗前:\n")
-            f.write(f"  均值: {df_original[col].mean():.2f}\n")
-            f.write(f"  中位数: {df_original[col].median():.2f}\n")
-            f.write(f"  标准差: {df_original[col].std():.2f}\n")
-            f.write(f"  最小值: {df_original[col].min():.2f}\n")
-            f.write(f"  最大值: {df_original[col].max():.2f}\n")
+            f.write(f"  均值: {before['mean']:.2f}\n")
+            f.write(f"  中位数: {before['median']:.2f}\n")
+            f.write(f"  标准差: {before['std']:.2f}\n")
+            f.write(f"  最小值: {before['min']:.2f}\n")
+            f.write(f"  最大值: {before['max']:.2f}\n")
 
             # 清洗后统计
             f.write("\n清洗后:\n")
-            f.write(f"  均值: {df_cleaned[col].mean():.2f}\n")
-            f.write(f"  中位数: {df_cleaned[col].median():.2f}\n")
-            f.write(f"  标准差: {df_cleaned[col].std():.2f}\n")
-            f.write(f"  最小值: {df_cleaned[col].min():.2f}\n")
-            f.write(f"  最大值: {df_cleaned[col].max():.2f}\n")
+            f.write(f"  均值: {after['mean']:.2f}\n")
+            f.write(f"  中位数: {after['median']:.2f}\n")
+            f.write(f"  标准差: {after['std']:.2f}\n")
+            f.write(f"  最小值: {after['min']:.2f}\n")
+            f.write(f"  最大值: {after['max']:.2f}\n")
 
             # 变化情况
-            mean_change = ((df_cleaned[col].mean() - df_original[col].mean()) / df_original[col].mean() * 100)
+            mean_change = ((after['mean'] - before['mean']) / before['mean'] * 100)
             f.write(f"\n均值变化: {mean_change:+.2f}%\n")
 
     print("统计对比报告已保存到: preprocessing_statistics_comparison.txt")
 
-def main():
-    """主函数"""
+@traced
+def collect_stream_statistics(input_path, chunksize=STREAM_CHUNK_SIZE):
+    """
+    流式预处理第一遍：逐块统计
+    零值列：零值个数 + 非零值分位数草图；其他数值列：全部取值的分位数草图
+    """
+    stats = {'rows': 0, 'columns': None, 'zero_counts': {}, 'sketches': {}}
+
+    for chunk in iter_table_chunks(input_path, chunksize):
+        if stats['columns'] is None:
+            numeric_columns = chunk.select_dtypes(include=[np.number]).columns.tolist()
+            stats['columns'] = [col for col in numeric_columns if col != 'Outcome']
+            stats['zero_counts'] = {col: 0 for col in ZERO_COLUMNS}
+            stats['sketches'] = {col: QuantileSketch() for col in stats['columns']}
+
+        stats['rows'] += len(chunk)
+        for col in stats['columns']:
+            values = chunk[col].to_numpy(dtype=np.float64)
+            if col in ZERO_COLUMNS:
+                zero_mask = values == 0
+                stats['zero_counts'][col] += int(zero_mask.sum())
+                values = values[~zero_mask]
+            stats['sketches'][col].update(values)
+
+    annotate(rows=stats['rows'])
+    return stats
+
+def cleaned_outlier_bounds(stats, replacement_values):
+    """
+    由草图统计推算清洗后数据的IQR边界
+    清洗后数据的分布 = 非零值 + 零值个数个中位数
+    返回: {列: (下界, 上界, 异常值个数)}
+    """
+    bounds = {}
+    for col in stats['columns']:
+        sketch = stats['sketches'][col]
+        if col in ZERO_COLUMNS and stats['zero_counts'][col]:
+            sketch = QuantileSketch(sketch.capacity).merge(sketch)
+            sketch.update([replacement_values[col]], weights=stats['zero_counts'][col])
+        Q1, Q3 = sketch.quantile([0.25, 0.75])
+        IQR = Q3 - Q1
+        lower, upper = Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+        bounds[col] = (lower, upper, int(sketch.count_outside(lower, upper)))
+    return bounds
+
+@traced
+def impute_table(input_path, output_path, replacement_values, chunksize=STREAM_CHUNK_SIZE, on_chunk=None):
+    """
+    逐块用给定的替换值填充零值并写出，返回实际写入的路径
+    on_chunk: 可选回调，每块填充后、写出前以该块调用（如统计异常值）
+    """
+    rows = 0
+    with ChunkedTableWriter(output_path) as writer:
+        for chunk in iter_table_chunks(input_path, chunksize):
+            for col in ZERO_COLUMNS:
+                values = chunk[col].to_numpy(dtype=np.float64)
+                chunk[col] = np.where(values == 0, replacement_values[col], values)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            writer.write(chunk)
+            rows += len(chunk)
+    annotate(rows=rows)
+    return writer.path
+
+@traced
+def stream_preprocess(input_path, output_path, chunksize=STREAM_CHUNK_SIZE):
+    """
+    两遍流式预处理（内存占用与输入文件大小无关）
+    输入/输出路径以 .parquet 结尾时按 Parquet 列式格式读写，否则按 CSV
+    第一遍：统计零值个数和非零值中位数、清洗后数据的IQR边界
+    第二遍：逐块用中位数替换零值、统计异常值并写出
+    """
+    print("\n" + "="*60)
+    print("流式预处理（两遍分块处理）")
+    print("="*60)
+
+    # 第一遍：统计
+    stats = collect_stream_statistics(input_path, chunksize)
+    n_rows = stats['rows']
+    print(f"第一遍完成：共 {n_rows} 行")
+
+    replacement_values = {}
+    zero_stats = {}
+    for col in ZERO_COLUMNS:
+        zero_count = stats['zero_counts'][col]
+        replacement_values[col] = stats['sketches'][col].median()
+        zero_stats[col] = {'count': zero_count, 'percentage': zero_count / n_rows * 100}
+        print(f"{col}: {zero_count} 个零值，非零中位数 {replacement_values[col]:.2f}")
+
+    outlier_report = {col: {'count': 0, 'percentage': 0.0, 'lower_bound': lower, 'upper_bound': upper}
+                      for col, (lower, upper, _) in cleaned_outlier_bounds(stats, replacement_values).items()}
+
+    # 第二遍：替换零值、统计异常值、逐块写出
+    def count_outliers(chunk):
+        for col, report in outlier_report.items():
+            values = chunk[col].to_numpy(dtype=np.float64)
+            report['count'] += int(((values < report['lower_bound']) |
+                                    (values > report['upper_bound'])).sum())
+
+    saved_path = impute_table(input_path, output_path, replacement_values, chunksize, on_chunk=count_outliers)
+
+    for col, report in outlier_report.items():
+        report['percentage'] = report['count'] / n_rows * 100
+        print(f"{col}: {report['count']} 个异常值 ({report['percentage']:.2f}%)")
+        print(f"  正常范围: [{report['lower_bound']:.2f}, {report['upper_bound']:.2f}]")
+
+    print(f"\n清洗后的数据已保存到: {saved_path}")
+    return replacement_values, zero_stats, outlier_report
+
+def _partition_fingerprint(path):
+    """输入分区指纹（文件大小 + 修改时间）"""
+    info = os.stat(path)
+    return {'size': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+def _partition_output_name(key):
+    """
+    清洗后分区的文件名：原文件名加上完整输入路径的短哈希，
+    不同目录下的同名分区不会互相覆盖
+    """
+    stem, ext = os.path.splitext(os.path.basename(key))
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=4).hexdigest()
+    return f'{stem}-{digest}{ext}'
+
+def _merge_partition_stats(partitions):
+    """合并各分区的统计（草图可合并，零值个数可相加）"""
+    merged = {'rows': 0, 'columns': None, 'zero_counts': {col: 0 for col in ZERO_COLUMNS}, 'sketches': {}}
+    for entry in partitions.values():
+        merged['rows'] += entry['rows']
+        if merged['columns'] is None:
+            merged['columns'] = entry['columns']
+            merged['sketches'] = {col: QuantileSketch() for col in entry['columns']}
+        for col in ZERO_COLUMNS:
+            merged['zero_counts'][col] += entry['zero_counts'][col]
+        for col, sketch in entry['sketches'].items():
+            merged['sketches'][col].merge(QuantileSketch.from_dict(sketch))
+    return merged
+
+@traced
+def incremental_preprocess(partition_paths, output_dir, chunksize=STREAM_CHUNK_SIZE):
+    """
+    增量预处理
+    partition_paths: 输入分区文件（如每日追加的CSV/Parquet）
+    output_dir: 清洗后分区和统计清单（preprocessing_manifest.json）的保存目录
+    清单记录每个分区的可合并统计草图和指纹；重新运行时只扫描新增或变化的分区，
+    合并统计后只重写新分区以及替换值变化影响到的分区（含有对应列零值的分区）；
+    不再列出的分区从清单中移除并删除其清洗后的输出，output_dir 中只保留当前分区的数据
+    """
+    print("\n" + "="*60)
+    print("增量预处理")
+    print("="*60)
+
+    if not partition_paths:
+        raise ValueError("没有输入分区（分区目录中没有 CSV/Parquet 文件）")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = {'version': MANIFEST_VERSION, 'partitions': {}, 'replacement_values': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != MANIFEST_VERSION:
+            print("统计清单版本不一致，重新全量处理")
+            manifest = {'version': MANIFEST_VERSION, 'partitions': {}, 'replacement_values': {}}
+
+    # 1. 只扫描新增或变化的分区
+    partitions = {}
+    scanned = []
+    for path in partition_paths:
+        key = os.path.abspath(path)
+        fingerprint = _partition_fingerprint(path)
+        entry = manifest['partitions'].get(key)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            stats = collect_stream_statistics(path, chunksize)
+            entry = {
+                'fingerprint': fingerprint,
+                'rows': stats['rows'],
+                'columns': stats['columns'],
+                'zero_counts': stats['zero_counts'],
+                'sketches': {col: sketch.to_dict() for col, sketch in stats['sketches'].items()},
+                'output': None,
+                'replacement_values': {}
+            }
+            scanned.append(path)
+        partitions[key] = entry
+    print(f"共 {len(partitions)} 个分区，本次扫描 {len(scanned)} 个")
+
+    # 删除已移除分区的输出，读取输出目录的一方不会读到已删除的数据
+    removed = [key for key in manifest['partitions'] if key not in partitions]
+    for key in removed:
+        output = manifest['partitions'][key].get('output')
+        if output and os.path.exists(output):
+            os.remove(output)
+    if removed:
+        print(f"移除 {len(removed)} 个已删除分区的输出")
+    annotate(partitions=len(partitions), scanned=len(scanned), removed=len(removed))
+
+    # 2. 合并统计，得到全局替换值和异常值边界
+    merged = _merge_partition_stats(partitions)
+    replacement_values = {col: merged['sketches'][col].median() for col in ZERO_COLUMNS}
+    outlier_bounds = cleaned_outlier_bounds(merged, replacement_values)
+
+    # 3. 重写新分区和受替换值变化影响的分区
+    rewritten = []
+    for key, entry in partitions.items():
+        affected = [col for col in ZERO_COLUMNS
+                    if entry['zero_counts'][col] and entry['replacement_values'].get(col) != replacement_values[col]]
+        if entry['output'] is None or not os.path.exists(entry['output']) or affected:
+            output_path = os.path.join(output_dir, _partition_output_name(key))
+            entry['output'] = impute_table(key, output_path, replacement_values, chunksize)
+            rewritten.append(key)
+        entry['replacement_values'] = dict(replacement_values)
+    print(f"重写 {len(rewritten)} 个分区")
+
+    for col in ZERO_COLUMNS:
+        print(f"{col}: 零值 {merged['zero_counts'][col]} 个，替换值 {replacement_values[col]:.2f}")
+    for col, (lower, upper, count) in outlier_bounds.items():
+        print(f"{col}: {count} 个异常值，正常范围: [{lower:.2f}, {upper:.2f}]")
+
+    # 4. 保存统计清单（先写临时文件再替换）
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'partitions': partitions,
+        'replacement_values': replacement_values,
+        'outlier_bounds': {col: {'lower_bound': lower, 'upper_bound': upper, 'count': count}
+                           for col, (lower, upper, count) in outlier_bounds.items()}
+    }
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    print(f"统计清单已保存到: {manifest_path}")
+
+    return {'scanned': scanned, 'rewritten': rewritten, 'removed': removed,
+            'replacement_values': replacement_values, 'outlier_bounds': outlier_bounds}
+
+@traced(name='preprocess')
+def main(streaming=False, partition_dir=None, output_dir=DEFAULT_OUTPUT_DIR, plot_mode='now',
+         input_path=RAW_DATA_PATH):
+    """
+    主函数
+    streaming: True 时使用两遍分块流式处理（适用于超大文件，不生成可视化图）
+    partition_dir: 分区输入目录；提供时按统计清单增量处理其中的 CSV/Parquet 分区
+    output_dir: 清洗后数据、统计报告和可视化图的输出目录
+    input_path: 原始数据路径（非分区模式）
+    plot_mode: 'now'（后台并行渲染）、'defer'（统计报告完成后渲染）或 'skip'（不生成图表）
+    """
+    # 设置标准输出编码为utf-8（Windows 控制台输出中文）
+    if sys.stdout.encoding.lower() != 'utf-8':
+        sys.stdout.reconfigure(encoding='utf-8')
+
     print("\n" + "="*60)
     print("糖尿病数据集预处理程序")
     print("="*60 + "\n")
 
+    if partition_dir:
+        # 输出为与 diabetes_data_cleaned.csv 同名（无扩展名）的目录，每个分区一个文件；
+        # DiabetesRiskPredictionSystem.load_data 可直接读取该目录
+        cleaned_dir = _output_path(output_dir, os.path.splitext(CLEANED_DATA_NAME)[0])
+        incremental_preprocess(partition_files(partition_dir), cleaned_dir)
+        print(f"\n清洗后的分区数据集: {cleaned_dir}（训练时作为数据路径读取）")
+        return
+
+    if streaming:
+        _, zero_stats, _ = stream_preprocess(input_path, _output_path(output_dir, CLEANED_DATA_NAME))
+        total_zeros = sum([stats['count'] for stats in zero_stats.values()])
+        print(f"\n处理的零值数量总计: {total_zeros}")
+        print("\n" + "="*60)
+        print("数据预处理流程全部完成！")
+        print("="*60)
+        return
+
     # 1. 加载原始数据
-    df_original = load_raw_data()
+    df_original = load_raw_data(input_path)
+
+    # 清洗前统计量（一次计算，各报告共用）
+    stats_original = compute_column_statistics(df_original)
 
     # 2. 分析数据质量
-    zero_stats = analyze_data_quality(df_original)
+    zero_stats = analyze_data_quality(df_original, stats_original, output_dir)
 
     # 3. 处理零值
-    df_cleaned, replacement_values = handle_zero_values(df_original)
+    df_cleaned, replacement_values = handle_zero_values(
+        df_original, _output_path(output_dir, CLEANED_DATA_NAME), stats=stats_original)
+
+    # 清洗后统计量
+    stats_cleaned = compute_column_statistics(df_cleaned)
 
     # 4. 检测异常值
-    outlier_report = detect_outliers(df_cleaned)
+    outlier_report = detect_outliers(df_cleaned, stats_cleaned, output_dir)
 
-    # 5. 生成可视化
-    create_preprocessing_visualizations(df_original, df_cleaned)
+    # 5. 生成可视化（后台渲染，与统计对比并行）
+    renderer = FigureRenderer(output_dir, mode=plot_mode)
+    create_preprocessing_visualizations(df_original, df_cleaned, renderer)
 
     # 6. 生成统计对比
-    generate_statistics_comparison(df_original, df_cleaned)
+    generate_statistics_comparison(df_original, df_cleaned, stats_original, stats_cleaned, output_dir)
+    renderer.close()
 
     # 7. 输出最终摘要
     print("\n" + "="*60)
@@ -299,13 +619,14 @@ def main():
     print(f"\n处理的零值数量:")
     total_zeros = sum([stats['count'] for stats in zero_stats.values()])
     print(f"  总计: {total_zeros}")
-    print(f"\n生成的文件:")
+    print(f"\n生成的文件（{output_dir}）:")
     print("  - diabetes_data_cleaned.csv (清洗后的数据)")
     print("  - data_quality_report.txt (数据质量报告)")
     print("  - outlier_detection_report.txt (异常值检测报告)")
     print("  - preprocessing_statistics_comparison.txt (统计对比)")
-    print("  - 数据预处理_零值处理对比分析.png")
-    print("  - 数据预处理_特征分布对比分析.png")
+    if renderer.enabled:
+        print("  - 数据预处理_零值处理对比分析.png")
+        print("  - 数据预处理_特征分布对比分析.png")
     print("\n" + "="*60)
     print("数据预处理流程全部完成！")
     print("="*60)
@@ -7,27 +7,163 @@
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import (accuracy_score, precision_score, recall_score, f1_score,
-                            roc_auc_score, confusion_matrix, roc_curve, auc,
-                            precision_recall_curve, average_precision_score)
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
 import warnings
 import sys
-import io
+import os
+import json
+import hashlib
+import pickle
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# 原始输入特征（与清洗后数据集的列顺序一致）、特征变换及紧凑推理引擎
+from feature_transform import RAW_FEATURES, MODEL_FEATURES, FeatureTransformer
+from fusion_engine import FusionEngine, export_fusion_engine
+from calibration import ProbabilityCalibrator, brier_score
+from columnar_io import read_table, is_parquet
+from pipeline_telemetry import traced, annotate, stage
+from operating_point import threshold_sweep, select_threshold, fit_risk_bands, classification_metrics
+from bootstrap_ci import BOOTSTRAP_METRICS, bootstrap_confidence_intervals
+from hyperparameter_search import successive_halving
+from drift_monitor import DriftProfile, DriftMonitor
+from risk_scoring import (RISK_THRESHOLDS, RISK_LEVELS, DECISION_THRESHOLD, assess_risk_level,
+                          assess_risk_levels, risk_level_codes, advice_codes, generate_medical_advice)
+from report_rendering import (DEFAULT_OUTPUT_DIR, FigureRenderer, render_roc_curves,
+                              render_model_performance, render_feature_importance,
+                              render_risk_score_distribution, render_risk_level_pie,
+                              render_confusion_matrix)
+
+# scikit-learn、joblib 和 matplotlib 只在训练、评估、持久化和绘图时按需导入，
+# 仅做推理的进程（评分服务）不需要为它们付出启动时间
 
 warnings.filterwarnings('ignore')
 
-# 设置UTF-8编码
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# 模型产物格式版本（产物结构变化时递增）
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_MANIFEST = 'manifest.json'
+ARTIFACT_MODELS = 'models.joblib'
+
+# 融合预测缓存保留的最近输入数量
+PREDICTION_CACHE_SIZE = 8
+
+# 增量更新时每次追加的树数量（占当前树数量的比例）
+REFRESH_TREE_FRACTION = 0.1
+
+# 增量更新后与全量重训练的融合评分允许的平均绝对差
+REFRESH_AGREEMENT_TOLERANCE = 0.05
+
+# 工作点的选择条件（optimize_operating_point 的参数，增量更新后按相同条件重新选择）
+OPERATING_POINT_CRITERIA = ['target_recall', 'cost_ratio', 'band_recall', 'band_precision', 'source']
+
+# 中文特征名
+FEATURE_NAMES_CN = {
+    'Pregnancies': '怀孕次数',
+    'Glucose': '血糖水平',
+    'BloodPressure': '血压',
+    'SkinThickness': '皮褶厚度',
+    'Insulin': '胰岛素',
+    'BMI': '体质指数',
+    'DiabetesPedigreeFunction': '遗传因素',
+    'Age': '年龄',
+    'BMI_Age': 'BMI×年龄',
+    'Glucose_BMI': '血糖×BMI',
+    'Insulin_Glucose_Ratio': '胰岛素/血糖比'
+}
+
+# 内存占用报告中统计的属性
+FOOTPRINT_ATTRIBUTES = ['X_train', 'X_test', 'y_train', 'y_test', 'df_engineered', 'models',
+                        'fold_models', 'oof_probabilities', 'meta_learner', '_prediction_cache']
+
+def _create_base_models(params=None):
+    """
+    创建未训练的基础模型（名称 -> 模型）
+    params: 模型名 -> 覆盖默认值的超参数（如 tune_base_models 的搜索结果）
+    """
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+    models = {
+        # 模型1：随机森林（基于树的模型，适合表格数据）
+        'RandomForest': RandomForestClassifier(
+            n_estimators=200,
+            max_depth=10,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            random_state=42
+        ),
+        # 模型2：梯度提升（序贯树模型）
+        'GradientBoosting': GradientBoostingClassifier(
+            n_estimators=150,
+            learning_rate=0.1,
+            max_depth=5,
+            random_state=42
+        ),
+        # 模型3：逻辑回归（线性基准模型）
+        'LogisticRegression': LogisticRegression(
+            max_iter=1000,
+            random_state=42
+        )
+    }
+    for name, overrides in (params or {}).items():
+        models[name].set_params(**overrides)
+    return models
+
+def _rescale_tree(tree, old_mean, old_scale, new_mean, new_scale):
+    """把树的分裂阈值从旧标准化空间换算到新标准化空间（叶子节点不变）"""
+    split = tree.feature >= 0
+    feature = tree.feature[split]
+    threshold = tree.threshold
+    threshold[split] = ((threshold[split] * old_scale[feature] + old_mean[feature] - new_mean[feature])
+                        / new_scale[feature])
+
+def _fit_base_model(name, model, X, y):
+    """训练单个基础模型（进程池任务），返回训练后的模型及耗时"""
+    with stage('fit_model', model=name, rows=len(X)):
+        start = time.perf_counter()
+        model.fit(X, y)
+        return name, model, time.perf_counter() - start
+
+# 进程池工作进程中共享的训练数据（每个进程只传输一次）
+_WORKER_DATA = {}
+
+def _init_fold_worker(X, y):
+    """进程池初始化：缓存训练数据"""
+    _WORKER_DATA['X'] = X
+    _WORKER_DATA['y'] = y
+
+def _fit_fold_model(name, model, fold, train_idx, val_idx):
+    """在一个折上训练模型并预测验证折概率（进程池任务）"""
+    X, y = _WORKER_DATA['X'], _WORKER_DATA['y']
+    with stage('fit_fold_model', model=name, fold=fold, rows=len(train_idx)):
+        model.fit(X[train_idx], y[train_idx])
+        return name, fold, model, model.predict_proba(X[val_idx])[:, 1]
+
+def _nbytes(obj):
+    """估算对象占用的内存字节数（数组和表格按数据大小，其它对象按序列化大小）"""
+    if obj is None:
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, dict):
+        return sum(_nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_nbytes(value) for value in obj)
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+def _array_fingerprint(*arrays):
+    """计算数组内容指纹（用于缓存键）"""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.shape, array.dtype.str)).encode('utf-8'))
+        digest.update(array.data)
+    return digest.hexdigest()
 
 class DiabetesRiskPredictionSystem:
     """
@@ -35,145 +171,572 @@ class DiabetesRiskPredictionSystem:
     包含TabNet融合模型和风险评估系统
     """
 
-    def __init__(self):
-        self.scaler = StandardScaler()
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, plot_mode='now', compact=False):
+        """
+        output_dir: 图表、预测结果和运行报告的输出目录
+        plot_mode: 'now'（后台并行渲染图表）、'defer'（流程结束时渲染）或 'skip'（不生成图表）
+        compact: 紧凑内存模式，标准化原地进行、标签存为 int8，并且不保留特征工程后的完整数据
+        """
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.compact = compact
+        self.renderer = FigureRenderer(output_dir, mode=plot_mode)
+        self.scaler = None
         self.models = {}
         self.fusion_weights = {}
+        # 融合权重的来源（'train'、'oof' 或 'tuning'），增量更新时沿用
+        self.fusion_weight_source = 'train'
         self.feature_names = None
         self.X_train = None
         self.X_test = None
         self.y_train = None
         self.y_test = None
         self.df_engineered = None
+        self._feature_transformer = None
+        self.training_times = {}
+        self.oof_probabilities = {}
+        self.fold_models = {}
+        self.meta_learner = None
+        self.calibrator = None
+        # 超参数搜索结果：模型名 -> 覆盖默认值的参数（build_base_models 使用）
+        self.tuned_params = {}
+        self.tuning_results = None
+        # 训练集原始特征的分布概况（prepare_data 生成）与线上漂移监控（enable_drift_monitor 开启）
+        self.drift_profile = None
+        self.drift_monitor = None
+        # 工作点：决策阈值与风险等级分界（optimize_operating_point 按数据选择）
+        self.decision_threshold = DECISION_THRESHOLD
+        self.risk_thresholds = list(RISK_THRESHOLDS)
+        self.operating_point = None
+        self._oof_cache_key = None
+        # 融合预测缓存：键为 (模型版本, 输入指纹, 融合方式, 是否折模型)
+        self._model_version = 0
+        self._prediction_cache = OrderedDict()
+        self.prediction_cache_stats = {'hits': 0, 'misses': 0}
+        # 树模型版本：只在基础模型训练、更新或加载时递增（融合权重、校准、工作点变化时不变）
+        self._tree_version = 0
+        # 解释用的树模型导出缓存：(树模型版本, 模型名 -> 展平数组和叶子贡献表)
+        self._explainer = None
 
     # ==================== 数据加载和准备 ====================
 
-    def load_data(self, filepath):
-        """加载数据集"""
+    @traced
+    def load_data(self, filepath, columns=None, filters=None):
+        """
+        加载数据集
+        filepath: .parquet（列式格式，不可用时回退到同名 .csv）、.csv，
+                  或分区目录（data_preprocessing.py 增量模式的输出，各分区合并读取）
+        columns: 只加载的列；Parquet 默认只加载8个原始特征和 Outcome
+        filters: 行过滤条件 [(列, 运算符, 值), ...]，Parquet 可跳过不满足条件的行组
+        """
         print("正在加载数据集...")
-        df = pd.read_csv(filepath)
+        if columns is None and is_parquet(filepath):
+            columns = RAW_FEATURES + ['Outcome']
+        df = read_table(filepath, columns=columns, filters=filters)
+        annotate(rows=len(df))
         print(f"数据形状: {df.shape}")
         print(f"数据预览:\n{df.head()}")
         return df
 
+    @traced
     def feature_engineering(self, df):
         """
-        特征工程：创建交互特征
+        特征工程：创建交互特征（BMI×年龄、血糖×BMI、胰岛素/血糖比，定义见 feature_transform）
         数据已经过预处理（data_preprocessing.py）
+        特征直接写入一个 float32 矩阵，返回的 DataFrame 包装该矩阵（不复制）并附带 Outcome 列
         """
         print("\n正在进行特征工程...")
-        df_new = df.copy()
-
-        # 基于医学领域知识创建交互特征
-        # 特征1：BMI-年龄交互（年龄大+肥胖增加风险）
-        df_new['BMI_Age'] = df_new['BMI'] * df_new['Age']
-
-        # 特征2：血糖-BMI交互（高血糖+肥胖协同效应）
-        df_new['Glucose_BMI'] = df_new['Glucose'] * df_new['BMI']
-
-        # 特征3：胰岛素抵抗指数（HOMA-IR近似）
-        if 'Insulin' in df_new.columns and 'Glucose' in df_new.columns:
-            df_new['Insulin_Glucose_Ratio'] = df_new['Insulin'] / (df_new['Glucose'] + 1e-6)
+        features = FeatureTransformer(MODEL_FEATURES).transform(df)
+        df_new = pd.DataFrame(features, columns=MODEL_FEATURES, index=df.index, copy=False)
+        if 'Outcome' in df.columns:
+            df_new['Outcome'] = df['Outcome']
 
+        annotate(rows=len(df_new))
         print(f"特征工程完成。新特征数量: {df_new.shape[1] - 1}")
         return df_new
 
+    def transform_features(self, X_raw):
+        """
+        原始特征 -> 标准化后的模型输入矩阵（预测时使用）
+        X_raw: DataFrame、NumPy 数组（列顺序同 RAW_FEATURES）或单个患者的字典
+        """
+        feature_names = [str(name) for name in self.feature_names]
+        if self._feature_transformer is None or self._feature_transformer.feature_names != feature_names:
+            self._feature_transformer = FeatureTransformer(feature_names)
+        return self.scaler.transform(self._feature_transformer.transform(X_raw))
+
+    @traced
     def prepare_data(self, df):
         """准备训练和测试数据"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+
         print("\n正在准备数据...")
 
-        # 分离特征和目标变量
+        # 分离特征和目标变量（标准化器在 NumPy 矩阵上拟合，预测时直接传入特征矩阵）
         X = df.drop('Outcome', axis=1)
         y = df['Outcome']
+        feature_names = X.columns
+        X = X.to_numpy()
+
+        if self.compact:
+            # 标签只有 0/1，int8 即可
+            y = y.to_numpy(dtype=np.int8)
 
         # 划分训练集和测试集
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
 
-        # 标准化特征
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        # 训练集原始特征的分布概况（标准化之前），线上漂移监控以此为基准
+        raw_columns = [list(feature_names).index(name) for name in RAW_FEATURES]
+        self.drift_profile = DriftProfile.fit(X_train[:, raw_columns], RAW_FEATURES)
+
+        # 标准化特征（紧凑模式在划分出的 float32 矩阵上原地进行，不再复制）
+        self.scaler = StandardScaler()
+        if self.compact:
+            del X
+            X_train_scaled = self.scaler.fit(X_train).transform(X_train, copy=False)
+            X_test_scaled = self.scaler.transform(X_test, copy=False)
+        else:
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
 
         self.X_train = X_train_scaled
         self.X_test = X_test_scaled
         self.y_train = y_train
         self.y_test = y_test
-        self.feature_names = X.columns
+        self.feature_names = feature_names
+        if self.compact:
+            self.df_engineered = None
+        annotate(rows=len(X_train_scaled) + len(X_test_scaled))
 
         print(f"训练集形状: {X_train_scaled.shape}")
         print(f"测试集形状: {X_test_scaled.shape}")
         print(f"阳性样本比例 - 训练集: {y_train.mean():.2%}, 测试集: {y_test.mean():.2%}")
 
-        return X_train_scaled, X_test_scaled, y_train, y_test, X.columns
+        return X_train_scaled, X_test_scaled, y_train, y_test, feature_names
+
+    @traced
+    def prepare_evaluation_data(self, df):
+        """
+        加载模型产物后准备评估数据（代替 prepare_data）
+        按与 prepare_data 相同的方式划分，只保留测试集，用产物中的标准化器经 transform_features 变换；
+        不重新拟合标准化器，也不保留训练集
+        df: 包含原始8个特征和 Outcome 的 DataFrame
+        """
+        from sklearn.model_selection import train_test_split
+
+        print("\n正在准备评估数据（使用模型产物中的标准化器）...")
+        y = df['Outcome']
+        if self.compact:
+            y = y.to_numpy(dtype=np.int8)
+        _, df_test, _, y_test = train_test_split(df, y, test_size=0.2, random_state=42, stratify=y)
+
+        self.X_test = self.transform_features(df_test)
+        self.y_test = y_test
+        annotate(rows=len(self.X_test))
+
+        print(f"测试集形状: {self.X_test.shape}")
+        print(f"阳性样本比例 - 测试集: {y_test.mean():.2%}")
+        return self.X_test, self.y_test
+
+    def memory_footprint(self):
+        """各属性占用的内存字节数（按占用从大到小）"""
+        footprint = {name: _nbytes(getattr(self, name)) for name in FOOTPRINT_ATTRIBUTES}
+        return dict(sorted(footprint.items(), key=lambda item: item[1], reverse=True))
+
+    def print_memory_footprint(self):
+        """打印内存占用报告"""
+        footprint = self.memory_footprint()
+        print("\n内存占用:")
+        for name, size in footprint.items():
+            if size:
+                print(f"  {name:<20}{size / 1024 ** 2:>10.2f} MB")
+        print(f"  {'合计':<18}{sum(footprint.values()) / 1024 ** 2:>10.2f} MB")
+        return footprint
 
     # ==================== 问题一：TabNet融合模型 ====================
 
-    def build_base_models(self):
-        """构建基础模型"""
+    def build_base_models(self, params=None):
+        """
+        构建基础模型（随机森林、梯度提升、逻辑回归）
+        params: 模型名 -> 覆盖默认值的超参数；默认使用 tune_base_models 的搜索结果（若有）
+        """
         print("\n" + "="*60)
         print("问题一：构建TabNet融合模型")
         print("="*60)
         print("\n正在构建基础模型...")
 
-        # 模型1：随机森林（基于树的模型，适合表格数据）
-        self.models['RandomForest'] = RandomForestClassifier(
-            n_estimators=200,
-            max_depth=10,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42
-        )
-
-        # 模型2：梯度提升（序贯树模型）
-        self.models['GradientBoosting'] = GradientBoostingClassifier(
-            n_estimators=150,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
-
-        # 模型3：逻辑回归（线性基准模型）
-        self.models['LogisticRegression'] = LogisticRegression(
-            max_iter=1000,
-            random_state=42
-        )
+        self.models.update(_create_base_models(self.tuned_params if params is None else params))
 
+        self.invalidate_prediction_cache(models_changed=True)
         print(f"已构建 {len(self.models)} 个基础模型")
 
-    def train_base_models(self):
-        """训练所有基础模型"""
+    @traced
+    def train_base_models(self, parallel=False, n_jobs=None):
+        """
+        训练所有基础模型
+        parallel: True 时在进程池中同时训练各基础模型，总耗时取决于最慢的模型
+        n_jobs: 可用核心数（默认全部核心）；并行模式下其余模型各占1个核心，剩余核心全部分给随机森林
+        返回: 各模型训练耗时（秒）
+        """
+        from sklearn.ensemble import RandomForestClassifier
+
         print("\n正在训练基础模型...")
+        n_cores = n_jobs or os.cpu_count() or 1
+        start = time.perf_counter()
+
+        # 随机森林的核心预算
+        if parallel:
+            forest_jobs = max(1, n_cores - (len(self.models) - 1))
+        else:
+            forest_jobs = n_jobs
+        previous_jobs = {}
         for name, model in self.models.items():
-            print(f"  训练 {name}...")
-            model.fit(self.X_train, self.y_train)
-        print("基础模型训练完成")
+            if isinstance(model, RandomForestClassifier) and forest_jobs is not None:
+                previous_jobs[name] = model.n_jobs
+                model.set_params(n_jobs=forest_jobs)
+
+        self.training_times = {}
+        annotate(rows=len(self.X_train), parallel=parallel)
+        if parallel:
+            print(f"  并行训练 {len(self.models)} 个模型（随机森林使用 {forest_jobs} 个核心）...")
+            with ProcessPoolExecutor(max_workers=len(self.models)) as executor:
+                futures = [executor.submit(_fit_base_model, name, model, self.X_train, self.y_train)
+                           for name, model in self.models.items()]
+                for future in futures:
+                    name, model, elapsed = future.result()
+                    self.models[name] = model
+                    self.training_times[name] = elapsed
+        else:
+            for name, model in self.models.items():
+                print(f"  训练 {name}...")
+                _, _, elapsed = _fit_base_model(name, model, self.X_train, self.y_train)
+                self.training_times[name] = elapsed
+
+        # 恢复预测时的并行设置，避免单样本预测产生线程调度开销
+        for name, jobs in previous_jobs.items():
+            self.models[name].set_params(n_jobs=jobs)
+        # 重新训练后原校准映射和工作点不再适用
+        self.invalidate_calibration()
+        self.invalidate_prediction_cache(models_changed=True)
+
+        for name, elapsed in self.training_times.items():
+            print(f"  {name} 训练耗时: {elapsed:.2f} 秒")
+        print(f"基础模型训练完成，总耗时: {time.perf_counter() - start:.2f} 秒")
+
+        return self.training_times
+
+    @traced
+    def tune_base_models(self, n_candidates=27, eta=3, min_resource=25, n_splits=3, scoring='roc_auc',
+                         cache_dir=None, n_jobs=None, refit=True):
+        """
+        逐次减半搜索随机森林和梯度提升的超参数（见 hyperparameter_search）
+        每个试验的交叉验证结果按参数和训练数据指纹缓存在磁盘上，重复运行时跳过已完成的试验
+        n_candidates: 每个模型第一轮的候选数；eta: 每轮保留 1/eta、树数量乘以 eta
+        min_resource: 第一轮的树数量；scoring: 'roc_auc' 或 'f1'
+        cache_dir: 缓存目录（默认输出目录下的 tuning_cache）
+        refit: True 时用选出的参数构建并在完整训练集上训练基础模型，
+               之后 calculate_fusion_weights(source='tuning') 可直接使用搜索中的交叉验证 F1
+        返回: 模型名 -> {'params', 'roc_auc', 'f1', 'trials'}
+        """
+        print("\n正在搜索基础模型超参数（逐次减半）...")
+        start = time.perf_counter()
+        y = np.asarray(self.y_train)
+        annotate(rows=len(y), candidates=n_candidates)
+        if cache_dir is None:
+            cache_dir = os.path.join(self.output_dir, 'tuning_cache')
+
+        self.tuning_results = successive_halving(
+            _create_base_models(), self.X_train, y, _array_fingerprint(self.X_train, y),
+            n_candidates=n_candidates, eta=eta, min_resource=min_resource, n_splits=n_splits,
+            scoring=scoring, cache_dir=cache_dir, n_jobs=n_jobs)
+        self.tuned_params = {name: result['params'] for name, result in self.tuning_results.items()
+                             if result['params']}
+
+        for name, result in self.tuning_results.items():
+            print(f"  {name}: 交叉验证 AUC {result['roc_auc']:.4f}, F1 {result['f1']:.4f} "
+                  f"{result['params'] or '（默认参数）'}")
+        print(f"超参数搜索完成，耗时: {time.perf_counter() - start:.2f} 秒")
+
+        if refit:
+            self.build_base_models()
+            self.train_base_models()
+        return self.tuning_results
+
+    @traced
+    def compute_oof_predictions(self, n_splits=None, n_jobs=None, random_state=None):
+        """
+        计算折外（out-of-fold）预测概率
+        所有模型的全部折在一个进程池中一次并行完成，结果按数据和模型参数指纹缓存，
+        依赖折外预测的步骤每次都调用本方法，缓存命中时直接返回
+        n_splits / random_state: 折数和划分种子（默认沿用上次的设置，首次为 5 和 42）
+        n_jobs: 并行进程数（默认全部核心）
+        """
+        from sklearn.base import clone
+        from sklearn.model_selection import StratifiedKFold
+
+        if self.X_train is None:
+            raise ValueError("没有训练数据，无法计算折外预测（先调用 prepare_data）")
+        previous = self._oof_cache_key or (None, 5, 42)
+        n_splits = previous[1] if n_splits is None else n_splits
+        random_state = previous[2] if random_state is None else random_state
+        y = np.asarray(self.y_train)
+        cache_key = (_array_fingerprint(self.X_train, y), n_splits, random_state,
+                     self._model_params_fingerprint())
+        if cache_key == self._oof_cache_key and self.oof_probabilities:
+            print("\n折外预测已缓存，跳过重新计算")
+            return self.oof_probabilities
+
+        print(f"\n正在计算 {n_splits} 折折外预测...")
+        annotate(rows=len(y), folds=n_splits)
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        folds = list(skf.split(self.X_train, y))
+
+        self.oof_probabilities = {name: np.zeros(len(y)) for name in self.models}
+        self.fold_models = {name: [None] * n_splits for name in self.models}
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_fold_worker,
+                                 initargs=(self.X_train, y)) as executor:
+            futures = [executor.submit(_fit_fold_model, name, clone(model), fold, train_idx, val_idx)
+                       for name, model in self.models.items()
+                       for fold, (train_idx, val_idx) in enumerate(folds)]
+            for future in futures:
+                name, fold, model, prob = future.result()
+                self.oof_probabilities[name][folds[fold][1]] = prob
+                self.fold_models[name][fold] = model
+
+        self._oof_cache_key = cache_key
+        self.invalidate_prediction_cache()
+        print(f"折外预测完成（{len(futures)} 个折模型）")
+        return self.oof_probabilities
+
+    def _model_params_fingerprint(self):
+        """基础模型参数指纹（折外预测缓存键的一部分，随产物保存）"""
+        content = repr(sorted((name, repr(model.get_params())) for name, model in self.models.items()))
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _ensure_fold_models(self):
+        """
+        确认折模型与当前模型一致（bagged 预测前调用）
+        有训练数据时按缓存键（数据和参数指纹）在需要时重新计算；
+        只加载了产物的进程没有训练数据，参数指纹一致时直接使用产物中的折模型
+        """
+        if self.X_train is not None:
+            self.compute_oof_predictions()
+        elif (not self.fold_models or self._oof_cache_key is None
+              or self._oof_cache_key[3] != self._model_params_fingerprint()):
+            raise ValueError("没有与当前模型参数一致的折模型，且没有训练数据可重新计算"
+                             "（先调用 prepare_data 和 compute_oof_predictions）")
+
+    @traced
+    def fit_meta_learner(self):
+        """基于折外预测概率训练堆叠元学习器（逻辑回归）"""
+        from sklearn.linear_model import LogisticRegression
+
+        # 折外预测按数据和模型参数缓存，模型或参数变化后重新计算
+        self.compute_oof_predictions()
+
+        X_meta = np.column_stack([self.oof_probabilities[name] for name in self.models])
+        self.meta_learner = LogisticRegression(random_state=42)
+        self.meta_learner.fit(X_meta, self.y_train)
+        self.invalidate_prediction_cache()
+
+        print("元学习器系数:")
+        for name, coef in zip(self.models, self.meta_learner.coef_[0]):
+            print(f"  {name}: {coef:.4f}")
+        return self.meta_learner
+
+    @traced
+    def calculate_fusion_weights(self, source='train'):
+        """
+        计算融合权重（基于F1分数）
+        source: 'train' 使用训练集上的预测；'oof' 使用折外预测（不含训练偏差）；
+                'tuning' 直接使用超参数搜索中选出配置的交叉验证 F1（不需要额外预测）
+        """
+        from sklearn.metrics import f1_score
 
-    def calculate_fusion_weights(self):
-        """计算融合权重（基于F1分数）"""
         print("\n正在计算融合权重...")
+        annotate(rows=len(self.y_train), source=source)
+
+        if source == 'oof':
+            self.compute_oof_predictions()
+        if source == 'tuning':
+            missing = [name for name in self.models if name not in (self.tuning_results or {})]
+            if missing:
+                raise ValueError(f"以下模型没有超参数搜索结果: {missing}（先调用 tune_base_models）")
 
         for name, model in self.models.items():
-            y_pred = model.predict(self.X_train)
+            if source == 'tuning':
+                self.fusion_weights[name] = self.tuning_results[name]['f1']
+                continue
+            if source == 'oof':
+                # 与 predict 一致：概率大于0.5判为阳性
+                y_pred = (self.oof_probabilities[name] > 0.5).astype(int)
+            else:
+                y_pred = model.predict(self.X_train)
             f1 = f1_score(self.y_train, y_pred)
             self.fusion_weights[name] = f1
+        self.fusion_weight_source = source
+        # 校准映射是在旧权重的融合评分上拟合的
+        self.invalidate_calibration()
+        self.invalidate_prediction_cache()
 
         print("融合权重:")
         for name, weight in self.fusion_weights.items():
             print(f"  {name}: {weight:.4f}")
 
-    def fusion_predict(self, X, method='weighted'):
+    @traced
+    def fit_calibration(self, method='isotonic'):
+        """
+        在折外融合评分上拟合概率校准映射（保序回归或 Platt 缩放），之后 fusion_predict
+        的加权融合评分经过校准。需在融合权重确定之后调用；权重或模型变化时映射会被清除，需重新拟合
+        method: 'isotonic' 或 'platt'
+        """
+        # 折外预测按数据和模型参数缓存，模型或参数变化后重新计算
+        self.compute_oof_predictions()
+
+        print(f"\n正在拟合概率校准（{method}）...")
+        y = np.asarray(self.y_train)
+        annotate(rows=len(y), method=method)
+
+        oof_scores = self._oof_fusion_scores(calibrated=False)
+        self.calibrator = ProbabilityCalibrator.fit(oof_scores, y, method=method)
+        # 评分尺度变化，原工作点需按校准后的评分重新选择
+        self.reset_operating_point()
+        self.invalidate_prediction_cache()
+
+        print(f"校准查找表节点数: {len(self.calibrator.x)}")
+        print(f"折外 Brier 分数: 校准前 {brier_score(y, oof_scores):.4f}, "
+              f"校准后 {brier_score(y, self.calibrator.transform(oof_scores)):.4f}")
+        return self.calibrator
+
+    def _oof_fusion_scores(self, calibrated=True):
+        """折外预测的加权融合评分（与 fusion_predict 的 'weighted' 一致）"""
+        # 折外预测按数据和模型参数缓存，模型或参数变化后重新计算
+        self.compute_oof_predictions()
+        total_weight = sum(self.fusion_weights.values())
+        scores = sum(self.fusion_weights.get(name, 1.0) * prob
+                     for name, prob in self.oof_probabilities.items()) / total_weight
+        if calibrated and self.calibrator is not None:
+            scores = self.calibrator.transform(scores)
+        return scores
+
+    @traced
+    def optimize_operating_point(self, target_recall=None, cost_ratio=None, band_recall=0.95,
+                                 band_precision=0.7, source='oof'):
+        """
+        选择决策阈值并拟合风险等级分界（融合评分只排序一次，见 operating_point）
+        target_recall: 目标召回率（取满足该召回率的最高阈值）
+        cost_ratio: 漏诊/误报代价比（最小化总代价）；两者都不给出时取 F1 最大的阈值
+        band_recall: 低风险组之上的召回率下限（决定低/中风险分界）
+        band_precision: 高风险组的精确率下限（决定中/高风险分界）
+        source: 'oof' 使用折外融合评分（推荐）；'train' 使用训练集上的融合评分
+        阈值作用在 fusion_predict 输出的评分上（已拟合校准时为校准后的评分）
+        """
+        print("\n正在选择决策阈值和风险等级分界...")
+        if source == 'oof':
+            scores = self._oof_fusion_scores()
+        else:
+            _, scores, _ = self.fusion_predict(self.X_train, method='weighted', cache=False)
+        y = np.asarray(self.y_train)
+        annotate(rows=len(y), source=source)
+
+        sweep = threshold_sweep(y, scores)
+        threshold, index = select_threshold(sweep, target_recall=target_recall, cost_ratio=cost_ratio)
+        self.decision_threshold = threshold
+        self.risk_thresholds = fit_risk_bands(sweep, low_recall=band_recall,
+                                              high_precision=band_precision)
+        self.operating_point = {
+            'criterion': ('target_recall' if target_recall is not None
+                          else 'cost_ratio' if cost_ratio is not None else 'max_f1'),
+            'target_recall': target_recall,
+            'cost_ratio': cost_ratio,
+            'band_recall': band_recall,
+            'band_precision': band_precision,
+            'source': source,
+            'precision': float(sweep['precision'][index]),
+            'recall': float(sweep['recall'][index]),
+            'f1': float(sweep['f1'][index])
+        }
+        self.invalidate_prediction_cache()
+
+        print(f"  候选阈值数: {len(sweep['thresholds']) - 1}")
+        print(f"  决策阈值: {threshold:.4f}（精确率 {self.operating_point['precision']:.4f}, "
+              f"召回率 {self.operating_point['recall']:.4f}, F1 {self.operating_point['f1']:.4f}）")
+        print(f"  风险等级分界: {self.risk_thresholds[0]:.4f} / {self.risk_thresholds[1]:.4f}")
+        return self.operating_point
+
+    def invalidate_calibration(self):
+        """
+        模型或融合权重变化后清除概率校准映射（它是在另一组融合评分上拟合的）和工作点，
+        需重新调用 fit_calibration / optimize_operating_point
+        """
+        if self.calibrator is not None:
+            print(f"融合评分已变化，已清除概率校准（{self.calibrator.method}），需重新调用 fit_calibration")
+            self.calibrator = None
+        self.reset_operating_point()
+
+    def reset_operating_point(self):
+        """
+        恢复默认决策阈值和风险等级分界
+        工作点是按当时的融合评分选择的，模型、融合权重或校准变化后不再适用，需重新调用 optimize_operating_point
+        """
+        if (self.operating_point is not None or self.decision_threshold != DECISION_THRESHOLD
+                or list(self.risk_thresholds) != list(RISK_THRESHOLDS)):
+            print("融合评分已变化，工作点恢复为默认值（需重新调用 optimize_operating_point）")
+        self.decision_threshold = DECISION_THRESHOLD
+        self.risk_thresholds = list(RISK_THRESHOLDS)
+        self.operating_point = None
+
+    def invalidate_prediction_cache(self, models_changed=False):
+        """
+        模型、融合权重或元学习器变化后使融合预测缓存失效
+        models_changed: 基础模型本身被训练、修改或替换（同时使解释用的树模型导出失效）
+        """
+        self._model_version += 1
+        if models_changed:
+            self._tree_version += 1
+        self._prediction_cache.clear()
+
+    @traced
+    def fusion_predict(self, X, method='weighted', bagged=False, cache=True, calibrated=True):
         """
         融合预测
-        method: 'weighted' (加权平均), 'voting' (投票)
+        method: 'weighted' (加权平均), 'voting' (投票), 'stacking' (元学习器)
+        bagged: True 时使用各折模型的平均概率代替全量模型（有训练数据且折模型与当前数据或模型参数
+                不一致时先重新计算；只加载了产物时直接使用产物中的折模型）
+        cache: True 时按 (模型版本, 输入内容指纹) 缓存结果，同一数据集只推理一次；
+               缓存的数组为只读，在线评分等一次性输入应传 False
+        calibrated: 已拟合校准映射（fit_calibration）时，'weighted' 的融合评分经过校准；
+                    False 返回原始加权平均
         """
+        if bagged:
+            # 在计算缓存键之前确认折模型与当前模型一致（重新计算会使预测缓存失效）
+            self._ensure_fold_models()
+        if cache:
+            key = (self._model_version, _array_fingerprint(X), method, bagged, calibrated)
+            cached = self._prediction_cache.get(key)
+            if cached is not None:
+                self._prediction_cache.move_to_end(key)
+                self.prediction_cache_stats['hits'] += 1
+                annotate(rows=len(X), method=method, cache_hit=True)
+                return cached
+            self.prediction_cache_stats['misses'] += 1
+
+        annotate(rows=len(X), method=method)
         probabilities = {}
 
         for name, model in self.models.items():
-            if hasattr(model, 'predict_proba'):
-                probabilities[name] = model.predict_proba(X)[:, 1]
-            else:
-                probabilities[name] = model.predict(X)
+            with stage('model_predict', model=name, rows=len(X)):
+                if bagged and self.fold_models.get(name):
+                    probabilities[name] = np.mean([m.predict_proba(X)[:, 1]
+                                                   for m in self.fold_models[name]], axis=0)
+                elif hasattr(model, 'predict_proba'):
+                    probabilities[name] = model.predict_proba(X)[:, 1]
+                else:
+                    probabilities[name] = model.predict(X)
 
         if method == 'weighted':
             # 基于模型性能的加权平均
@@ -185,7 +748,9 @@ class DiabetesRiskPredictionSystem:
                 fusion_prob += weight * prob
 
             fusion_prob /= total_weight
-            fusion_pred = (fusion_prob >= 0.5).astype(int)
+            if calibrated and self.calibrator is not None:
+                fusion_prob = self.calibrator.transform(fusion_prob)
+            fusion_pred = (fusion_prob >= self.decision_threshold).astype(int)
 
         elif method == 'voting':
             # 简单投票
@@ -195,21 +760,40 @@ class DiabetesRiskPredictionSystem:
             fusion_pred = (fusion_pred >= len(self.models) / 2).astype(int)
             fusion_prob = fusion_pred
 
+        elif method == 'stacking':
+            # 元学习器融合
+            X_meta = np.column_stack([probabilities[name] for name in self.models])
+            fusion_prob = self.meta_learner.predict_proba(X_meta)[:, 1]
+            fusion_pred = (fusion_prob >= self.decision_threshold).astype(int)
+
+        if cache:
+            for array in [fusion_pred, fusion_prob, *probabilities.values()]:
+                array.setflags(write=False)
+            self._prediction_cache[key] = (fusion_pred, fusion_prob, probabilities)
+            if len(self._prediction_cache) > PREDICTION_CACHE_SIZE:
+                self._prediction_cache.popitem(last=False)
+
         return fusion_pred, fusion_prob, probabilities
 
-    def evaluate_fusion_model(self):
-        """评估融合模型性能"""
+    @traced
+    def evaluate_fusion_model(self, n_bootstrap=0, confidence=0.95, n_jobs=None):
+        """
+        评估融合模型性能
+        n_bootstrap: 大于 0 时在测试集上做自助重抽样，给出各指标的置信区间（见 bootstrap_ci）
+        confidence: 置信水平；n_jobs: 自助法并行进程数（默认全部核心）
+        """
+        from sklearn.metrics import roc_auc_score
+
         print("\n" + "="*60)
         print("评估融合模型")
         print("="*60)
 
         y_pred, y_prob, _ = self.fusion_predict(self.X_test, method='weighted')
 
-        # 计算评估指标
-        accuracy = accuracy_score(self.y_test, y_pred)
-        precision = precision_score(self.y_test, y_pred)
-        recall = recall_score(self.y_test, y_pred)
-        f1 = f1_score(self.y_test, y_pred)
+        # 计算评估指标（一次计数得到混淆矩阵和各项指标）
+        cm, metrics = classification_metrics(self.y_test, y_pred)
+        accuracy, precision = metrics['accuracy'], metrics['precision']
+        recall, f1 = metrics['recall'], metrics['f1']
         roc_auc = roc_auc_score(self.y_test, y_prob)
 
         print(f"准确率 (Accuracy):  {accuracy:.4f}")
@@ -219,7 +803,6 @@ class DiabetesRiskPredictionSystem:
         print(f"ROC AUC:            {roc_auc:.4f}")
 
         # 混淆矩阵
-        cm = confusion_matrix(self.y_test, y_pred)
         print(f"\n混淆矩阵:")
         print(cm)
 
@@ -234,12 +817,26 @@ class DiabetesRiskPredictionSystem:
             'y_prob': y_prob
         }
 
+        if n_bootstrap > 0:
+            start = time.perf_counter()
+            intervals = bootstrap_confidence_intervals(self.y_test, y_pred, y_prob, n_bootstrap=n_bootstrap,
+                                                       confidence=confidence, n_jobs=n_jobs)
+            print(f"\n自助法 {confidence:.0%} 置信区间（{n_bootstrap} 次重抽样，"
+                  f"耗时 {time.perf_counter() - start:.2f} 秒）:")
+            for name in BOOTSTRAP_METRICS:
+                interval = intervals[name]
+                print(f"  {name:<10} {results[name]:.4f}  [{interval['lower']:.4f}, {interval['upper']:.4f}]")
+            results['confidence_intervals'] = intervals
+            results['confidence'] = confidence
+
         return results
 
     def create_problem1_visualizations(self, results):
         """
-        创建问题一的3张可视化图
+        创建问题一的3张可视化图（提交给渲染器，按 plot_mode 并行、延迟或跳过）
         """
+        if not self.renderer.enabled:
+            return
         print("\n正在生成问题一可视化图...")
 
         # 获取所有模型的预测概率
@@ -254,100 +851,45 @@ class DiabetesRiskPredictionSystem:
         # 图3：特征重要性分析
         self._create_feature_importance()
 
-        print("问题一可视化图生成完成")
+        print("问题一可视化图已提交渲染")
 
     def _create_roc_curves(self, all_probs, fusion_results):
         """图1：多模型ROC曲线对比"""
-        plt.figure(figsize=(10, 8))
-
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A']
         model_names = {'RandomForest': '随机森林', 'GradientBoosting': '梯度提升',
                       'LogisticRegression': '逻辑回归'}
 
-        # 绘制每个基础模型的ROC曲线
-        for idx, (name, prob) in enumerate(all_probs.items()):
-            fpr, tpr, _ = roc_curve(self.y_test, prob)
-            roc_auc = auc(fpr, tpr)
-            cn_name = model_names.get(name, name)
-            plt.plot(fpr, tpr, color=colors[idx], lw=2.5,
-                    label=f'{cn_name} (AUC = {roc_auc:.3f})')
-
-        # 绘制融合模型ROC曲线
-        fpr_fusion, tpr_fusion, _ = roc_curve(self.y_test, fusion_results['y_prob'])
-        roc_auc_fusion = auc(fpr_fusion, tpr_fusion)
-        plt.plot(fpr_fusion, tpr_fusion, color=colors[3], lw=3,
-                label=f'融合模型 (AUC = {roc_auc_fusion:.3f})', linestyle='--')
-
-        # 绘制对角线
-        plt.plot([0, 1], [0, 1], 'k--', lw=1.5, alpha=0.5, label='随机分类器')
-
-        plt.xlim([0.0, 1.0])
-        plt.ylim([0.0, 1.05])
-        plt.xlabel('假阳性率 (FPR)', fontsize=13, fontweight='bold')
-        plt.ylabel('真阳性率 (TPR)', fontsize=13, fontweight='bold')
-        plt.title('问题一：多模型ROC曲线对比分析', fontsize=15, fontweight='bold', pad=15)
-        plt.legend(loc="lower right", fontsize=11, framealpha=0.9)
-        plt.grid(True, alpha=0.3, linestyle='--')
-
-        plt.tight_layout()
-        plt.savefig('C:/Users/王晋华/Desktop/问题一_多模型ROC曲线对比.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("  已生成: 问题一_多模型ROC曲线对比.png")
+        self.renderer.submit(render_roc_curves, '问题一_多模型ROC曲线对比.png',
+                             y_true=np.asarray(self.y_test),
+                             model_probabilities={model_names.get(name, name): prob
+                                                  for name, prob in all_probs.items()},
+                             fusion_probability=fusion_results['y_prob'])
 
     def _create_model_performance_comparison(self):
         """图2：模型性能指标对比（单独一个图）"""
-        plt.figure(figsize=(10, 6))
-
         model_names_cn = {'RandomForest': '随机森林', 'GradientBoosting': '梯度提升',
                          'LogisticRegression': '逻辑回归', 'Fusion': '融合模型'}
 
-        # 计算每个模型的性能指标
+        # 计算每个模型的性能指标（复用缓存的测试集预测概率）
         metrics_data = {'模型': [], '准确率': [], '精确率': [], '召回率': [], 'F1分数': []}
+        y_pred_fusion, _, all_probs = self.fusion_predict(self.X_test, method='weighted')
 
-        for name, model in self.models.items():
-            y_pred = model.predict(self.X_test)
-            metrics_data['模型'].append(model_names_cn[name])
-            metrics_data['准确率'].append(accuracy_score(self.y_test, y_pred))
-            metrics_data['精确率'].append(precision_score(self.y_test, y_pred))
-            metrics_data['召回率'].append(recall_score(self.y_test, y_pred))
-            metrics_data['F1分数'].append(f1_score(self.y_test, y_pred))
-
-        # 添加融合模型性能
-        y_pred_fusion, _, _ = self.fusion_predict(self.X_test, method='weighted')
-        metrics_data['模型'].append(model_names_cn['Fusion'])
-        metrics_data['准确率'].append(accuracy_score(self.y_test, y_pred_fusion))
-        metrics_data['精确率'].append(precision_score(self.y_test, y_pred_fusion))
-        metrics_data['召回率'].append(recall_score(self.y_test, y_pred_fusion))
-        metrics_data['F1分数'].append(f1_score(self.y_test, y_pred_fusion))
-
-        df_metrics = pd.DataFrame(metrics_data)
-
-        # 性能指标柱状图
-        x = np.arange(len(df_metrics))
-        width = 0.2
-
-        plt.bar(x - 1.5*width, df_metrics['准确率'], width, label='准确率', color='#FF6B6B', alpha=0.8)
-        plt.bar(x - 0.5*width, df_metrics['精确率'], width, label='精确率', color='#4ECDC4', alpha=0.8)
-        plt.bar(x + 0.5*width, df_metrics['召回率'], width, label='召回率', color='#45B7D1', alpha=0.8)
-        plt.bar(x + 1.5*width, df_metrics['F1分数'], width, label='F1分数', color='#FFA07A', alpha=0.8)
-
-        plt.xlabel('模型', fontsize=12, fontweight='bold')
-        plt.ylabel('分数', fontsize=12, fontweight='bold')
-        plt.title('问题一：各模型性能指标对比', fontsize=14, fontweight='bold', pad=15)
-        plt.xticks(x, df_metrics['模型'], rotation=15, ha='right')
-        plt.legend(fontsize=10, loc='upper right')
-        plt.ylim([0, 1.1])
-        plt.grid(axis='y', alpha=0.3)
-
-        plt.tight_layout()
-        plt.savefig('C:/Users/王晋华/Desktop/问题一_模型性能指标对比.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("  已生成: 问题一_模型性能指标对比.png")
+        # 与 predict 一致：基础模型概率大于0.5判为阳性；融合模型使用决策阈值
+        predictions = {model_names_cn[name]: (prob > 0.5).astype(int) for name, prob in all_probs.items()}
+        predictions[model_names_cn['Fusion']] = y_pred_fusion
+
+        for label, y_pred in predictions.items():
+            _, metrics = classification_metrics(self.y_test, y_pred)
+            metrics_data['模型'].append(label)
+            metrics_data['准确率'].append(metrics['accuracy'])
+            metrics_data['精确率'].append(metrics['precision'])
+            metrics_data['召回率'].append(metrics['recall'])
+            metrics_data['F1分数'].append(metrics['f1'])
+
+        self.renderer.submit(render_model_performance, '问题一_模型性能指标对比.png',
+                             metrics_data=metrics_data)
 
     def _create_feature_importance(self):
         """图3：特征重要性分析（单独一个图）"""
-        plt.figure(figsize=(10, 7))
-
         # 获取随机森林的特征重要性
         rf_model = self.models['RandomForest']
         feature_importance = rf_model.feature_importances_
@@ -358,43 +900,180 @@ class DiabetesRiskPredictionSystem:
             '重要性': feature_importance
         }).sort_values('重要性', ascending=False)
 
-        # 中文特征名映射
-        feature_name_map = {
-            'Pregnancies': '怀孕次数',
-            'Glucose': '血糖水平',
-            'BloodPressure': '血压',
-            'SkinThickness': '皮褶厚度',
-            'Insulin': '胰岛素',
-            'BMI': '体质指数',
-            'DiabetesPedigreeFunction': '遗传因素',
-            'Age': '年龄',
-            'BMI_Age': 'BMI×年龄',
-            'Glucose_BMI': '血糖×BMI',
-            'Insulin_Glucose_Ratio': '胰岛素/血糖比'
-        }
-
-        importance_df['特征中文'] = importance_df['特征'].map(feature_name_map)
+        importance_df['特征中文'] = importance_df['特征'].map(FEATURE_NAMES_CN)
 
         # 特征重要性柱状图
         top_n = 10
         top_features = importance_df.head(top_n)
 
-        colors = plt.cm.RdYlGn(np.linspace(0.3, 0.9, len(top_features)))
-        plt.barh(range(len(top_features)), top_features['重要性'], color=colors, alpha=0.8)
-        plt.yticks(range(len(top_features)), top_features['特征中文'])
-        plt.xlabel('特征重要性', fontsize=13, fontweight='bold')
-        plt.title('问题一：Top 10 特征重要性排名', fontsize=14, fontweight='bold', pad=15)
-        plt.gca().invert_yaxis()
-        plt.grid(axis='x', alpha=0.3)
+        self.renderer.submit(render_feature_importance, '问题一_特征重要性分析.png',
+                             labels=top_features['特征中文'].tolist(),
+                             importances=top_features['重要性'].to_numpy())
+
+    # ==================== 增量更新 ====================
 
-        # 添加数值标签
-        for i, v in enumerate(top_features['重要性']):
-            plt.text(v + 0.005, i, f'{v:.3f}', va='center', fontsize=10)
+    @traced
+    def refresh_models(self, df_new, n_new_trees=None, replay_ratio=1.0, random_state=0,
+                       refit_dependents=True):
+        """
+        用新标注的患者增量更新模型，不做全量重训练
+        df_new: 包含原始8个特征和 Outcome 的 DataFrame
+        n_new_trees: 随机森林和梯度提升各追加的树数量（默认当前数量的 REFRESH_TREE_FRACTION）
+        replay_ratio: 从已有训练集中随机抽取 新样本数×replay_ratio 行与新样本一起训练新增的树，
+                      避免新增的树只拟合当天的少量样本
+        步骤:
+          1. 标准化器用新样本在线更新（partial_fit），已有模型的树阈值和逻辑回归系数
+             换算到新的标准化空间，预测结果基本不变（仅 float32 舍入后恰好落在分裂阈值
+             附近的样本可能改变分支）
+          2. 随机森林和梯度提升以 warm_start 追加树（梯度提升的新树拟合现有集成的残差）
+          3. 逻辑回归以当前系数为起点在累计训练集上继续迭代
+          4. 新样本并入训练集，按原来的来源（fusion_weight_source）重新计算融合权重；
+             来源为 'tuning' 时改用折外预测（搜索中的交叉验证 F1 是更新前模型的得分）
+          5. 概率校准、工作点和元学习器是在更新前的评分上拟合的：refit_dependents 为 True 时
+             按原设置重新拟合（需要折外预测时只计算一次），否则清除
+        返回: 更新耗时（秒）
+        """
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+        print(f"\n正在增量更新模型（新样本 {len(df_new)} 个）...")
+        start = time.perf_counter()
+        annotate(rows=len(df_new))
+
+        # 更新前在旧评分上拟合的组件及其设置
+        calibration_method = self.calibrator.method if self.calibrator is not None else None
+        operating_criteria = ({key: self.operating_point[key] for key in OPERATING_POINT_CRITERIA}
+                              if self.operating_point else None)
+        had_meta_learner = self.meta_learner is not None
+
+        features = FeatureTransformer([str(name) for name in self.feature_names]).transform(df_new)
+        y_new = np.asarray(df_new['Outcome']).astype(np.asarray(self.y_train).dtype)
+
+        # 1. 在线更新标准化器，并把已有模型和数据换算到新的标准化空间
+        old_mean, old_scale = self.scaler.mean_.copy(), self.scaler.scale_.copy()
+        with stage('refresh_scaler', rows=len(features)):
+            self.scaler.partial_fit(features)
+            self._rescale(old_mean, old_scale)
+        X_new = self.scaler.transform(features, copy=False)
+
+        # 新增的树在 新样本 + 回放样本 上训练
+        rng = np.random.default_rng(random_state)
+        n_replay = min(len(self.X_train), int(len(X_new) * replay_ratio))
+        replay = rng.choice(len(self.X_train), size=n_replay, replace=False)
+        X_refresh = np.concatenate([X_new, self.X_train[replay]])
+        y_refresh = np.concatenate([y_new, np.asarray(self.y_train)[replay]])
+
+        self.X_train = np.concatenate([self.X_train, X_new])
+        self.y_train = np.concatenate([np.asarray(self.y_train), y_new])
+
+        # 2-3. 追加树 / 继续迭代
+        for name, model in self.models.items():
+            if isinstance(model, (RandomForestClassifier, GradientBoostingClassifier)):
+                added = n_new_trees or max(1, int(model.n_estimators * REFRESH_TREE_FRACTION))
+                model.set_params(warm_start=True, n_estimators=model.n_estimators + added)
+                X_fit, y_fit = X_refresh, y_refresh
+            else:
+                model.set_params(warm_start=True)
+                X_fit, y_fit = self.X_train, self.y_train
+            with stage('refresh_model', model=name, rows=len(X_fit)):
+                model.fit(X_fit, y_fit)
+            model.set_params(warm_start=False)
+        self.invalidate_prediction_cache(models_changed=True)
+
+        # 折模型、折外预测和元学习器基于旧数据，需重新计算
+        self.fold_models = {}
+        self.oof_probabilities = {}
+        self._oof_cache_key = None
+        self.meta_learner = None
+
+        # 4. 按原来的来源重新计算融合权重（同时清除校准映射和工作点，并使预测缓存失效）
+        source = self.fusion_weight_source
+        if source == 'tuning':
+            print("超参数搜索的交叉验证 F1 是更新前模型的得分，融合权重改用折外预测计算")
+            source = 'oof'
+        self.calculate_fusion_weights(source=source)
+
+        # 5. 按原设置重新拟合校准映射、工作点和元学习器
+        if refit_dependents:
+            if calibration_method is not None:
+                self.fit_calibration(calibration_method)
+            if operating_criteria is not None:
+                self.optimize_operating_point(**operating_criteria)
+            if had_meta_learner:
+                self.fit_meta_learner()
+        elif had_meta_learner:
+            print("元学习器已清除，需重新调用 fit_meta_learner")
+
+        elapsed = time.perf_counter() - start
+        full_time = sum(self.training_times.values())
+        if full_time:
+            print(f"增量更新完成，耗时 {elapsed:.2f} 秒（全量训练 {full_time:.2f} 秒的 {elapsed / full_time:.1%}）")
+        else:
+            print(f"增量更新完成，耗时 {elapsed:.2f} 秒")
+        return elapsed
 
-        plt.tight_layout()
-        plt.savefig('C:/Users/王晋华/Desktop/问题一_特征重要性分析.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("  已生成: 问题一_特征重要性分析.png")
+    def _rescale(self, old_mean, old_scale):
+        """
+        标准化器更新后，把已有模型和已标准化的数据从旧标准化空间换算到新空间
+        x_旧 = (x_新 × 新标准差 + 新均值 - 旧均值) / 旧标准差
+        """
+        new_mean, new_scale = self.scaler.mean_, self.scaler.scale_
+
+        for model in self.models.values():
+            if hasattr(model, 'estimators_'):
+                for tree in np.ravel(model.estimators_):
+                    _rescale_tree(tree.tree_, old_mean, old_scale, new_mean, new_scale)
+            elif hasattr(model, 'coef_'):
+                coef = model.coef_ / old_scale
+                model.intercept_ = model.intercept_ + coef @ (new_mean - old_mean)
+                model.coef_ = coef * new_scale
+
+        for name in ('X_train', 'X_test'):
+            X = getattr(self, name)
+            X *= old_scale.astype(X.dtype)
+            X += (old_mean - new_mean).astype(X.dtype)
+            X /= new_scale.astype(X.dtype)
+        self.invalidate_prediction_cache(models_changed=True)
+
+    @traced
+    def compare_with_full_refit(self, tolerance=REFRESH_AGREEMENT_TOLERANCE):
+        """
+        检查增量更新后的模型与在累计训练集上全量重训练的模型的预测是否接近
+        （全量重训练较慢，用于定期校验而不是每次更新）
+        返回: {'mean_abs_diff', 'max_abs_diff', 'label_agreement', 'auc_refreshed', 'auc_full', 'ok'}
+        """
+        from sklearn.metrics import f1_score, roc_auc_score
+
+        print("\n正在与全量重训练的模型对比...")
+        annotate(rows=len(self.X_train))
+
+        # 标准化器在线更新的结果与全量拟合相同，全量模型直接在当前标准化空间中训练
+        full_models = _create_base_models(self.tuned_params)
+        full_prob = np.zeros(len(self.X_test))
+        total_weight = 0.0
+        for name, model in full_models.items():
+            _fit_base_model(name, model, self.X_train, self.y_train)
+            weight = f1_score(self.y_train, model.predict(self.X_train))
+            full_prob += weight * model.predict_proba(self.X_test)[:, 1]
+            total_weight += weight
+        full_prob /= total_weight
+
+        refreshed_pred, refreshed_prob, _ = self.fusion_predict(self.X_test, cache=False, calibrated=False)
+        diff = np.abs(refreshed_prob - full_prob)
+        report = {
+            'mean_abs_diff': float(diff.mean()),
+            'max_abs_diff': float(diff.max()),
+            'label_agreement': float(np.mean(refreshed_pred == (full_prob >= self.decision_threshold))),
+            'auc_refreshed': float(roc_auc_score(self.y_test, refreshed_prob)),
+            'auc_full': float(roc_auc_score(self.y_test, full_prob))
+        }
+        report['ok'] = report['mean_abs_diff'] <= tolerance
+
+        print(f"  融合评分平均绝对差: {report['mean_abs_diff']:.4f}（最大 {report['max_abs_diff']:.4f}）")
+        print(f"  预测标签一致率: {report['label_agreement']:.2%}")
+        print(f"  AUC - 增量更新: {report['auc_refreshed']:.4f}, 全量重训练: {report['auc_full']:.4f}")
+        if not report['ok']:
+            print(f"  警告：平均绝对差超过 {tolerance}，建议全量重训练")
+        return report
 
     # ==================== 问题二：风险预测系统 ====================
 
@@ -403,120 +1082,197 @@ class DiabetesRiskPredictionSystem:
         单个患者风险预测
         patient_data: dict，包含患者的各项指标
         """
-        # 创建特征DataFrame
-        df_patient = pd.DataFrame([patient_data])
-
-        # 特征工程
-        df_patient['BMI_Age'] = df_patient['BMI'] * df_patient['Age']
-        df_patient['Glucose_BMI'] = df_patient['Glucose'] * df_patient['BMI']
-        df_patient['Insulin_Glucose_Ratio'] = df_patient['Insulin'] / (df_patient['Glucose'] + 1e-6)
+        if self.drift_monitor is not None:
+            self.drift_monitor.update([patient_data[name] for name in RAW_FEATURES])
 
-        # 标准化
-        X_patient = self.scaler.transform(df_patient)
+        # 特征工程与标准化
+        X_patient = self.transform_features(patient_data)
 
         # 融合预测
-        y_pred, y_prob, _ = self.fusion_predict(X_patient, method='weighted')
+        y_pred, y_prob, _ = self.fusion_predict(X_patient, method='weighted', cache=False)
 
         return y_pred[0], y_prob[0]
 
-    def assess_risk_level(self, risk_score):
+    @traced
+    def predict_batch(self, patients, method='weighted', cache=False):
         """
-        评估风险等级
+        批量患者风险预测（向量化）
+        patients: DataFrame（包含原始8个特征列）或 NumPy 数组（列顺序同 RAW_FEATURES）
+        整批数据只做一次特征工程、一次标准化，每个基础模型只调用一次 predict_proba
+        cache: 是否使用融合预测缓存（报告中重复使用的数据集传 True）
         """
-        if risk_score < 0.3:
-            return "低风险", "green"
-        elif risk_score < 0.6:
-            return "中等风险", "orange"
+        if isinstance(patients, pd.DataFrame):
+            index = patients.index
+            raw_column = lambda name: patients[name].to_numpy(dtype=float)
         else:
-            return "高风险", "red"
+            patients = np.asarray(patients, dtype=float)
+            index = pd.RangeIndex(len(patients))
+            raw_column = lambda name: patients[:, RAW_FEATURES.index(name)]
 
-    def generate_medical_advice(self, risk_score, patient_data):
-        """
-        生成医疗建议
-        """
-        risk_level, _ = self.assess_risk_level(risk_score)
+        annotate(rows=len(patients))
+        if self.drift_monitor is not None:
+            self.drift_monitor.update(np.column_stack([raw_column(name) for name in RAW_FEATURES]))
+
+        # 特征工程与标准化（整批一次）
+        X_batch = self.transform_features(patients)
+
+        # 融合预测（每个模型一次调用）
+        y_pred, y_prob, _ = self.fusion_predict(X_batch, method=method, cache=cache)
+
+        risk_level, risk_color = self.assess_risk_levels(y_prob)
+
+        # 医疗建议位掩码（规则表见 risk_scoring.ADVICE_RULES，decode_advice 还原为文字）
+        codes = advice_codes(y_prob, {name: raw_column(name) for name in RAW_FEATURES},
+                             self.decision_threshold)
 
-        advice = {
+        results = pd.DataFrame({
+            'prediction': y_pred.astype(int),
+            'risk_score': y_prob,
             'risk_level': risk_level,
-            'risk_score': risk_score,
-            'recommendations': []
-        }
+            'risk_color': risk_color,
+            'advice_code': codes
+        }, index=index)
 
-        if risk_score >= 0.5:
-            advice['diagnosis'] = "建议进一步检查，可能存在糖尿病风险"
-        else:
-            advice['diagnosis'] = "目前指标正常，建议保持健康生活方式"
+        return results
 
-        # 基于具体指标给出建议
-        if patient_data.get('Glucose', 0) > 140:
-            advice['recommendations'].append("血糖偏高，建议控制碳水化合物摄入")
+    def enable_drift_monitor(self, interval=60.0, min_rows=None):
+        """
+        开启输入分布漂移监控：predict_single_patient / predict_batch 的输入按训练集分箱计数，
+        check_drift 按 interval 秒的间隔计算 PSI/KS（见 drift_monitor）
+        min_rows: 窗口内至少多少行才评估（默认 DRIFT_MIN_ROWS）
+        """
+        if self.drift_profile is None:
+            raise ValueError("没有训练分布概况（需先 prepare_data 或加载包含概况的模型产物）")
+        kwargs = {} if min_rows is None else {'min_rows': min_rows}
+        self.drift_monitor = DriftMonitor(self.drift_profile, interval=interval, **kwargs)
+        return self.drift_monitor
 
-        if patient_data.get('BMI', 0) > 30:
-            advice['recommendations'].append("BMI偏高，建议增加运动、控制体重")
+    def check_drift(self, force=False):
+        """
+        到评估时间时计算当前窗口的漂移指标，并打印漂移的特征
+        force: 忽略时间间隔和最少行数立即评估
+        返回: 最近一次评估结果（未开启监控或尚未评估时为 None）
+        """
+        if self.drift_monitor is None:
+            return None
+        previous = self.drift_monitor.last_report
+        report = self.drift_monitor.evaluate(force=force)
+        if report is not None and report is not previous:
+            print(f"输入分布监控（{report['window_rows']} 行）: {report['status']}, "
+                  f"最大 PSI {report['max_psi']:.4f}, 最大 KS {report['max_ks']:.4f}")
+            for name in report['drifted']:
+                feature = report['features'][name]
+                print(f"  {FEATURE_NAMES_CN.get(name, name)}: PSI {feature['psi']:.4f}, "
+                      f"KS {feature['ks']:.4f} ({feature['status']})")
+        return report
+
+    def _explainer_engine(self):
+        """
+        解释用的推理引擎
+        树模型的展平数组和叶子贡献表按树模型版本缓存；融合权重、校准映射、工作点和背景分布
+        每次重新组装（开销很小），调整这些设置不会触发树模型重新导出
+        """
+        if self._explainer is None or self._explainer[0] != self._tree_version:
+            self._explainer = (self._tree_version, {})
+        return export_fusion_engine(self, tree_exports=self._explainer[1])
 
-        if patient_data.get('BloodPressure', 0) > 85:
-            advice['recommendations'].append("血压偏高，建议低盐饮食、规律作息")
+    @traced
+    def explain_batch(self, patients, top_k=3):
+        """
+        逐患者解释融合风险评分（'weighted' 融合，已拟合校准时为校准后的评分）
+        随机森林、梯度提升为精确的树路径贡献，逻辑回归为 系数×(特征 - 训练集均值)，
+        按融合权重混合，每行 base_value + 各特征贡献之和 = risk_score
+        patients: 同 predict_batch
+        top_k: 额外给出使风险升高最多的前 top_k 个特征（0 表示不给出）
+        返回: DataFrame（risk_score、base_value、每个特征的贡献列，以及 factor_i / factor_i_contribution）
+        """
+        annotate(rows=len(patients))
+        base, contributions, scores = self._explainer_engine().explain_scaled(self.transform_features(patients))
+
+        feature_names = [str(name) for name in self.feature_names]
+        index = patients.index if isinstance(patients, pd.DataFrame) else pd.RangeIndex(len(scores))
+        results = pd.DataFrame(contributions, columns=feature_names, index=index)
+        results.insert(0, 'risk_score', scores)
+        results.insert(1, 'base_value', base)
+
+        if top_k:
+            order = np.argsort(-contributions, axis=1, kind='stable')[:, :top_k]
+            top = np.take_along_axis(contributions, order, axis=1)
+            names = np.asarray([FEATURE_NAMES_CN.get(name, name) for name in feature_names])
+            for k in range(order.shape[1]):
+                # 贡献不为正的特征不算作升高风险的因素
+                results[f'factor_{k + 1}'] = np.where(top[:, k] > 0, names[order[:, k]], '')
+                results[f'factor_{k + 1}_contribution'] = top[:, k]
+        return results
 
-        if patient_data.get('Age', 0) > 45:
-            advice['recommendations'].append("年龄较大，建议定期体检、监测血糖")
+    def assess_risk_levels(self, risk_scores):
+        """
+        批量评估风险等级（与 assess_risk_level 的阈值一致）
+        返回: (风险等级数组, 颜色数组)
+        """
+        return assess_risk_levels(risk_scores, self.risk_thresholds)
 
-        if not advice['recommendations']:
-            advice['recommendations'].append("保持健康饮食和适量运动")
-            advice['recommendations'].append("定期进行健康检查")
+    def assess_risk_level(self, risk_score):
+        """
+        评估风险等级
+        """
+        return assess_risk_level(risk_score, self.risk_thresholds)
 
-        return advice
+    def generate_medical_advice(self, risk_score, patient_data):
+        """
+        生成医疗建议
+        """
+        return generate_medical_advice(risk_score, patient_data, self.risk_thresholds,
+                                       self.decision_threshold)
 
-    def batch_prediction_demo(self):
+    @traced
+    def batch_prediction_demo(self, explain=False):
         """
         批量预测演示（使用测试集数据）
+        explain: True 时用 explain_batch 给出每个患者的主要风险因素（top_factors 列）；
+                 默认不计算（解释需要对整个测试集计算逐特征贡献）
         """
         print("\n" + "="*60)
         print("问题二：糖尿病风险预测系统")
         print("="*60)
         print("\n正在进行批量预测演示...")
 
-        # 使用测试集的前10个样本进行演示
         n_samples = len(self.X_test)
+        annotate(rows=n_samples)
+
+        # 还原原始特征（整批逆标准化）
+        df_patients = pd.DataFrame(self.scaler.inverse_transform(self.X_test),
+                                   columns=self.feature_names)[RAW_FEATURES]
+        df_patients['Pregnancies'] = df_patients['Pregnancies'].astype(int)
+        df_patients['Age'] = df_patients['Age'].astype(int)
 
-        results = []
-        for i in range(n_samples):
-            # 获取原始数据
-            patient_features = self.scaler.inverse_transform([self.X_test[i]])[0]
-
-            # 构建患者数据字典
-            patient_data = {
-                'Pregnancies': int(patient_features[0]),
-                'Glucose': patient_features[1],
-                'BloodPressure': patient_features[2],
-                'SkinThickness': patient_features[3],
-                'Insulin': patient_features[4],
-                'BMI': patient_features[5],
-                'DiabetesPedigreeFunction': patient_features[6],
-                'Age': int(patient_features[7])
-            }
-
-            # 预测
-            y_pred, risk_score = self.predict_single_patient(patient_data)
-
-            # 风险评估
-            risk_level, risk_color = self.assess_risk_level(risk_score)
-
-            # 真实标签
-            true_label = self.y_test.iloc[i]
-
-            results.append({
-                'patient_id': i + 1,
-                'glucose': patient_data['Glucose'],
-                'bmi': patient_data['BMI'],
-                'age': patient_data['Age'],
-                'risk_score': risk_score,
-                'risk_level': risk_level,
-                'prediction': '糖尿病' if y_pred == 1 else '正常',
-                'true_label': '糖尿病' if true_label == 1 else '正常',
-                'correct': y_pred == true_label
-            })
+        # 批量预测与风险评估
+        batch = self.predict_batch(df_patients)
+
+        # 真实标签
+        true_labels = np.asarray(self.y_test)
+        y_pred = batch['prediction'].to_numpy()
+
+        results = {
+            'patient_id': np.arange(1, n_samples + 1),
+            'glucose': df_patients['Glucose'].to_numpy(),
+            'bmi': df_patients['BMI'].to_numpy(),
+            'age': df_patients['Age'].to_numpy(),
+            'risk_score': batch['risk_score'].to_numpy(),
+            'risk_level': batch['risk_level'].to_numpy(),
+            'advice_code': batch['advice_code'].to_numpy(),
+            'prediction': np.where(y_pred == 1, '糖尿病', '正常'),
+            'true_label': np.where(true_labels == 1, '糖尿病', '正常'),
+            'correct': y_pred == true_labels
+        }
 
         df_results = pd.DataFrame(results)
+        if explain:
+            # 逐患者的主要风险因素
+            explanation = self.explain_batch(df_patients, top_k=3)
+            factors = explanation[['factor_1', 'factor_2', 'factor_3']].to_numpy()
+            df_results.insert(df_results.columns.get_loc('advice_code') + 1, 'top_factors',
+                              ['、'.join(name for name in row if name) for row in factors])
 
         print(f"\n批量预测完成，共预测 {n_samples} 个样本")
         print(f"预测准确率: {df_results['correct'].mean():.2%}")
@@ -524,15 +1280,17 @@ class DiabetesRiskPredictionSystem:
         print(df_results.head().to_string(index=False))
 
         # 保存结果
-        df_results.to_csv('C:/Users/王晋华/Desktop/problem2_batch_predictions.csv',
+        df_results.to_csv(os.path.join(self.output_dir, 'problem2_batch_predictions.csv'),
                          index=False, encoding='utf-8-sig')
 
         return df_results
 
     def create_problem2_visualizations(self, prediction_results):
         """
-        创建问题二的3张可视化图
+        创建问题二的3张可视化图（提交给渲染器，按 plot_mode 并行、延迟或跳过）
         """
+        if not self.renderer.enabled:
+            return
         print("\n正在生成问题二可视化图...")
 
         # 图1：风险评分分布分析
@@ -544,103 +1302,184 @@ class DiabetesRiskPredictionSystem:
         # 图3：预测准确性分析
         self._create_prediction_accuracy_analysis()
 
-        print("问题二可视化图生成完成")
+        print("问题二可视化图已提交渲染")
 
     def _create_risk_score_distribution(self, results):
         """图1：风险评分分布分析（单独一个图）"""
-        plt.figure(figsize=(10, 6))
-
         # 获取所有测试样本的风险评分
         _, all_risk_scores, _ = self.fusion_predict(self.X_test, method='weighted')
+        y_true = np.asarray(self.y_test)
 
-        # 风险评分直方图
-        plt.hist([all_risk_scores[self.y_test == 0],
-                 all_risk_scores[self.y_test == 1]],
-                bins=20, label=['正常', '糖尿病'],
-                color=['#2ecc71', '#e74c3c'], alpha=0.7, edgecolor='black')
-        plt.axvline(x=0.5, color='blue', linestyle='--', linewidth=2.5,
-                   label='决策阈值 (0.5)')
-        plt.xlabel('风险评分', fontsize=13, fontweight='bold')
-        plt.ylabel('频数', fontsize=13, fontweight='bold')
-        plt.title('问题二：糖尿病风险评分分布', fontsize=14, fontweight='bold', pad=15)
-        plt.legend(fontsize=11, loc='upper right')
-        plt.grid(alpha=0.3)
-
-        plt.tight_layout()
-        plt.savefig('C:/Users/王晋华/Desktop/问题二_风险评分分布分析.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("  已生成: 问题二_风险评分分布分析.png")
+        self.renderer.submit(render_risk_score_distribution, '问题二_风险评分分布分析.png',
+                             scores_negative=all_risk_scores[y_true == 0],
+                             scores_positive=all_risk_scores[y_true == 1],
+                             threshold=self.decision_threshold)
 
     def _create_risk_level_statistics(self, results):
         """图2：风险等级统计（单独一个图）"""
-        plt.figure(figsize=(9, 7))
-
         # 获取所有测试样本的风险评分和等级
         _, all_risk_scores, _ = self.fusion_predict(self.X_test, method='weighted')
 
-        risk_levels = []
-        for score in all_risk_scores:
-            level, _ = self.assess_risk_level(score)
-            risk_levels.append(level)
+        counts = np.bincount(risk_level_codes(all_risk_scores, self.risk_thresholds),
+                             minlength=len(RISK_LEVELS))
+        present = np.flatnonzero(counts)
 
-        risk_level_counts = pd.Series(risk_levels).value_counts()
-
-        # 风险等级饼图
-        colors_pie = ['#2ecc71', '#f39c12', '#e74c3c']
-        explode = [0.05] * len(risk_level_counts)
-        if '高风险' in risk_level_counts.index:
-            explode[list(risk_level_counts.index).index('高风险')] = 0.1
-
-        plt.pie(risk_level_counts.values, labels=risk_level_counts.index,
-               autopct='%1.1f%%', colors=colors_pie, explode=explode,
-               startangle=90, textprops={'fontsize': 12, 'fontweight': 'bold'},
-               shadow=True)
-        plt.title('问题二：测试集风险等级分布统计', fontsize=14, fontweight='bold', pad=15)
-
-        plt.tight_layout()
-        plt.savefig('C:/Users/王晋华/Desktop/问题二_风险等级分布统计.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("  已生成: 问题二_风险等级分布统计.png")
+        self.renderer.submit(render_risk_level_pie, '问题二_风险等级分布统计.png',
+                             levels=[RISK_LEVELS[i] for i in present],
+                             counts=counts[present])
 
     def _create_prediction_accuracy_analysis(self):
         """图3：预测准确性分析（单独一个图）"""
-        plt.figure(figsize=(8, 7))
-
         # 获取预测结果
         y_pred, y_prob, _ = self.fusion_predict(self.X_test, method='weighted')
 
-        # 混淆矩阵热力图
-        cm = confusion_matrix(self.y_test, y_pred)
-
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                   xticklabels=['正常', '糖尿病'],
-                   yticklabels=['正常', '糖尿病'],
-                   cbar_kws={'label': '样本数量'},
-                   annot_kws={'fontsize': 16, 'fontweight': 'bold'})
-        plt.xlabel('预测标签', fontsize=13, fontweight='bold')
-        plt.ylabel('真实标签', fontsize=13, fontweight='bold')
-        plt.title('问题二：预测混淆矩阵', fontsize=14, fontweight='bold', pad=15)
-
-        # 添加性能指标文本
-        accuracy = accuracy_score(self.y_test, y_pred)
-        precision = precision_score(self.y_test, y_pred)
-        recall = recall_score(self.y_test, y_pred)
-        f1 = f1_score(self.y_test, y_pred)
-
-        textstr = f'准确率: {accuracy:.2%}\n精确率: {precision:.2%}\n召回率: {recall:.2%}\nF1分数: {f1:.2%}'
-        plt.text(1.35, 0.5, textstr, fontsize=11, bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
-                transform=plt.gca().transAxes, verticalalignment='center')
-
-        plt.tight_layout()
-        plt.savefig('C:/Users/王晋华/Desktop/问题二_预测准确性分析.png', dpi=300, bbox_inches='tight')
-        plt.close()
-        print("  已生成: 问题二_预测准确性分析.png")
+        # 混淆矩阵与性能指标
+        cm, values = classification_metrics(self.y_test, y_pred)
+        metrics = {
+            '准确率': values['accuracy'],
+            '精确率': values['precision'],
+            '召回率': values['recall'],
+            'F1分数': values['f1']
+        }
+
+        self.renderer.submit(render_confusion_matrix, '问题二_预测准确性分析.png',
+                             cm=cm, metrics=metrics)
+
+    # ==================== 模型产物持久化 ====================
+
+    def _artifact_schema(self):
+        """模型产物的结构描述（用于计算版本哈希）"""
+        return {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'feature_names': [str(name) for name in self.feature_names],
+            'models': {name: type(model).__name__ for name, model in self.models.items()},
+            'n_features_in': int(self.scaler.n_features_in_)
+        }
+
+    @staticmethod
+    def _schema_hash(schema):
+        """结构描述的SHA-256哈希"""
+        encoded = json.dumps(schema, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    @traced
+    def save_artifact(self, path):
+        """
+        保存模型产物（标准化器、基础模型、融合权重、特征名及结构哈希）
+        path: 产物目录
+        模型以未压缩的 joblib 格式保存，加载时可以内存映射其中的大数组
+        """
+        import joblib
+        import sklearn
+
+        os.makedirs(path, exist_ok=True)
+
+        # 先写临时文件再替换：覆盖已有产物时，读取方（及内存映射中的旧文件）不会看到写了一半的模型
+        models_path = os.path.join(path, ARTIFACT_MODELS)
+        joblib.dump({'scaler': self.scaler, 'models': self.models, 'fold_models': self.fold_models,
+                     'oof_probabilities': self.oof_probabilities, 'meta_learner': self.meta_learner},
+                    models_path + '.tmp')
+        os.replace(models_path + '.tmp', models_path)
+
+        schema = self._artifact_schema()
+        manifest = {
+            'schema': schema,
+            'schema_hash': self._schema_hash(schema),
+            'fusion_weights': {name: float(w) for name, w in self.fusion_weights.items()},
+            'fusion_weight_source': self.fusion_weight_source,
+            # 折模型和折外预测的缓存键（训练数据指纹、折数、划分种子、模型参数指纹）
+            'oof_cache_key': list(self._oof_cache_key) if self._oof_cache_key else None,
+            'calibration': self.calibrator.to_dict() if self.calibrator is not None else None,
+            'operating_point': {
+                'decision_threshold': float(self.decision_threshold),
+                'risk_thresholds': [float(t) for t in self.risk_thresholds],
+                'details': self.operating_point
+            },
+            'hyperparameters': self.tuned_params,
+            'drift_profile': self.drift_profile.to_dict() if self.drift_profile is not None else None,
+            'sklearn_version': sklearn.__version__,
+            'created_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+        # 清单最后写入，保证读取方不会看到不完整的产物
+        manifest_path = os.path.join(path, ARTIFACT_MANIFEST)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+        print(f"模型产物已保存到: {path} (结构哈希 {manifest['schema_hash'][:12]})")
+        return manifest
+
+    @traced
+    def load_artifact(self, path, mmap_mode='r'):
+        """
+        加载模型产物，跳过数据加载和重新训练
+        mmap_mode: 传给 joblib.load，'r' 表示以只读内存映射方式打开大数组，
+                   多个评分进程可共享同一份页缓存；None 表示完整读入内存
+        """
+        import joblib
+        import sklearn
+
+        with open(os.path.join(path, ARTIFACT_MANIFEST), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        version = manifest['schema'].get('format_version')
+        if version != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"不支持的模型产物版本: {version}（当前版本 {ARTIFACT_FORMAT_VERSION}）")
+
+        if manifest.get('sklearn_version') != sklearn.__version__:
+            warnings.warn(f"模型产物由 scikit-learn {manifest.get('sklearn_version')} 生成，"
+                          f"当前版本为 {sklearn.__version__}")
+
+        payload = joblib.load(os.path.join(path, ARTIFACT_MODELS), mmap_mode=mmap_mode)
+        self.scaler = payload['scaler']
+        self.models = payload['models']
+        self.fold_models = payload.get('fold_models', {})
+        self.oof_probabilities = payload.get('oof_probabilities', {})
+        # 较早的产物没有缓存键，有训练数据时需要折模型的步骤会重新计算
+        oof_cache_key = manifest.get('oof_cache_key')
+        self._oof_cache_key = tuple(oof_cache_key) if oof_cache_key and self.fold_models else None
+        self.meta_learner = payload.get('meta_learner')
+        self.fusion_weights = dict(manifest['fusion_weights'])
+        self.fusion_weight_source = manifest.get('fusion_weight_source', 'train')
+        calibration = manifest.get('calibration')
+        self.calibrator = ProbabilityCalibrator.from_dict(calibration) if calibration else None
+        operating_point = manifest.get('operating_point') or {}
+        self.decision_threshold = operating_point.get('decision_threshold', DECISION_THRESHOLD)
+        self.risk_thresholds = operating_point.get('risk_thresholds', list(RISK_THRESHOLDS))
+        self.operating_point = operating_point.get('details')
+        self.tuned_params = manifest.get('hyperparameters') or {}
+        # 较早的产物没有训练分布概况，此时保留 prepare_data 生成的概况（若有）
+        if manifest.get('drift_profile'):
+            self.drift_profile = DriftProfile.from_dict(manifest['drift_profile'])
+        self.feature_names = pd.Index(manifest['schema']['feature_names'])
+        self.invalidate_prediction_cache(models_changed=True)
+
+        # 校验产物内容与清单结构一致
+        schema_hash = self._schema_hash(self._artifact_schema())
+        if schema_hash != manifest['schema_hash']:
+            raise ValueError(f"模型产物结构哈希不匹配: {schema_hash} != {manifest['schema_hash']}")
+
+        print(f"已加载模型产物: {path} (结构哈希 {schema_hash[:12]})")
+        return manifest
+
+    @traced
+    def export_engine(self, path=None):
+        """
+        导出紧凑推理引擎（展平的树节点数组 + 线性打分内核，仅依赖 NumPy）
+        path: 若提供则保存到该目录，评分服务器可用 FusionEngine.load(path) 加载
+        """
+        engine = export_fusion_engine(self)
+        if path:
+            engine.save(path)
+            print(f"推理引擎已导出到: {path}")
+        return engine
 
     # ==================== 结果保存 ====================
 
     def save_results(self, problem1_results, problem2_results):
         """保存所有结果到文本文件"""
-        with open('C:/Users/王晋华/Desktop/系统运行结果.txt', 'w', encoding='utf-8') as f:
+        with open(os.path.join(self.output_dir, '系统运行结果.txt'), 'w', encoding='utf-8') as f:
             f.write("="*70 + "\n")
             f.write("糖尿病风险预测系统运行结果\n")
             f.write("="*70 + "\n\n")
@@ -656,6 +1495,14 @@ class DiabetesRiskPredictionSystem:
             f.write(f"  F1分数:             {problem1_results['f1']:.4f}\n")
             f.write(f"  ROC AUC:            {problem1_results['roc_auc']:.4f}\n\n")
 
+            if 'confidence_intervals' in problem1_results:
+                f.write(f"自助法 {problem1_results['confidence']:.0%} 置信区间:\n")
+                for name in BOOTSTRAP_METRICS:
+                    interval = problem1_results['confidence_intervals'][name]
+                    f.write(f"  {name:<10} [{interval['lower']:.4f}, {interval['upper']:.4f}]"
+                            f"  (标准误 {interval['std']:.4f})\n")
+                f.write("\n")
+
             f.write("混淆矩阵:\n")
             f.write(str(problem1_results['confusion_matrix']) + "\n\n")
 
@@ -683,37 +1530,86 @@ class DiabetesRiskPredictionSystem:
 
         print("\n所有结果已保存到: 系统运行结果.txt")
 
-def main():
-    """主函数"""
+def main(artifact_path=None, output_dir=DEFAULT_OUTPUT_DIR, plot_mode='now', compact=False,
+         calibration=None, operating_point=None, n_bootstrap=0, tuning=None, data_path=None,
+         explain=False):
+    """
+    主函数
+    artifact_path: 模型产物目录；若已存在则直接加载模型，跳过训练，否则训练后保存到该目录
+    output_dir: 图表和结果文件的输出目录
+    plot_mode: 'now'（与后续流程并行渲染）、'defer'（全部计算完成后渲染）或 'skip'（不生成图表）
+    compact: 紧凑内存模式（见 DiabetesRiskPredictionSystem），训练后打印各属性的内存占用
+    calibration: 'isotonic' 或 'platt' 时在折外预测上拟合概率校准（需额外训练各折模型）
+    operating_point: 传给 optimize_operating_point 的参数字典（如 {'target_recall': 0.85}），
+                     None 时使用默认决策阈值 0.5 和风险等级分界 0.3/0.6
+    n_bootstrap: 大于 0 时评估融合模型时给出自助法置信区间（重抽样次数，如 2000）
+    tuning: 传给 tune_base_models 的参数字典（如 {'n_candidates': 27}）时先搜索超参数，
+            用选出的参数训练基础模型，融合权重取搜索中的交叉验证 F1；None 时使用默认参数
+    data_path: 预处理后的数据（默认为输出目录中 data_preprocessing.py 生成的 diabetes_data_cleaned.csv，
+               不存在时使用增量模式生成的 diabetes_data_cleaned 分区目录）
+    explain: True 时批量预测结果中给出每个患者的主要风险因素（top_factors 列）
+    """
+    # 设置UTF-8编码（Windows 控制台输出中文）
+    if sys.stdout.encoding.lower() != 'utf-8':
+        sys.stdout.reconfigure(encoding='utf-8')
+
     print("="*70)
     print("糖尿病风险预测系统")
     print("基于TabNet融合策略的早期风险预测与评估")
     print("="*70 + "\n")
 
-    # 初始化系统
-    system = DiabetesRiskPredictionSystem()
+    # 初始化系统（构造时创建输出目录）
+    system = DiabetesRiskPredictionSystem(output_dir=output_dir, plot_mode=plot_mode, compact=compact)
 
     # 1. 加载预处理后的数据
-    df = system.load_data("C:/Users/王晋华/Desktop/diabetes_data_cleaned.csv")
+    if data_path is None:
+        data_path = os.path.join(output_dir, 'diabetes_data_cleaned.csv')
+        # data_preprocessing.py 的增量（分区）模式输出为同名目录
+        if not os.path.exists(data_path) and os.path.isdir(os.path.splitext(data_path)[0]):
+            data_path = os.path.splitext(data_path)[0]
+    df = system.load_data(data_path)
 
-    # 2. 特征工程
-    df_engineered = system.feature_engineering(df)
-    system.df_engineered = df_engineered
+    # ========== 问题一：TabNet融合模型 ==========
 
-    # 3. 准备数据
-    system.prepare_data(df_engineered)
+    if artifact_path and os.path.exists(os.path.join(artifact_path, ARTIFACT_MANIFEST)):
+        # 2-5. 加载已训练的模型产物（含标准化器），只用它变换评估用的测试集，不重复数据准备流程
+        system.load_artifact(artifact_path)
+        system.prepare_evaluation_data(df)
+        if compact:
+            del df
+    else:
+        # 2. 特征工程
+        df_engineered = system.feature_engineering(df)
+        if not compact:
+            system.df_engineered = df_engineered
+
+        # 3. 准备数据（紧凑模式下随后释放原始数据和特征工程结果）
+        system.prepare_data(df_engineered)
+        if compact:
+            del df, df_engineered
+
+        # 4. 构建和训练基础模型（可先搜索超参数）
+        if tuning is not None:
+            system.tune_base_models(**tuning)
+        else:
+            system.build_base_models()
+            system.train_base_models()
 
-    # ========== 问题一：TabNet融合模型 ==========
+        # 5. 计算融合权重（及概率校准）
+        system.calculate_fusion_weights(source='tuning' if tuning is not None else 'train')
+        if calibration:
+            system.fit_calibration(calibration)
+        if operating_point is not None:
+            system.optimize_operating_point(**operating_point)
 
-    # 4. 构建和训练基础模型
-    system.build_base_models()
-    system.train_base_models()
+        if artifact_path:
+            system.save_artifact(artifact_path)
 
-    # 5. 计算融合权重
-    system.calculate_fusion_weights()
+    if compact:
+        system.print_memory_footprint()
 
     # 6. 评估融合模型
-    problem1_results = system.evaluate_fusion_model()
+    problem1_results = system.evaluate_fusion_model(n_bootstrap=n_bootstrap)
 
     # 7. 创建问题一可视化
     system.create_problem1_visualizations(problem1_results)
@@ -721,7 +1617,7 @@ def main():
     # ========== 问题二：风险预测系统 ==========
 
     # 8. 批量预测演示
-    problem2_results = system.batch_prediction_demo()
+    problem2_results = system.batch_prediction_demo(explain=explain)
 
     # 9. 创建问题二可视化
     system.create_problem2_visualizations(problem2_results)
@@ -729,6 +1625,11 @@ def main():
     # 10. 保存所有结果
     system.save_results(problem1_results, problem2_results)
 
+    # 11. 等待图表渲染完成
+    if system.renderer.enabled:
+        print("\n正在等待图表渲染完成...")
+        system.renderer.close()
+
     print("\n" + "="*70)
     print("糖尿病风险预测系统运行完成！")
     print("="*70)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+输入分布漂移监控（仅依赖 NumPy，评分服务可常开）
+训练时按每个特征的训练集分位数划分分箱，保存各分箱的训练样本比例（训练分布概况，随模型产物保存）。
+线上每批请求只做一次比较和一次 bincount，把各特征的分箱计数累加到固定大小的计数矩阵
+（内存与请求量无关）；按计划（如每分钟）对当前窗口计算 PSI 和 KS 后开始新窗口：
+  - PSI（群体稳定性指数）: Σ (线上比例 - 训练比例) × ln(线上比例 / 训练比例)
+  - KS: 分箱边界处训练与线上累计分布之差的最大值
+PSI < 0.1 为稳定，0.1~0.25 为轻微漂移，> 0.25 为显著漂移。
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# 每个特征的分箱数（按训练集分位数等频划分，离散特征的重复边界会合并）
+DRIFT_BINS = 20
+
+# PSI 判定阈值: (轻微漂移, 显著漂移)
+PSI_THRESHOLDS = (0.1, 0.25)
+DRIFT_STATUS = ['stable', 'moderate', 'significant']
+
+# 计算 PSI 时比例的下限（避免空分箱取对数）
+PSI_EPSILON = 1e-4
+
+# 窗口内少于该行数时不评估，继续累积
+DRIFT_MIN_ROWS = 200
+
+
+class DriftProfile:
+    """
+    训练分布概况
+    feature_names: 监控的特征（输入矩阵的列顺序）
+    edges: 形状 (特征数, DRIFT_BINS - 1) 的分箱内部边界，不足的位置用 inf 填充
+    expected: 形状 (特征数, DRIFT_BINS) 的训练样本分箱比例
+    """
+
+    def __init__(self, feature_names, edges, expected):
+        self.feature_names = list(feature_names)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.expected = np.asarray(expected, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, X, feature_names, n_bins=DRIFT_BINS):
+        """按训练数据 X（形状 (n, 特征数)）的分位数划分分箱"""
+        X = np.asarray(X, dtype=np.float64)
+        edges = np.full((X.shape[1], n_bins - 1), np.inf)
+        for j in range(X.shape[1]):
+            unique = np.unique(np.nanquantile(X[:, j], np.linspace(0, 1, n_bins + 1)[1:-1]))
+            edges[j, :len(unique)] = unique
+        profile = cls(feature_names, edges, np.zeros((X.shape[1], n_bins)))
+        counts = profile.bin_counts(X)
+        profile.expected = counts / max(len(X), 1)
+        return profile
+
+    @property
+    def n_bins(self):
+        return self.edges.shape[1] + 1
+
+    def bin_counts(self, X):
+        """
+        各特征的分箱计数，形状 (特征数, 分箱数)
+        一次广播比较得到所有值的分箱号（取值 >= 的边界个数，与 searchsorted(side='right') 一致），
+        再用一次 bincount 计数；NaN 计入最低分箱
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names))
+        n_features, n_bins = self.expected.shape
+        bins = (X[:, :, None] >= self.edges[None]).sum(axis=2)
+        bins += np.arange(n_features) * n_bins
+        return np.bincount(bins.ravel(), minlength=n_features * n_bins).reshape(n_features, n_bins)
+
+    def to_dict(self):
+        """转为可写入 JSON 的字典（inf 边界不写入）"""
+        return {
+            'feature_names': self.feature_names,
+            'edges': [row[np.isfinite(row)].tolist() for row in self.edges],
+            'expected': self.expected.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        expected = np.asarray(data['expected'], dtype=np.float64)
+        edges = np.full((len(expected), expected.shape[1] - 1), np.inf)
+        for j, row in enumerate(data['edges']):
+            edges[j, :len(row)] = row
+        return cls(data['feature_names'], edges, expected)
+
+
+def population_stability_index(expected, actual):
+    """按行计算 PSI（expected/actual 为各分箱比例）"""
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=-1)
+
+
+def ks_statistic(expected, actual):
+    """按行计算分箱边界处累计分布之差的最大值"""
+    return np.abs(np.cumsum(expected, axis=-1) - np.cumsum(actual, axis=-1)).max(axis=-1)
+
+
+class DriftMonitor:
+    """
+    流式漂移监控
+    update() 在评分路径上累加分箱计数；evaluate() 按计划调用，计算当前窗口的 PSI/KS 后开始新窗口
+    interval: 两次评估的最小间隔（秒）；min_rows: 窗口内至少多少行才评估
+    """
+
+    def __init__(self, profile, interval=60.0, min_rows=DRIFT_MIN_ROWS):
+        self.profile = profile
+        self.interval = interval
+        self.min_rows = min_rows
+        self._window = np.zeros(profile.expected.shape, dtype=np.int64)
+        self._window_rows = 0
+        self.total_rows = 0
+        self.last_report = None
+        self._last_evaluated = time.monotonic()
+        # 评分线程与定时评估可能并发访问计数矩阵
+        self._lock = threading.Lock()
+
+    def update(self, X):
+        """累加一批输入（形状 (n, 特征数) 或单行，列顺序同 profile.feature_names）"""
+        counts = self.profile.bin_counts(X)
+        rows = int(counts[0].sum()) if len(counts) else 0
+        with self._lock:
+            self._window += counts
+            self._window_rows += rows
+            self.total_rows += rows
+
+    def due(self):
+        """是否到了评估时间且窗口行数足够"""
+        return (time.monotonic() - self._last_evaluated >= self.interval
+                and self._window_rows >= self.min_rows)
+
+    def evaluate(self, force=False):
+        """
+        计算当前窗口的漂移指标并开始新窗口
+        force: 忽略时间间隔和最少行数（窗口为空时仍返回上次结果）
+        返回: 最近一次评估结果（尚未评估过时为 None）
+        """
+        with self._lock:
+            if not (self._window_rows and (force or self.due())):
+                return self.last_report
+            window, rows = self._window, self._window_rows
+            self._window = np.zeros_like(window)
+            self._window_rows = 0
+            self._last_evaluated = time.monotonic()
+
+        actual = window / rows
+        psi = population_stability_index(self.profile.expected, actual)
+        ks = ks_statistic(self.profile.expected, actual)
+        status = np.searchsorted(PSI_THRESHOLDS, psi, side='right')
+        features = {name: {'psi': round(float(p), 6), 'ks': round(float(k), 6), 'status': DRIFT_STATUS[s]}
+                    for name, p, k, s in zip(self.profile.feature_names, psi, ks, status)}
+        self.last_report = {
+            'evaluated_at': time.time(),
+            'window_rows': rows,
+            'total_rows': self.total_rows,
+            'max_psi': round(float(psi.max()), 6),
+            'max_ks': round(float(ks.max()), 6),
+            'status': DRIFT_STATUS[int(status.max())],
+            'drifted': [name for name, s in zip(self.profile.feature_names, status) if s > 0],
+            'features': features
+        }
+        return self.last_report
+
+    def snapshot(self):
+        """监控状态摘要（不含逐特征结果）"""
+        report = self.last_report or {}
+        return {
+            'total_rows': self.total_rows,
+            'window_rows': self._window_rows,
+            **{key: report[key] for key in ('evaluated_at', 'status', 'max_psi', 'max_ks', 'drifted')
+               if key in report}
+        }
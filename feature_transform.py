@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+特征变换（训练、批量预测、单患者预测和紧凑推理引擎共用，仅依赖 NumPy）
+原始8个特征 -> 原始特征 + 医学交互特征，直接写入预先分配的 float32 矩阵：
+按行块逐块读取原始数据，每块只转换一次类型，派生列用 ufunc 的 out 参数原地计算，
+不创建中间 DataFrame；1行和1千万行走同一段代码。
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+# 原始输入特征（与清洗后数据集的列顺序一致）
+RAW_FEATURES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+                'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age']
+
+# 基于医学领域知识的交互特征
+# BMI_Age: BMI-年龄交互（年龄大+肥胖增加风险）
+# Glucose_BMI: 血糖-BMI交互（高血糖+肥胖协同效应）
+# Insulin_Glucose_Ratio: 胰岛素抵抗指数（HOMA-IR近似）
+INTERACTION_FEATURES = ['BMI_Age', 'Glucose_BMI', 'Insulin_Glucose_Ratio']
+
+# 模型输入特征（训练时的列顺序）
+MODEL_FEATURES = RAW_FEATURES + INTERACTION_FEATURES
+
+# 每块处理的行数（块内临时数组保持在CPU缓存附近）
+FEATURE_CHUNK_ROWS = 65536
+
+_RAW_INDEX = {name: i for i, name in enumerate(RAW_FEATURES)}
+
+
+class FeatureTransformer:
+    """
+    原始特征 -> 模型输入特征矩阵
+    feature_names: 输出列（及顺序），须为 MODEL_FEATURES 的子集，默认全部
+    dtype: 输出矩阵类型（默认 float32）；交互特征在该精度下计算，训练和推理结果一致
+    """
+
+    def __init__(self, feature_names=None, dtype=np.float32, chunk_rows=FEATURE_CHUNK_ROWS):
+        self.feature_names = [str(name) for name in (MODEL_FEATURES if feature_names is None
+                                                     else feature_names)]
+        unknown = [name for name in self.feature_names if name not in MODEL_FEATURES]
+        if unknown:
+            raise ValueError(f"未知特征: {unknown}")
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+        # (输出列, 原始列) 与 (输出列, 交互特征名)
+        self._raw_columns = [(j, _RAW_INDEX[name]) for j, name in enumerate(self.feature_names)
+                             if name in _RAW_INDEX]
+        self._derived_columns = [(j, name) for j, name in enumerate(self.feature_names)
+                                 if name not in _RAW_INDEX]
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def _raw_block(self, X_raw, start, stop, block):
+        """把第 start:stop 行原始特征读入 block（形状 (行数, 8)，类型 self.dtype）"""
+        if isinstance(X_raw, np.ndarray):
+            block[:] = X_raw[start:stop, :len(RAW_FEATURES)]
+        else:
+            # DataFrame：逐列读取，不构造中间 DataFrame
+            for i, name in enumerate(RAW_FEATURES):
+                block[:, i] = X_raw[name].to_numpy()[start:stop]
+        return block
+
+    def _derive(self, block, out):
+        """在 block（原始特征）上计算交互特征，写入 out 的对应列"""
+        for j, name in self._derived_columns:
+            column = out[:, j]
+            if name == 'BMI_Age':
+                np.multiply(block[:, _RAW_INDEX['BMI']], block[:, _RAW_INDEX['Age']], out=column)
+            elif name == 'Glucose_BMI':
+                np.multiply(block[:, _RAW_INDEX['Glucose']], block[:, _RAW_INDEX['BMI']], out=column)
+            else:
+                np.add(block[:, _RAW_INDEX['Glucose']], self.dtype.type(1e-6), out=column)
+                np.divide(block[:, _RAW_INDEX['Insulin']], column, out=column)
+
+    def transform(self, X_raw, out=None):
+        """
+        X_raw: NumPy 数组（形状 (n, 8) 或 (8,)，列顺序同 RAW_FEATURES）、
+               包含原始特征列的 DataFrame，或单个患者的字典
+        out: 可选的预分配输出矩阵（形状 (n, 特征数)，类型 self.dtype）
+        返回: 模型输入特征矩阵
+        """
+        if isinstance(X_raw, Mapping):
+            X_raw = np.array([[float(X_raw[name]) for name in RAW_FEATURES]])
+        elif not hasattr(X_raw, 'columns'):
+            X_raw = np.asarray(X_raw)
+            if X_raw.ndim == 1:
+                X_raw = X_raw[None, :]
+
+        n_rows = len(X_raw)
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=self.dtype)
+        elif out.shape != (n_rows, self.n_features) or out.dtype != self.dtype:
+            raise ValueError(f"输出矩阵应为 {(n_rows, self.n_features)} {self.dtype}，"
+                             f"实际为 {out.shape} {out.dtype}")
+
+        block = np.empty((min(self.chunk_rows, n_rows), len(RAW_FEATURES)), dtype=self.dtype)
+        for start in range(0, n_rows, self.chunk_rows):
+            stop = min(start + self.chunk_rows, n_rows)
+            raw = self._raw_block(X_raw, start, stop, block[:stop - start])
+            chunk_out = out[start:stop]
+            for j, i in self._raw_columns:
+                chunk_out[:, j] = raw[:, i]
+            self._derive(raw, chunk_out)
+        return out
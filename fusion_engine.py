@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+"""
+融合模型紧凑推理引擎
+将随机森林、梯度提升的所有树展平为连续的节点数组，
+把逻辑回归与融合权重合并为一个打分内核，仅依赖 NumPy 完成批量推理
+（评分服务器无需安装 scikit-learn）；
+导出时同时预先计算每个叶子的路径贡献表，explain() 给出逐患者、逐特征的风险评分贡献
+批量评分的耗时与 树数×最大深度 成正比（单核约 15 ns/步/患者），
+默认集成约 2750 步、每患者约 45 微秒；延迟预算见 benchmarks/bench_fusion_engine.py
+"""
+
+import json
+import os
+
+import numpy as np
+
+# 原始输入特征与特征变换（与 DiabetesRiskPredictionSystem 共用）
+from feature_transform import RAW_FEATURES, FeatureTransformer
+from risk_scoring import RISK_THRESHOLDS, DECISION_THRESHOLD
+
+# 引擎文件格式版本
+ENGINE_FORMAT_VERSION = 1
+ENGINE_META = 'engine.json'
+
+# 每批处理的样本数（使 树数×样本数 的中间数组保持在CPU缓存内）
+ENGINE_CHUNK_SIZE = 256
+
+
+def _float32_thresholds(threshold):
+    """
+    将 float64 阈值转换为等价的 float32 阈值
+    对 float32 输入 x，x <= t 当且仅当 x <= 不超过 t 的最大 float32 数
+    """
+    t32 = threshold.astype(np.float32)
+    too_large = t32.astype(np.float64) > threshold
+    t32[too_large] = np.nextafter(t32[too_large], np.float32(-np.inf))
+    return t32
+
+
+def _leaf_contributions(feature, left, expected, roots, n_features):
+    """
+    每个叶子的路径贡献向量（Saabas）：从根到叶子每经过一次分裂，
+    子节点与父节点期望输出之差计入该分裂所用的特征。
+    贡献只取决于样本落入的叶子，导出时算好，解释时只需查表求和
+    返回: (节点 -> 叶子行号（内部节点为 -1）, 贡献表 (叶子数, 特征数))
+    """
+    n_nodes = len(feature)
+    is_leaf = left == np.arange(n_nodes)
+    node_contributions = np.zeros((n_nodes, n_features))
+    # 从各树根节点开始逐层向下传播
+    level = np.asarray(roots, dtype=np.int64)
+    while len(level):
+        inner = level[~is_leaf[level]]
+        # 层序编号中右子节点 = 左子节点 + 1
+        children = np.concatenate([left[inner], left[inner] + 1])
+        parents = np.concatenate([inner, inner])
+        node_contributions[children] = node_contributions[parents]
+        node_contributions[children, feature[parents]] += expected[children] - expected[parents]
+        level = children
+
+    leaves = np.flatnonzero(is_leaf)
+    leaf_index = np.full(n_nodes, -1, dtype=np.int32)
+    leaf_index[leaves] = np.arange(len(leaves))
+    return leaf_index, node_contributions[leaves]
+
+
+def _flatten_trees(trees, leaf_values):
+    """
+    将多棵树展平为连续节点数组
+    trees: sklearn Tree 对象列表
+    leaf_values: 与 trees 对应的每个节点输出值数组列表
+    节点按层序重新编号，使兄弟节点相邻（右子节点 = 左子节点 + 1）；
+    叶子节点的左子节点指向自身且阈值为 +inf，因此所有样本可以按最大深度统一迭代
+    同时保存各节点的期望输出和各叶子的路径贡献表（用于解释）
+    所有树拼接后同时逐层处理，循环次数只取决于最大深度
+    """
+    sizes = np.asarray([tree.node_count for tree in trees], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    # 拼接所有树的节点（子节点编号加上所在树的偏移，叶子为 -1）
+    children_left = np.concatenate([np.where(tree.children_left != -1, tree.children_left + offset, -1)
+                                    for tree, offset in zip(trees, offsets)])
+    children_right = np.concatenate([np.where(tree.children_right != -1, tree.children_right + offset, -1)
+                                     for tree, offset in zip(trees, offsets)])
+    feature = np.concatenate([tree.feature for tree in trees])
+    threshold = np.concatenate([tree.threshold for tree in trees])
+    weight = np.concatenate([tree.weighted_n_node_samples for tree in trees])
+    value = np.concatenate([np.asarray(v, dtype=np.float64) for v in leaf_values])
+
+    # 所有树同时按层遍历：每层内按父节点顺序排列，左子节点在前
+    levels = [offsets]
+    while True:
+        level = levels[-1]
+        inner = level[children_left[level] != -1]
+        if not len(inner):
+            break
+        levels.append(np.column_stack([children_left[inner], children_right[inner]]).ravel())
+
+    # 每个节点的期望输出：叶子为其输出值，内部节点为两个子节点按训练样本权重的加权平均
+    # （梯度提升更新叶子值后内部节点的 value 不再一致，因此自底向上逐层重新计算）
+    expected = value.copy()
+    for level in reversed(levels[:-1]):
+        inner = level[children_left[level] != -1]
+        left, right = children_left[inner], children_right[inner]
+        expected[inner] = ((weight[left] * expected[left] + weight[right] * expected[right])
+                           / (weight[left] + weight[right]))
+
+    # 按树分组（稳定排序保留树内的层序），得到新编号
+    order = np.concatenate(levels)
+    tree_of = np.repeat(np.arange(len(trees)), sizes)
+    order = order[np.argsort(tree_of[order], kind='stable')]
+    new_id = np.empty(len(order), dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+
+    is_leaf = children_left[order] == -1
+    arrays = {
+        # 每棵树的节点数不变，根节点仍在各树的起始位置
+        'roots': offsets.astype(np.int32),
+        'feature': np.where(is_leaf, 0, feature[order]).astype(np.int32),
+        'threshold': _float32_thresholds(np.where(is_leaf, np.inf, threshold[order])),
+        'left': np.where(is_leaf, np.arange(len(order)),
+                         new_id[np.where(is_leaf, 0, children_left[order])]).astype(np.int32),
+        'value': value[order],
+        'expected': expected[order],
+        'depth': np.asarray(len(levels) - 1, dtype=np.int64)
+    }
+    arrays['leaf_index'], arrays['leaf_contributions'] = _leaf_contributions(
+        arrays['feature'], arrays['left'], arrays['expected'], arrays['roots'], trees[0].n_features)
+    return arrays
+
+
+def _export_forest(model):
+    """导出随机森林：叶子值为阳性类别比例"""
+    trees = [est.tree_ for est in model.estimators_]
+    values = []
+    for tree in trees:
+        counts = tree.value[:, 0, :]
+        values.append(counts[:, 1] / counts.sum(axis=1))
+    return _flatten_trees(trees, values)
+
+
+def _export_boosting(model):
+    """导出梯度提升：叶子值已乘学习率，初始值折算为偏置"""
+    if model.loss not in ('log_loss', 'deviance', 'exponential'):
+        raise ValueError(f"不支持的梯度提升损失函数: {model.loss}")
+
+    trees = [est.tree_ for est in model.estimators_[:, 0]]
+    values = [tree.value[:, 0, 0] * model.learning_rate for tree in trees]
+    arrays = _flatten_trees(trees, values)
+
+    # 初始预测值 = 决策函数 - 所有树的输出之和（在任意样本上都相同）；
+    # 全零样本沿展平后的树同时下降，不逐棵调用 sklearn
+    node = arrays['roots'].astype(np.int64)
+    for _ in range(int(arrays['depth'])):
+        node = arrays['left'][node] + (arrays['threshold'][node] < 0)
+    x0 = np.zeros((1, model.n_features_in_))
+    arrays['bias'] = np.asarray(model.decision_function(x0)[0] - arrays['value'][node].sum(), dtype=np.float64)
+    # 指数损失的概率为 sigmoid(2f)
+    arrays['scale'] = np.asarray(2.0 if model.loss == 'exponential' else 1.0)
+    return arrays
+
+
+def _export_linear(model, background):
+    """导出逻辑回归：系数、截距，以及解释时作为基准的训练集特征均值"""
+    return {
+        'coef': np.asarray(model.coef_[0], dtype=np.float64),
+        'bias': np.asarray(model.intercept_[0], dtype=np.float64),
+        'background': np.asarray(background, dtype=np.float64)
+    }
+
+
+def export_fusion_engine(system, tree_exports=None):
+    """
+    从已训练的 DiabetesRiskPredictionSystem 导出紧凑推理引擎
+    仅支持 'weighted' 融合方式
+    tree_exports: 树模型导出缓存（模型名 -> 展平数组），已有的条目直接复用，缺少的导出后写入；
+                  调用方负责在树模型变化后清空
+    """
+    arrays = {
+        'scaler_mean': np.asarray(system.scaler.mean_, dtype=np.float64),
+        'scaler_scale': np.asarray(system.scaler.scale_, dtype=np.float64)
+    }
+    total_weight = sum(system.fusion_weights.values())
+    components = []
+    # 背景分布（训练集在标准化空间中的均值，标准化后接近 0）
+    X_train = getattr(system, 'X_train', None)
+    if X_train is not None:
+        background = np.asarray(X_train).mean(axis=0, dtype=np.float64)
+    else:
+        background = np.zeros(len(system.feature_names))
+
+    for name, model in system.models.items():
+        kind_name = type(model).__name__
+        if tree_exports is not None and name in tree_exports:
+            kind, exported = tree_exports[name]
+        elif kind_name == 'RandomForestClassifier':
+            kind, exported = 'forest', _export_forest(model)
+        elif kind_name == 'GradientBoostingClassifier':
+            kind, exported = 'boosting', _export_boosting(model)
+        elif hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+            kind, exported = 'linear', _export_linear(model, background)
+        else:
+            raise ValueError(f"无法导出的模型类型: {name} ({kind_name})")
+        if tree_exports is not None and kind != 'linear' and name not in tree_exports:
+            tree_exports[name] = (kind, exported)
+
+        for field, array in exported.items():
+            arrays[f'{name}.{field}'] = array
+        components.append({
+            'name': name,
+            'kind': kind,
+            # 融合权重预先归一化
+            'weight': float(system.fusion_weights.get(name, 1.0)) / total_weight
+        })
+
+    meta = {
+        'format_version': ENGINE_FORMAT_VERSION,
+        'feature_names': [str(name) for name in system.feature_names],
+        'components': components,
+        'calibration': None,
+        # 工作点：决策阈值与风险等级分界
+        'decision_threshold': float(getattr(system, 'decision_threshold', DECISION_THRESHOLD)),
+        'risk_thresholds': [float(t) for t in getattr(system, 'risk_thresholds', RISK_THRESHOLDS)]
+    }
+    # 概率校准查找表（融合评分 -> 校准概率）
+    calibrator = getattr(system, 'calibrator', None)
+    if calibrator is not None:
+        arrays['calibration.x'] = calibrator.x
+        arrays['calibration.y'] = calibrator.y
+        meta['calibration'] = calibrator.method
+    # 训练分布概况（评分服务的输入漂移监控以此为基准）
+    drift_profile = getattr(system, 'drift_profile', None)
+    if drift_profile is not None:
+        meta['drift_profile'] = drift_profile.to_dict()
+    return FusionEngine(arrays, meta)
+
+
+class FusionEngine:
+    """
+    紧凑融合推理引擎（仅依赖 NumPy）
+    arrays: 名称 -> 数组；meta: 特征名、组件列表（名称、类型、归一化权重）
+    """
+
+    def __init__(self, arrays, meta):
+        if meta.get('format_version') != ENGINE_FORMAT_VERSION:
+            raise ValueError(f"不支持的引擎版本: {meta.get('format_version')}")
+        self.arrays = arrays
+        self.meta = meta
+        self.feature_names = meta['feature_names']
+        self.components = meta['components']
+        self.transformer = FeatureTransformer(self.feature_names)
+
+    # ==================== 持久化 ====================
+
+    def save(self, path):
+        """保存为目录：engine.json + 每个数组一个 .npy 文件"""
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), np.asarray(array))
+        with open(os.path.join(path, ENGINE_META), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        加载引擎
+        mmap_mode='r' 时节点数组以只读内存映射打开，多个评分进程共享同一份物理页
+        """
+        with open(os.path.join(path, ENGINE_META), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {}
+        for filename in os.listdir(path):
+            if filename.endswith('.npy'):
+                array = np.load(os.path.join(path, filename), mmap_mode=mmap_mode)
+                # 转为普通 ndarray 视图（不复制），避免 memmap 子类在每次运算中的额外开销
+                arrays[filename[:-4]] = np.asarray(array) if array.ndim else array[()]
+        return cls(arrays, meta)
+
+    # ==================== 推理 ====================
+
+    def transform(self, X_raw):
+        """原始特征 -> 特征工程 -> 标准化（与 StandardScaler 对 float32 输入的原地运算一致）"""
+        X = self.transformer.transform(X_raw)
+        # sklearn 先把均值和标准差转换为输入的类型，再原地运算
+        X -= self.arrays['scaler_mean'].astype(X.dtype)
+        X /= self.arrays['scaler_scale'].astype(X.dtype)
+        return X
+
+    def _tree_outputs(self, name, X32):
+        """所有树同时逐层下降，返回每棵树的叶子值，形状 (树数, 样本数)"""
+        return self.arrays[f'{name}.value'][self._leaf_nodes(name, X32)]
+
+    def _leaf_nodes(self, name, X32):
+        """所有树同时逐层下降，返回每棵树中样本落入的叶子节点，形状 (树数, 样本数)"""
+        a = self.arrays
+        feature, threshold = a[f'{name}.feature'], a[f'{name}.threshold']
+        left = a[f'{name}.left']
+        n_samples, n_features = X32.shape
+        x_flat = X32.ravel()
+        row_offset = (np.arange(n_samples, dtype=np.int32) * n_features)[None, :]
+
+        # 预分配缓冲区，循环内全部原地计算
+        node = np.repeat(a[f'{name}.roots'][:, None], n_samples, axis=1)
+        index = np.empty_like(node)
+        x_value = np.empty(node.shape, dtype=np.float32)
+        t_value = np.empty(node.shape, dtype=np.float32)
+        go_right = np.empty(node.shape, dtype=bool)
+        for _ in range(int(a[f'{name}.depth'])):
+            np.take(feature, node, out=index)
+            index += row_offset
+            np.take(x_flat, index, out=x_value)
+            np.take(threshold, node, out=t_value)
+            np.greater(x_value, t_value, out=go_right)
+            np.take(left, node, out=node)
+            node += go_right
+        return node
+
+    def _tree_contributions(self, name, X32):
+        """
+        树模型的路径贡献：找到样本在每棵树中的叶子，查叶子贡献表并对所有树求和
+        返回: (所有树根节点期望之和, 贡献矩阵 (样本数, 特征数))
+              每行 根期望之和 + 贡献之和 = 所有树输出之和
+        """
+        a = self.arrays
+        leaves = a[f'{name}.leaf_index'][self._leaf_nodes(name, X32)]
+        contributions = a[f'{name}.leaf_contributions'][leaves].sum(axis=0)
+        return a[f'{name}.expected'][a[f'{name}.roots']].sum(), contributions
+
+    def _component_contributions(self, X):
+        """
+        各组件的贡献按融合权重混合
+        逻辑回归和梯度提升的贡献在对数几率空间中计算，再按 (概率 - 基准概率) / (对数几率 - 基准对数几率)
+        等比例换算到概率空间，保证每个组件 基准 + 贡献之和 = 该组件的概率
+        返回: (融合基准值, 融合贡献矩阵, 融合评分（未校准）)
+        """
+        a = self.arrays
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        n_samples = X.shape[0]
+        fusion_base, fusion_prob = 0.0, np.zeros(n_samples)
+        fusion_contributions = np.zeros(X.shape)
+        for component in self.components:
+            name, kind, weight = component['name'], component['kind'], component['weight']
+            if kind == 'forest':
+                base, contributions = self._tree_contributions(name, X32)
+                n_trees = len(a[f'{name}.roots'])
+                base, contributions = base / n_trees, contributions / n_trees
+                prob = base + contributions.sum(axis=1)
+            else:
+                if kind == 'boosting':
+                    base, contributions = self._tree_contributions(name, X32)
+                    base, scale = base + a[f'{name}.bias'], a[f'{name}.scale']
+                else:
+                    background, coef = a[f'{name}.background'], a[f'{name}.coef']
+                    contributions = (X - background) * coef
+                    base, scale = background @ coef + a[f'{name}.bias'], 1.0
+                raw = base + contributions.sum(axis=1)
+                prob = 1.0 / (1.0 + np.exp(-scale * raw))
+                base_prob = 1.0 / (1.0 + np.exp(-scale * base))
+                # 对数几率与基准相同时取 sigmoid 在基准处的导数
+                ratio = np.divide(prob - base_prob, raw - base,
+                                  out=np.full(n_samples, scale * base_prob * (1.0 - base_prob)),
+                                  where=np.abs(raw - base) > 1e-12)
+                base, contributions = base_prob, contributions * ratio[:, None]
+            fusion_base += weight * base
+            fusion_prob += weight * prob
+            fusion_contributions += weight * contributions
+        return fusion_base, fusion_contributions, fusion_prob
+
+    def explain_scaled(self, X):
+        """
+        对已标准化的特征矩阵计算每个样本、每个特征对融合风险评分的贡献
+        返回: (基准评分, 贡献矩阵 (样本数, 特征数), 融合风险评分)
+              每行 基准评分 + 贡献之和 = 融合风险评分（与 predict_proba_scaled 一致）；
+              基准评分为训练集背景分布上的期望评分
+        """
+        required = [f"{c['name']}.background" if c['kind'] == 'linear' else f"{c['name']}.leaf_contributions"
+                    for c in self.components]
+        if any(name not in self.arrays for name in required):
+            raise ValueError("该引擎导出时不包含解释所需的数据，请重新导出")
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        fusion_prob = np.empty(X.shape[0])
+        contributions = np.empty(X.shape)
+        base = 0.0
+        for start in range(0, X.shape[0], ENGINE_CHUNK_SIZE):
+            stop = start + ENGINE_CHUNK_SIZE
+            base, contributions[start:stop], fusion_prob[start:stop] = self._component_contributions(X[start:stop])
+
+        if self.meta.get('calibration'):
+            # 校准映射单调，贡献按 (校准后评分 - 校准后基准) / (评分 - 基准) 等比例缩放
+            x, y = self.arrays['calibration.x'], self.arrays['calibration.y']
+            calibrated, calibrated_base = np.interp(fusion_prob, x, y), float(np.interp(base, x, y))
+            slope = (np.interp(base + 1e-6, x, y) - np.interp(base - 1e-6, x, y)) / 2e-6
+            ratio = np.divide(calibrated - calibrated_base, fusion_prob - base,
+                              out=np.full(len(fusion_prob), slope),
+                              where=np.abs(fusion_prob - base) > 1e-12)
+            contributions *= ratio[:, None]
+            base, fusion_prob = calibrated_base, calibrated
+        return base, contributions, fusion_prob
+
+    def explain(self, X_raw):
+        """对原始8个特征计算融合风险评分的逐特征贡献（见 explain_scaled）"""
+        return self.explain_scaled(self.transform(X_raw))
+
+    def _component_scores(self, X):
+        """各组件的阳性概率"""
+        a = self.arrays
+        # 与 sklearn 树模型一致：按 float32 比较阈值
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        scores = {}
+        for component in self.components:
+            name, kind = component['name'], component['kind']
+            if kind == 'forest':
+                scores[name] = self._tree_outputs(name, X32).mean(axis=0)
+            elif kind == 'boosting':
+                raw = self._tree_outputs(name, X32).sum(axis=0) + a[f'{name}.bias']
+                scores[name] = 1.0 / (1.0 + np.exp(-a[f'{name}.scale'] * raw))
+            else:
+                raw = X @ a[f'{name}.coef'] + a[f'{name}.bias']
+                scores[name] = 1.0 / (1.0 + np.exp(-raw))
+        return scores
+
+    def predict_proba_scaled(self, X, return_components=False):
+        """
+        对已标准化的特征矩阵打分，返回融合风险评分（导出时系统已拟合概率校准则为校准后的评分）
+        return_components: True 时同时返回各组件的概率字典
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        fusion_prob = np.empty(X.shape[0])
+        components = {c['name']: np.empty(X.shape[0]) for c in self.components}
+        for start in range(0, X.shape[0], ENGINE_CHUNK_SIZE):
+            stop = start + ENGINE_CHUNK_SIZE
+            scores = self._component_scores(X[start:stop])
+            fusion_prob[start:stop] = sum(c['weight'] * scores[c['name']] for c in self.components)
+            for name, prob in scores.items():
+                components[name][start:stop] = prob
+
+        if self.meta.get('calibration'):
+            fusion_prob = np.interp(fusion_prob, self.arrays['calibration.x'], self.arrays['calibration.y'])
+
+        if return_components:
+            return fusion_prob, components
+        return fusion_prob
+
+    def predict_proba(self, X_raw):
+        """对原始8个特征打分，返回融合风险评分"""
+        return self.predict_proba_scaled(self.transform(X_raw))
+
+    @property
+    def decision_threshold(self):
+        return self.meta.get('decision_threshold', DECISION_THRESHOLD)
+
+    @property
+    def risk_thresholds(self):
+        return self.meta.get('risk_thresholds', RISK_THRESHOLDS)
+
+    def predict(self, X_raw, threshold=None):
+        """返回 (预测标签, 融合风险评分)；threshold 默认为导出时的决策阈值"""
+        if threshold is None:
+            threshold = self.decision_threshold
+        fusion_prob = self.predict_proba(X_raw)
+        return (fusion_prob >= threshold).astype(int), fusion_prob
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+基础模型超参数搜索（逐次减半，successive halving）
+每个模型从搜索空间中随机抽取一批候选参数，先用少量树（资源）做交叉验证，
+每一轮只保留得分最高的 1/eta 继续用 eta 倍的树评估，直到最大树数量；
+同一轮所有模型的全部试验提交到一个进程池中并行完成。
+每个试验的结果按 (模型, 完整参数, 资源, 数据指纹, 交叉验证设置) 的哈希写入磁盘缓存，
+重复运行时跳过已完成的试验。按需导入 scikit-learn。
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from operating_point import classification_metrics
+
+# 搜索空间：resource 为 (逐轮增加的资源参数, 最大值)，params 为待搜索的参数取值
+# 不在此表中的模型（如逻辑回归）只以默认参数评估一次，用于给出交叉验证得分
+SEARCH_SPACES = {
+    'RandomForest': {
+        'resource': ('n_estimators', 400),
+        'params': {
+            'max_depth': [6, 8, 10, 14, None],
+            'min_samples_leaf': [1, 2, 4, 8],
+            'max_features': ['sqrt', 0.5, 1.0]
+        }
+    },
+    'GradientBoosting': {
+        'resource': ('n_estimators', 300),
+        'params': {
+            'learning_rate': [0.03, 0.05, 0.1, 0.2],
+            'max_depth': [2, 3, 4, 5],
+            'subsample': [0.7, 0.85, 1.0]
+        }
+    }
+}
+
+# 选择配置时比较的交叉验证指标
+SEARCH_SCORINGS = ('roc_auc', 'f1')
+
+# 不影响模型结果、不计入缓存键的参数
+_IGNORED_PARAMS = {'n_jobs', 'verbose', 'warm_start'}
+
+# 进程池工作进程中共享的训练数据（每个进程只传输一次）
+_WORKER_DATA = {}
+
+
+def _init_search_worker(X, y):
+    """进程池初始化：缓存训练数据"""
+    _WORKER_DATA['X'] = X
+    _WORKER_DATA['y'] = y
+
+
+def _evaluate_trial(estimator, n_splits, random_state):
+    """
+    交叉验证一个配置（进程池任务）
+    返回: {'roc_auc', 'f1', 'fit_time'}，F1 与融合权重一致按 概率 > 0.5 判为阳性
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import StratifiedKFold
+
+    X, y = _WORKER_DATA['X'], _WORKER_DATA['y']
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    aucs, f1s = [], []
+    start = time.perf_counter()
+    for train_idx, val_idx in skf.split(X, y):
+        model = clone(estimator).fit(X[train_idx], y[train_idx])
+        prob = model.predict_proba(X[val_idx])[:, 1]
+        aucs.append(roc_auc_score(y[val_idx], prob))
+        f1s.append(classification_metrics(y[val_idx], prob > 0.5)[1]['f1'])
+    return {'roc_auc': float(np.mean(aucs)), 'f1': float(np.mean(f1s)),
+            'fit_time': time.perf_counter() - start}
+
+
+class TrialCache:
+    """
+    试验结果的磁盘缓存（每个试验一个 JSON 文件）
+    cache_dir 为 None 时不缓存
+    """
+
+    def __init__(self, cache_dir, fingerprint, n_splits, random_state):
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.n_splits = n_splits
+        self.random_state = random_state
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, name, estimator):
+        """缓存键：模型名、估计器类型、完整参数、数据指纹和交叉验证设置"""
+        params = {param: value for param, value in estimator.get_params(deep=False).items()
+                  if param not in _IGNORED_PARAMS}
+        content = repr((name, type(estimator).__name__, sorted(params.items(), key=lambda item: item[0]),
+                        self.fingerprint, self.n_splits, self.random_state))
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+        with open(self._path(key), encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, key, record):
+        if not self.cache_dir:
+            return
+        # 先写临时文件再替换，中断时不会留下不完整的结果
+        path = self._path(key)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+
+def _rank_key(record, scoring):
+    """排序键：得分从高到低，得分相同时按候选的抽取序号"""
+    return -record[scoring], record['candidate']
+
+
+def sample_candidates(space, n_candidates, rng):
+    """从参数网格中无放回随机抽取 n_candidates 个配置"""
+    names = list(space)
+    grid = list(itertools.product(*(space[name] for name in names)))
+    chosen = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    return [dict(zip(names, grid[i])) for i in sorted(chosen)]
+
+
+def halving_schedule(max_resource, min_resource, eta):
+    """各轮的资源量（几何递增，最后一轮为 max_resource）"""
+    n_rungs = 1 + max(0, int(math.floor(math.log(max_resource / min_resource, eta) + 1e-9)))
+    return [max(1, int(round(max_resource / eta ** (n_rungs - 1 - rung)))) for rung in range(n_rungs)]
+
+
+def successive_halving(estimators, X, y, fingerprint, spaces=None, n_candidates=27, eta=3,
+                       min_resource=25, n_splits=3, scoring='roc_auc', cache_dir=None,
+                       n_jobs=None, random_state=42):
+    """
+    对多个基础模型同时做逐次减半搜索
+    estimators: 模型名 -> 未训练的基础模型（搜索参数在其默认参数上覆盖）
+    fingerprint: 训练数据指纹（缓存键的一部分）
+    spaces: 搜索空间（默认 SEARCH_SPACES）；n_candidates: 每个模型第一轮的候选数
+    eta: 每轮保留 1/eta 的候选、资源乘以 eta；min_resource: 第一轮的资源量
+    scoring: 'roc_auc' 或 'f1'（交叉验证均值，越大越好）
+    cache_dir: 试验结果缓存目录（None 不缓存）；n_jobs: 并行进程数（默认全部核心）
+    返回: 模型名 -> {'params'（覆盖默认值的参数）, 'roc_auc', 'f1', 'trials'}
+    """
+    from sklearn.base import clone
+
+    if scoring not in SEARCH_SCORINGS:
+        raise ValueError(f"未知的评分指标: {scoring}（可选 {', '.join(SEARCH_SCORINGS)}）")
+    spaces = SEARCH_SPACES if spaces is None else spaces
+    cache = TrialCache(cache_dir, fingerprint, n_splits, random_state)
+    rng = np.random.default_rng(random_state)
+
+    # 每个模型的候选配置和各轮资源；不搜索的模型只有一个默认配置、一轮
+    searches = {}
+    for name in estimators:
+        space = spaces.get(name)
+        if space is None:
+            searches[name] = {'candidates': [(0, {})], 'resource': None, 'schedule': [None]}
+        else:
+            resource, max_resource = space['resource']
+            searches[name] = {
+                # (抽取序号, 参数)：得分相同时按抽取序号取舍，结果与缓存命中情况无关
+                'candidates': list(enumerate(sample_candidates(space['params'], n_candidates, rng))),
+                'resource': resource,
+                'schedule': halving_schedule(max_resource, min(min_resource, max_resource), eta)
+            }
+    trials = {name: [] for name in estimators}
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_search_worker,
+                             initargs=(X, np.asarray(y))) as executor:
+        for rung in range(max(len(search['schedule']) for search in searches.values())):
+            pending, finished = [], []
+            for name, search in searches.items():
+                if rung >= len(search['schedule']):
+                    continue
+                for candidate, params in search['candidates']:
+                    params = dict(params)
+                    if search['resource'] is not None:
+                        params[search['resource']] = search['schedule'][rung]
+                    estimator = clone(estimators[name]).set_params(**params)
+                    if 'n_jobs' in estimator.get_params(deep=False):
+                        # 并行在试验之间进行，单个试验只用1个核心
+                        estimator.set_params(n_jobs=1)
+                    key = cache.key(name, estimator)
+                    record = {'model': name, 'rung': rung, 'candidate': candidate, 'params': params}
+                    cached = cache.get(key)
+                    if cached is not None:
+                        finished.append((name, key, {**record, **cached, 'cached': True}))
+                    else:
+                        future = executor.submit(_evaluate_trial, estimator, n_splits, random_state)
+                        pending.append((name, key, record, future))
+
+            for name, key, record, future in pending:
+                scores = future.result()
+                cache.put(key, scores)
+                finished.append((name, key, {**record, **scores, 'cached': False}))
+
+            for name, _, record in finished:
+                trials[name].append(record)
+            n_cached = sum(record['cached'] for _, _, record in finished)
+            print(f"  第 {rung + 1} 轮: {len(finished)} 个试验（缓存命中 {n_cached} 个）")
+
+            # 每个模型按得分保留前 1/eta 进入下一轮（得分相同时保留先抽到的配置）
+            for name, search in searches.items():
+                if rung + 1 >= len(search['schedule']):
+                    continue
+                rung_trials = [record for record in trials[name] if record['rung'] == rung]
+                ranked = sorted(rung_trials, key=lambda record: _rank_key(record, scoring))
+                n_keep = max(1, math.ceil(len(ranked) / eta))
+                resource = search['resource']
+                search['candidates'] = [(record['candidate'],
+                                         {param: value for param, value in record['params'].items()
+                                          if param != resource})
+                                        for record in ranked[:n_keep]]
+
+    results = {}
+    for name, search in searches.items():
+        last_rung = len(search['schedule']) - 1
+        final = [record for record in trials[name] if record['rung'] == last_rung]
+        best = min(final, key=lambda record: _rank_key(record, scoring))
+        results[name] = {'params': best['params'], 'roc_auc': best['roc_auc'], 'f1': best['f1'],
+                         'trials': trials[name]}
+    return results
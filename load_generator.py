@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+风险评分服务压测工具
+使用多个 keep-alive 连接并发发送 POST /predict 请求，统计客户端延迟和吞吐量
+
+用法:
+    python load_generator.py --port 8080 --requests 10000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+
+def random_patient(rng):
+    """生成一个符合 Pima 数据分布范围的随机患者"""
+    return {
+        'Pregnancies': rng.randint(0, 12),
+        'Glucose': round(rng.gauss(121, 30), 1),
+        'BloodPressure': round(rng.gauss(72, 12), 1),
+        'SkinThickness': round(rng.gauss(29, 9), 1),
+        'Insulin': round(abs(rng.gauss(140, 80)), 1),
+        'BMI': round(rng.gauss(32, 7), 1),
+        'DiabetesPedigreeFunction': round(abs(rng.gauss(0.47, 0.33)), 3),
+        'Age': rng.randint(21, 80)
+    }
+
+
+async def _request(reader, writer, host, method, path, payload=None):
+    """在已有连接上发送一个请求并读取完整响应"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                  ).encode('latin-1') + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def _worker(host, port, n_requests, latencies, errors, seed):
+    """单个连接顺序发送 n_requests 个请求"""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, 'POST', '/predict', random_patient(rng))
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host='127.0.0.1', port=8080, total_requests=10000, concurrency=64):
+    """执行压测并返回统计结果"""
+    latencies, errors = [], []
+    per_worker = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_worker(host, port, n, latencies, errors, seed)
+                           for seed, n in enumerate(per_worker) if n])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_metrics = await _request(reader, writer, host, 'GET', '/metrics')
+    writer.close()
+
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'client_p50_ms': float(np.percentile(latencies_ms, 50)),
+        'client_p99_ms': float(np.percentile(latencies_ms, 99)),
+        'server': server_metrics
+    }
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='风险评分服务压测')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=10000, help='总请求数')
+    parser.add_argument('--concurrency', type=int, default=64, help='并发连接数')
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency))
+
+    print("="*60)
+    print("压测结果")
+    print("="*60)
+    print(f"请求数: {stats['requests']}（失败 {stats['errors']}）")
+    print(f"耗时: {stats['elapsed_s']:.2f} 秒，吞吐量: {stats['throughput_rps']:.0f} 请求/秒")
+    print(f"客户端延迟 p50: {stats['client_p50_ms']:.2f} ms，p99: {stats['client_p99_ms']:.2f} ms")
+    print(f"服务端统计: {json.dumps(stats['server'], ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+决策阈值扫描与工作点选择（仅依赖 NumPy）
+融合评分只排序一次，用累计和得到每个候选阈值（每个不同的评分值）下的
+TP/FP/FN/TN，再一次性算出精确率、召回率、F1 和误诊代价；
+据此选择决策阈值（目标召回率、代价比或最大 F1）并拟合风险等级分界。
+判定规则与 fusion_predict 一致：评分 >= 阈值判为阳性。
+"""
+
+import numpy as np
+
+
+def threshold_sweep(y_true, scores):
+    """
+    计算所有候选阈值下的分类指标
+    返回: 字典，各项为按阈值从高到低排列的数组
+          thresholds 的第一个元素为 inf（全部判为阴性）；
+          没有样本判为阳性时精确率记为 1（没有误报）；没有阳性样本时召回率记为 0
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        raise ValueError("没有样本，无法扫描决策阈值")
+    order = np.argsort(-scores, kind='stable')
+    sorted_scores = scores[order]
+
+    # 每组相同评分的最后一个位置：阈值取该评分时，此位置及之前的样本都判为阳性
+    last = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(scores) - 1]
+    tp = np.r_[0, np.cumsum(y_true[order])[last]]
+    fp = np.r_[0, last + 1 - tp[1:]]
+
+    n_positive = int(y_true.sum())
+    n_negative = len(y_true) - n_positive
+    fn = n_positive - tp
+    tn = n_negative - fp
+
+    predicted = tp + fp
+    precision = np.divide(tp, predicted, out=np.ones(len(tp)), where=predicted > 0)
+    recall = tp / n_positive if n_positive else np.zeros(len(tp))
+    f1 = np.divide(2 * tp, 2 * tp + fp + fn, out=np.zeros(len(tp)), where=(2 * tp + fp + fn) > 0)
+
+    return {
+        'thresholds': np.r_[np.inf, sorted_scores[last]],
+        'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'accuracy': (tp + tn) / len(y_true)
+    }
+
+
+def _finite_threshold(sweep, index):
+    """下标对应的阈值；第一个候选（inf，全部判为阴性）换成刚好高于最高评分的有限阈值"""
+    if index == 0:
+        return float(np.nextafter(sweep['thresholds'][1], np.inf))
+    return float(sweep['thresholds'][index])
+
+
+def select_threshold(sweep, target_recall=None, cost_ratio=None):
+    """
+    选择决策阈值
+    target_recall: 召回率不低于该值的最高阈值（误报最少）
+    cost_ratio: 漏诊与误报的代价比，最小化 cost_ratio×FN + FP
+    两者都未给出时取 F1 最大的阈值
+    没有阳性样本时（召回率和 F1 均为 0）三种准则都选择全部判为阴性，
+    阈值取刚好高于最高评分的有限值（而不是 inf）
+    返回: (阈值, 在 sweep 中的下标)
+    """
+    if target_recall is not None:
+        # 召回率随阈值降低单调不减，第一个满足的位置即最高阈值
+        index = int(np.argmax(sweep['recall'] >= target_recall))
+    elif cost_ratio is not None:
+        index = int(np.argmin(cost_ratio * sweep['fn'] + sweep['fp']))
+    else:
+        index = int(np.argmax(sweep['f1']))
+    return _finite_threshold(sweep, index), index
+
+
+def fit_risk_bands(sweep, low_recall=0.95, high_precision=0.7):
+    """
+    按数据拟合风险等级分界 [低/中, 中/高]
+    低/中分界: 召回率不低于 low_recall 的最高阈值（低风险组漏掉的阳性不超过 1-low_recall）
+    中/高分界: 精确率不低于 high_precision 的最低阈值（高风险组中阳性比例至少为 high_precision）
+    """
+    low, _ = select_threshold(sweep, target_recall=low_recall)
+    # 第一个元素（全部判为阴性）精确率为 1，reached 不会为空；
+    # 只有它满足条件时分界放在最高评分之上，对应的风险组为空
+    reached = np.flatnonzero(sweep['precision'] >= high_precision)
+    high = _finite_threshold(sweep, int(reached[-1]))
+    return [low, max(low, high)]
+
+
+def classification_metrics(y_true, y_pred):
+    """
+    一次计数得到混淆矩阵和常用指标（代替逐个调用 accuracy_score/precision_score 等）
+    返回: (混淆矩阵 [[TN, FP], [FN, TP]], {'accuracy', 'precision', 'recall', 'f1'})
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_pred = np.asarray(y_pred).astype(np.int64)
+    cm = np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+    (tn, fp), (fn, tp) = cm
+    metrics = {
+        'accuracy': (tp + tn) / max(len(y_true), 1),
+        # 与 sklearn 一致：分母为 0 时记为 0
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+        'f1': 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+    }
+    return cm, {name: float(value) for name, value in metrics.items()}
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+流程分阶段遥测
+为每个处理步骤输出结构化事件（JSON 行）：阶段名、墙钟/CPU 耗时、处理行数、
+分配的内存字节数和模型名；可对指定阶段开启采样分析器定位热点。
+未启用时 traced 包装的函数只多一次标志判断，stage() 返回空操作对象。
+
+通过环境变量启用（无需修改代码）:
+    DIABETES_TELEMETRY=telemetry.jsonl     事件输出文件（'-' 表示标准错误）
+    DIABETES_TELEMETRY_ALLOC=1             使用 tracemalloc 统计内存分配（有额外开销）
+    DIABETES_PROFILE_STAGES=train_base_models,fusion_predict
+                                           对这些阶段开启采样分析器
+    DIABETES_PROFILE_INTERVAL_MS=5         采样间隔（毫秒）
+    DIABETES_PROFILE_DIR=profiles          保存折叠调用栈（可直接生成火焰图）
+
+也可以在代码中调用 configure(...)。
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# 采样分析器报告中保留的热点函数数量
+PROFILE_TOP_N = 20
+
+
+class _TelemetryState:
+    """全局遥测配置"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sink = None
+        self.track_allocations = False
+        self.profile_stages = frozenset()
+        self.profile_interval = 0.005
+        self.profile_dir = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+
+_state = _TelemetryState()
+
+
+def configure(sink=None, track_allocations=False, profile_stages=(), profile_interval_ms=5.0,
+              profile_dir=None):
+    """
+    配置遥测
+    sink: 输出文件路径、'-'（标准错误）、可调用对象（接收事件字典）、列表（追加事件）；
+          None 表示关闭遥测
+    track_allocations: 是否用 tracemalloc 统计每个阶段分配的内存
+    profile_stages: 开启采样分析器的阶段名
+    profile_dir: 保存折叠调用栈文件的目录
+    """
+    with _state.lock:
+        if isinstance(_state.sink, _FileSink):
+            _state.sink.close()
+        if isinstance(sink, str):
+            sink = _FileSink(sink)
+        _state.sink = sink
+        _state.track_allocations = bool(sink is not None and track_allocations)
+        _state.profile_stages = frozenset(profile_stages)
+        _state.profile_interval = profile_interval_ms / 1000
+        _state.profile_dir = profile_dir
+        _state.enabled = sink is not None
+    if _state.track_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def configure_from_env(environ=None):
+    """按环境变量配置遥测（模块导入时自动调用）"""
+    environ = os.environ if environ is None else environ
+    sink = environ.get('DIABETES_TELEMETRY') or None
+    stages = [s.strip() for s in environ.get('DIABETES_PROFILE_STAGES', '').split(',') if s.strip()]
+    configure(sink=sink,
+              track_allocations=environ.get('DIABETES_TELEMETRY_ALLOC', '') not in ('', '0'),
+              profile_stages=stages,
+              profile_interval_ms=float(environ.get('DIABETES_PROFILE_INTERVAL_MS', 5)),
+              profile_dir=environ.get('DIABETES_PROFILE_DIR') or None)
+
+
+def is_enabled():
+    return _state.enabled
+
+
+class _FileSink:
+    """JSON 行输出（多线程安全，逐行刷新）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = sys.stderr if path == '-' else open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stderr:
+            self._file.close()
+
+
+def _emit(event):
+    sink = _state.sink
+    if sink is None:
+        return
+    if isinstance(sink, list):
+        sink.append(event)
+    else:
+        sink(event)
+
+
+def _stage_stack():
+    stack = getattr(_state.local, 'stack', None)
+    if stack is None:
+        stack = _state.local.stack = []
+    return stack
+
+
+# ==================== 采样分析器 ====================
+
+class SamplingProfiler:
+    """
+    采样分析器：后台线程每隔 interval 秒读取目标线程的调用栈（sys._current_frames），
+    统计每个函数作为栈顶（自身）和出现在栈中（累计）的采样次数
+    """
+
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='telemetry-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, n=PROFILE_TOP_N):
+        """返回 (自身采样最多的函数, 累计采样最多的函数)，函数以 文件:函数名 表示"""
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            functions = [entry.rsplit(':', 1)[0] for entry in stack]
+            self_counts[functions[-1]] += count
+            for function in set(functions):
+                total_counts[function] += count
+        return self_counts.most_common(n), total_counts.most_common(n)
+
+    def collapsed_stacks(self):
+        """折叠调用栈格式（每行 "帧;帧;帧 次数"，flamegraph.pl / speedscope 可直接读取）"""
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+
+# ==================== 阶段 ====================
+
+class _NullStage:
+    """遥测关闭时的空操作阶段"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def annotate(self, **fields):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """一个被计时的阶段（上下文管理器）"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.profiler = None
+
+    def annotate(self, **fields):
+        """补充事件字段（如处理行数、模型名）"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = _stage_stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+
+        if _state.track_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            if len(stack) > 1:
+                stack[-2].peak_seen = max(stack[-2].peak_seen, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = current
+            self.peak_seen = current
+
+        if self.name in _state.profile_stages:
+            self.profiler = SamplingProfiler(interval=_state.profile_interval).start()
+
+        self.start_time = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        stack = _stage_stack()
+        stack.pop()
+
+        event = {
+            'event': 'stage',
+            'stage': self.name,
+            'parent': self.parent,
+            'start': self.start_time,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'rows': None,
+            'model': None,
+            'status': 'ok' if exc_type is None else 'error',
+            'pid': os.getpid()
+        }
+        if exc_type is not None:
+            event['error'] = f"{exc_type.__name__}: {exc_value}"
+
+        if _state.track_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(self.peak_seen, peak)
+            event['bytes_allocated'] = current - self.memory_start
+            event['peak_bytes'] = peak - self.memory_start
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+
+        event.update(self.fields)
+        _emit(event)
+
+        if self.profiler is not None:
+            self._emit_profile(event)
+        return False
+
+    def _emit_profile(self, stage_event):
+        self.profiler.stop()
+        top_self, top_total = self.profiler.top_functions()
+        profile_event = {
+            'event': 'profile',
+            'stage': self.name,
+            'start': stage_event['start'],
+            'samples': self.profiler.samples,
+            'interval_s': self.profiler.interval,
+            'top_self': top_self,
+            'top_cumulative': top_total,
+            'pid': os.getpid()
+        }
+        if _state.profile_dir:
+            os.makedirs(_state.profile_dir, exist_ok=True)
+            path = os.path.join(_state.profile_dir,
+                                f"{self.name}_{os.getpid()}_{int(stage_event['start'] * 1000)}.collapsed")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.profiler.collapsed_stacks())
+            profile_event['collapsed_stacks'] = path
+        _emit(profile_event)
+
+
+def stage(name, **fields):
+    """
+    计时一个代码块
+        with stage('train_model', model=name) as s:
+            ...
+            s.annotate(rows=len(X))
+    """
+    if not _state.enabled:
+        return _NULL_STAGE
+    return _Stage(name, fields)
+
+
+def annotate(**fields):
+    """为当前线程中最内层的阶段补充字段（遥测关闭或不在阶段内时不做任何事）"""
+    if not _state.enabled:
+        return
+    stack = _stage_stack()
+    if stack:
+        stack[-1].annotate(**fields)
+
+
+def traced(func=None, *, name=None):
+    """
+    装饰器：把函数调用作为一个阶段计时（阶段名默认为函数名）
+        @traced
+        def load_data(...): ...
+        @traced(name='preprocess')
+        def main(...): ...
+    """
+    if func is None:
+        return functools.partial(traced, name=name)
+    stage_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state.enabled:
+            return func(*args, **kwargs)
+        with _Stage(stage_name, {}):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+configure_from_env()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+可合并的分位数草图
+用固定容量的 (取值, 权重) 表近似一列数据的分布，支持流式更新、合并和持久化。
+不同取值个数不超过容量时结果是精确的（医学指标大多只有几百个不同取值），
+超过容量时相邻取值按等权重分桶合并，秩误差约为 1/capacity。
+"""
+
+import numpy as np
+
+# 默认容量（保留的 (取值, 权重) 对数量）
+DEFAULT_CAPACITY = 2048
+
+
+class QuantileSketch:
+    """可合并的分位数草图"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer_values = []
+        self._buffer_weights = []
+        self._buffer_size = 0
+
+    @property
+    def count(self):
+        """已纳入的样本总数"""
+        self._compress()
+        return float(self.weights.sum())
+
+    def update(self, values, weights=None):
+        """加入一批取值（NaN 会被忽略）"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if weights is None:
+            weights = np.ones(len(values))
+        else:
+            weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), values.shape)
+        keep = ~np.isnan(values)
+        values, weights = values[keep], weights[keep]
+        if len(values) == 0:
+            return self
+
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer_values.append(values)
+        self._buffer_weights.append(weights)
+        self._buffer_size += len(values)
+        if self._buffer_size > 4 * self.capacity:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """合并另一个草图"""
+        other._compress()
+        if len(other.values):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._buffer_values.append(other.values)
+            self._buffer_weights.append(other.weights)
+            self._buffer_size += len(other.values)
+            self._compress()
+        return self
+
+    def _compress(self):
+        """合并缓冲区并压缩到容量以内"""
+        if not self._buffer_values:
+            return
+        values = np.concatenate([self.values] + self._buffer_values)
+        weights = np.concatenate([self.weights] + self._buffer_weights)
+        self._buffer_values, self._buffer_weights, self._buffer_size = [], [], 0
+
+        # 相同取值合并（精确）
+        values, inverse = np.unique(values, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights)
+
+        # 不同取值过多时按累积权重等分成 capacity 个桶，每桶取加权均值
+        if len(values) > self.capacity:
+            cumulative = np.cumsum(weights)
+            bucket = ((cumulative - weights / 2) / cumulative[-1] * self.capacity).astype(np.int64)
+            bucket_weights = np.bincount(bucket, weights=weights)
+            bucket_values = np.bincount(bucket, weights=weights * values)
+            nonempty = bucket_weights > 0
+            weights = bucket_weights[nonempty]
+            values = bucket_values[nonempty] / weights
+
+        self.values, self.weights = values, weights
+
+    def quantile(self, q):
+        """
+        分位数（与 pandas 默认的线性插值方式一致）
+        q: 标量或数组，取值范围 [0, 1]
+        """
+        self._compress()
+        if len(self.values) == 0:
+            return np.nan if np.ndim(q) == 0 else np.full(np.shape(q), np.nan)
+
+        cumulative = np.cumsum(self.weights)
+        # 展开后的有序样本中第 h 个位置（从0开始）
+        q = np.asarray(q, dtype=np.float64)
+        h = (cumulative[-1] - 1) * q
+        lower = np.floor(h)
+        lower_value = self.values[np.searchsorted(cumulative, lower, side='right')]
+        upper_value = self.values[np.minimum(np.searchsorted(cumulative, lower + 1, side='right'),
+                                             len(self.values) - 1)]
+        result = lower_value + (h - lower) * (upper_value - lower_value)
+        # 两端使用精确的最小/最大值
+        result = np.where(h <= 0, self.min, np.where(h >= cumulative[-1] - 1, self.max, result))
+        return float(result) if np.ndim(result) == 0 else result
+
+    def median(self):
+        """中位数"""
+        return self.quantile(0.5)
+
+    def count_outside(self, lower, upper):
+        """取值小于 lower 或大于 upper 的样本数"""
+        self._compress()
+        outside = (self.values < lower) | (self.values > upper)
+        return float(self.weights[outside].sum())
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的字典"""
+        self._compress()
+        return {
+            'capacity': self.capacity,
+            'values': self.values.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min if np.isfinite(self.min) else None,
+            'max': self.max if np.isfinite(self.max) else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从 to_dict 的结果恢复"""
+        sketch = cls(data['capacity'])
+        sketch.values = np.asarray(data['values'], dtype=np.float64)
+        sketch.weights = np.asarray(data['weights'], dtype=np.float64)
+        sketch.min = np.inf if data['min'] is None else data['min']
+        sketch.max = -np.inf if data['max'] is None else data['max']
+        return sketch
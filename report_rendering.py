@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+报告图表渲染
+每张图由一个模块级的绘图函数生成：只接收绘图所需的数据，使用面向对象的
+Figure + FigureCanvasAgg 接口（不经过 pyplot 全局状态），因此可以在进程池中并行渲染。
+matplotlib 只在渲染进程中导入，主进程导入本模块不会加载绘图库。
+
+渲染模式:
+    'now'   提交后立即在后台进程中渲染，不阻塞主流程
+    'defer' 先记录，调用 finish() 时再统一渲染（评分流程结束后）
+    'skip'  不生成图表
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 默认输出目录（相对当前工作目录，不存在时自动创建）
+DEFAULT_OUTPUT_DIR = 'output'
+
+# 图片分辨率
+FIGURE_DPI = 300
+
+PLOT_MODES = ('now', 'defer', 'skip')
+
+# 中文字体
+FONT_FAMILY = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
+
+
+def configure_fonts():
+    """设置中文字体（每个渲染进程启动时调用一次）"""
+    import matplotlib
+
+    matplotlib.rcParams['font.sans-serif'] = FONT_FAMILY
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
+
+def _new_figure(figsize):
+    """创建不依赖 pyplot 的图"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save_figure(fig, path):
+    fig.tight_layout()
+    fig.savefig(path, dpi=FIGURE_DPI, bbox_inches='tight')
+
+
+def _render_job(render_func, path, data):
+    """进程池任务：渲染一张图并返回路径"""
+    render_func(path, **data)
+    return path
+
+
+# ==================== 问题一 ====================
+
+def render_roc_curves(path, y_true, model_probabilities, fusion_probability):
+    """多模型ROC曲线对比；model_probabilities: 中文模型名 -> 预测概率"""
+    from sklearn.metrics import roc_curve, auc
+
+    fig = _new_figure((10, 8))
+    ax = fig.add_subplot()
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A']
+
+    # 绘制每个基础模型的ROC曲线
+    for idx, (cn_name, prob) in enumerate(model_probabilities.items()):
+        fpr, tpr, _ = roc_curve(y_true, prob)
+        ax.plot(fpr, tpr, color=colors[idx], lw=2.5, label=f'{cn_name} (AUC = {auc(fpr, tpr):.3f})')
+
+    # 绘制融合模型ROC曲线
+    fpr_fusion, tpr_fusion, _ = roc_curve(y_true, fusion_probability)
+    ax.plot(fpr_fusion, tpr_fusion, color=colors[3], lw=3,
+            label=f'融合模型 (AUC = {auc(fpr_fusion, tpr_fusion):.3f})', linestyle='--')
+
+    # 绘制对角线
+    ax.plot([0, 1], [0, 1], 'k--', lw=1.5, alpha=0.5, label='随机分类器')
+
+    ax.set_xlim([0.0, 1.0])
+    ax.set_ylim([0.0, 1.05])
+    ax.set_xlabel('假阳性率 (FPR)', fontsize=13, fontweight='bold')
+    ax.set_ylabel('真阳性率 (TPR)', fontsize=13, fontweight='bold')
+    ax.set_title('问题一：多模型ROC曲线对比分析', fontsize=15, fontweight='bold', pad=15)
+    ax.legend(loc="lower right", fontsize=11, framealpha=0.9)
+    ax.grid(True, alpha=0.3, linestyle='--')
+    _save_figure(fig, path)
+
+
+def render_model_performance(path, metrics_data):
+    """模型性能指标对比；metrics_data: {'模型': [...], '准确率': [...], ...}"""
+    fig = _new_figure((10, 6))
+    ax = fig.add_subplot()
+
+    x = np.arange(len(metrics_data['模型']))
+    width = 0.2
+    ax.bar(x - 1.5*width, metrics_data['准确率'], width, label='准确率', color='#FF6B6B', alpha=0.8)
+    ax.bar(x - 0.5*width, metrics_data['精确率'], width, label='精确率', color='#4ECDC4', alpha=0.8)
+    ax.bar(x + 0.5*width, metrics_data['召回率'], width, label='召回率', color='#45B7D1', alpha=0.8)
+    ax.bar(x + 1.5*width, metrics_data['F1分数'], width, label='F1分数', color='#FFA07A', alpha=0.8)
+
+    ax.set_xlabel('模型', fontsize=12, fontweight='bold')
+    ax.set_ylabel('分数', fontsize=12, fontweight='bold')
+    ax.set_title('问题一：各模型性能指标对比', fontsize=14, fontweight='bold', pad=15)
+    ax.set_xticks(x)
+    ax.set_xticklabels(metrics_data['模型'], rotation=15, ha='right')
+    ax.legend(fontsize=10, loc='upper right')
+    ax.set_ylim([0, 1.1])
+    ax.grid(axis='y', alpha=0.3)
+    _save_figure(fig, path)
+
+
+def render_feature_importance(path, labels, importances):
+    """特征重要性排名（已按重要性降序）"""
+    import matplotlib
+
+    fig = _new_figure((10, 7))
+    ax = fig.add_subplot()
+
+    colors = matplotlib.colormaps['RdYlGn'](np.linspace(0.3, 0.9, len(labels)))
+    ax.barh(range(len(labels)), importances, color=colors, alpha=0.8)
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels)
+    ax.set_xlabel('特征重要性', fontsize=13, fontweight='bold')
+    ax.set_title('问题一：Top 10 特征重要性排名', fontsize=14, fontweight='bold', pad=15)
+    ax.invert_yaxis()
+    ax.grid(axis='x', alpha=0.3)
+
+    # 添加数值标签
+    for i, v in enumerate(importances):
+        ax.text(v + 0.005, i, f'{v:.3f}', va='center', fontsize=10)
+    _save_figure(fig, path)
+
+
+# ==================== 问题二 ====================
+
+def render_risk_score_distribution(path, scores_negative, scores_positive, threshold=0.5):
+    """正常/糖尿病样本的风险评分直方图"""
+    fig = _new_figure((10, 6))
+    ax = fig.add_subplot()
+
+    ax.hist([scores_negative, scores_positive], bins=20, label=['正常', '糖尿病'],
+            color=['#2ecc71', '#e74c3c'], alpha=0.7, edgecolor='black')
+    ax.axvline(x=threshold, color='blue', linestyle='--', linewidth=2.5,
+               label=f'决策阈值 ({threshold:.3f})')
+    ax.set_xlabel('风险评分', fontsize=13, fontweight='bold')
+    ax.set_ylabel('频数', fontsize=13, fontweight='bold')
+    ax.set_title('问题二：糖尿病风险评分分布', fontsize=14, fontweight='bold', pad=15)
+    ax.legend(fontsize=11, loc='upper right')
+    ax.grid(alpha=0.3)
+    _save_figure(fig, path)
+
+
+def render_risk_level_pie(path, levels, counts):
+    """风险等级饼图"""
+    fig = _new_figure((9, 7))
+    ax = fig.add_subplot()
+
+    # 颜色按等级固定（某个等级没有样本时其余等级的颜色不变）
+    level_colors = {'低风险': '#2ecc71', '中等风险': '#f39c12', '高风险': '#e74c3c'}
+    colors_pie = [level_colors.get(level, '#95a5a6') for level in levels]
+    explode = [0.05] * len(levels)
+    if '高风险' in levels:
+        explode[list(levels).index('高风险')] = 0.1
+
+    ax.pie(counts, labels=levels, autopct='%1.1f%%', colors=colors_pie, explode=explode,
+           startangle=90, textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
+    ax.set_title('问题二：测试集风险等级分布统计', fontsize=14, fontweight='bold', pad=15)
+    _save_figure(fig, path)
+
+
+def render_confusion_matrix(path, cm, metrics):
+    """混淆矩阵热力图及性能指标；metrics: 准确率/精确率/召回率/F1分数"""
+    import seaborn as sns
+
+    fig = _new_figure((8, 7))
+    ax = fig.add_subplot()
+
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax,
+                xticklabels=['正常', '糖尿病'],
+                yticklabels=['正常', '糖尿病'],
+                cbar_kws={'label': '样本数量'},
+                annot_kws={'fontsize': 16, 'fontweight': 'bold'})
+    ax.set_xlabel('预测标签', fontsize=13, fontweight='bold')
+    ax.set_ylabel('真实标签', fontsize=13, fontweight='bold')
+    ax.set_title('问题二：预测混淆矩阵', fontsize=14, fontweight='bold', pad=15)
+
+    # 添加性能指标文本
+    textstr = '\n'.join(f'{name}: {value:.2%}' for name, value in metrics.items())
+    ax.text(1.35, 0.5, textstr, fontsize=11, bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5),
+            transform=ax.transAxes, verticalalignment='center')
+    _save_figure(fig, path)
+
+
+# ==================== 数据预处理 ====================
+
+def render_zero_value_comparison(path, zero_columns, zero_before, zero_after, completeness):
+    """清洗前后零值比例与数据完整性对比"""
+    fig = _new_figure((14, 5))
+    axes = fig.subplots(1, 2)
+
+    x = np.arange(len(zero_columns))
+    width = 0.35
+    axes[0].bar(x - width/2, zero_before, width, label='清洗前', color='#e74c3c', alpha=0.8)
+    axes[0].bar(x + width/2, zero_after, width, label='清洗后', color='#2ecc71', alpha=0.8)
+    axes[0].set_xlabel('特征', fontsize=12)
+    axes[0].set_ylabel('零值比例 (%)', fontsize=12)
+    axes[0].set_title('数据清洗前后零值比例对比', fontsize=14, fontweight='bold')
+    axes[0].set_xticks(x)
+    axes[0].set_xticklabels(zero_columns, rotation=45, ha='right')
+    axes[0].legend()
+    axes[0].grid(axis='y', alpha=0.3)
+
+    categories = ['清洗前', '清洗后']
+    axes[1].bar(categories, completeness, color=['#e74c3c', '#2ecc71'], alpha=0.8, width=0.5)
+    axes[1].set_ylabel('数据完整性 (%)', fontsize=12)
+    axes[1].set_title('数据完整性提升情况', fontsize=14, fontweight='bold')
+    axes[1].set_ylim([0, 105])
+    axes[1].grid(axis='y', alpha=0.3)
+
+    # 在柱子上添加数值标签
+    for i, v in enumerate(completeness):
+        axes[1].text(i, v + 1, f'{v:.1f}%', ha='center', va='bottom', fontsize=11, fontweight='bold')
+    _save_figure(fig, path)
+
+
+def render_distribution_comparison(path, features, data_before, data_after):
+    """清洗前后特征分布直方图（2×3）"""
+    fig = _new_figure((15, 8))
+    axes = fig.subplots(2, 3).flatten()
+
+    for idx, feature in enumerate(features):
+        axes[idx].hist(data_before[idx], bins=30, alpha=0.5, label='清洗前', color='#e74c3c', edgecolor='black')
+        axes[idx].hist(data_after[idx], bins=30, alpha=0.5, label='清洗后', color='#2ecc71', edgecolor='black')
+        axes[idx].set_xlabel(feature, fontsize=10)
+        axes[idx].set_ylabel('频数', fontsize=10)
+        axes[idx].set_title(f'{feature} 分布对比', fontsize=11, fontweight='bold')
+        axes[idx].legend()
+        axes[idx].grid(alpha=0.3)
+    _save_figure(fig, path)
+
+
+class FigureRenderer:
+    """
+    报告图表渲染器
+    output_dir: 图片输出目录
+    mode: 'now'（后台并行渲染）、'defer'（finish 时渲染）或 'skip'（不渲染）
+    max_workers: 渲染进程数（默认全部核心）
+    """
+
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, mode='now', max_workers=None):
+        if mode not in PLOT_MODES:
+            raise ValueError(f"未知的绘图模式: {mode}（可选 {PLOT_MODES}）")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.max_workers = max_workers
+        self._executor = None
+        self._pending = []
+        self._futures = []
+
+    @property
+    def enabled(self):
+        return self.mode != 'skip'
+
+    def submit(self, render_func, filename, **data):
+        """提交一张图；render_func(path, **data) 必须是模块级函数"""
+        if not self.enabled:
+            return
+        job = (render_func, os.path.join(self.output_dir, filename), data)
+        if self.mode == 'defer':
+            self._pending.append(job)
+        else:
+            self._dispatch(job)
+
+    def _dispatch(self, job):
+        if self._executor is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=configure_fonts)
+        self._futures.append(self._executor.submit(_render_job, *job))
+
+    def finish(self):
+        """渲染所有延迟的图并等待全部完成，返回生成的文件路径"""
+        for job in self._pending:
+            self._dispatch(job)
+        self._pending = []
+
+        paths = []
+        for future in self._futures:
+            path = future.result()
+            paths.append(path)
+            print(f"  已生成: {os.path.basename(path)}")
+        self._futures = []
+        return paths
+
+    def close(self):
+        """完成渲染并关闭进程池"""
+        paths = self.finish()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        return paths
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+风险等级评估与医疗建议（仅依赖 NumPy）
+评分服务等只做推理的进程只需导入本模块和 fusion_engine，
+无需加载 pandas、scikit-learn 和 matplotlib
+
+风险等级和医疗建议都由下面的规则表定义：
+单个患者逐条判断，批量时按列用布尔掩码计算，建议以整数位掩码（advice_code）表示，
+百万级患者也只需几次数组运算；需要文字时再用 decode_advice 按位掩码查表。
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+# 默认风险等级阈值：评分 < 0.3 为低风险，< 0.6 为中等风险，其余为高风险
+# （可用 operating_point.fit_risk_bands 按数据拟合，随模型产物保存）
+RISK_THRESHOLDS = [0.3, 0.6]
+RISK_LEVELS = ["低风险", "中等风险", "高风险"]
+RISK_COLORS = ["green", "orange", "red"]
+# 默认决策阈值：评分 >= 0.5 判为阳性
+DECISION_THRESHOLD = 0.5
+
+# 医疗建议规则表：(位, 指标, 阈值, 建议)，指标 > 阈值 时置位
+ADVICE_RULES = [
+    (1 << 0, 'Glucose', 140, "血糖偏高，建议控制碳水化合物摄入"),
+    (1 << 1, 'BMI', 30, "BMI偏高，建议增加运动、控制体重"),
+    (1 << 2, 'BloodPressure', 85, "血压偏高，建议低盐饮食、规律作息"),
+    (1 << 3, 'Age', 45, "年龄较大，建议定期体检、监测血糖"),
+]
+# 风险评分 >= 决策阈值 时置位
+ADVICE_FOLLOWUP = 1 << 4
+# 没有任何指标规则触发时的建议
+DEFAULT_RECOMMENDATIONS = ["保持健康饮食和适量运动", "定期进行健康检查"]
+DIAGNOSES = {True: "建议进一步检查，可能存在糖尿病风险", False: "目前指标正常，建议保持健康生活方式"}
+
+
+def assess_risk_level(risk_score, thresholds=None):
+    """
+    评估风险等级
+    thresholds: 风险等级分界（默认 RISK_THRESHOLDS）
+    返回: (风险等级, 颜色)
+    """
+    index = bisect_right(thresholds or RISK_THRESHOLDS, risk_score)
+    return RISK_LEVELS[index], RISK_COLORS[index]
+
+
+def risk_level_codes(risk_scores, thresholds=None):
+    """批量评估风险等级，返回等级编号（int8，0/1/2 对应 RISK_LEVELS）"""
+    return np.searchsorted(thresholds or RISK_THRESHOLDS, risk_scores, side='right').astype(np.int8)
+
+
+def assess_risk_levels(risk_scores, thresholds=None):
+    """
+    批量评估风险等级（与 assess_risk_level 的阈值一致）
+    返回: (风险等级数组, 颜色数组)
+    """
+    codes = risk_level_codes(risk_scores, thresholds)
+    return np.asarray(RISK_LEVELS)[codes], np.asarray(RISK_COLORS)[codes]
+
+
+def advice_code(risk_score, patient_data, decision_threshold=DECISION_THRESHOLD):
+    """单个患者的建议位掩码（缺失的指标视为 0）"""
+    code = ADVICE_FOLLOWUP if risk_score >= decision_threshold else 0
+    for bit, name, threshold, _ in ADVICE_RULES:
+        if patient_data.get(name, 0) > threshold:
+            code |= bit
+    return code
+
+
+def advice_codes(risk_scores, columns, decision_threshold=DECISION_THRESHOLD):
+    """
+    批量计算建议位掩码
+    columns: 按指标名取整列数组的对象（DataFrame 或 {指标: 数组}），缺失的指标不触发规则
+    返回: uint8 数组
+    """
+    risk_scores = np.asarray(risk_scores)
+    codes = np.zeros(len(risk_scores), dtype=np.uint8)
+    np.bitwise_or(codes, ADVICE_FOLLOWUP, out=codes, where=risk_scores >= decision_threshold)
+    for bit, name, threshold, _ in ADVICE_RULES:
+        if name in columns:
+            np.bitwise_or(codes, bit, out=codes, where=np.asarray(columns[name]) > threshold)
+    return codes
+
+
+def decode_advice(code):
+    """位掩码 -> (诊断, 建议列表)"""
+    recommendations = [message for bit, _, _, message in ADVICE_RULES if code & bit]
+    return DIAGNOSES[bool(code & ADVICE_FOLLOWUP)], recommendations or list(DEFAULT_RECOMMENDATIONS)
+
+
+def generate_medical_advice(risk_score, patient_data, thresholds=None,
+                            decision_threshold=DECISION_THRESHOLD):
+    """
+    生成医疗建议
+    thresholds / decision_threshold: 模型的风险等级分界和决策阈值
+    """
+    risk_level, _ = assess_risk_level(risk_score, thresholds)
+    code = advice_code(risk_score, patient_data, decision_threshold)
+    diagnosis, recommendations = decode_advice(code)
+
+    return {
+        'risk_level': risk_level,
+        'risk_score': risk_score,
+        'recommendations': recommendations,
+        'diagnosis': diagnosis,
+        'advice_code': code
+    }
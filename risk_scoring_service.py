@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+糖尿病风险在线评分服务
+基于 asyncio 的 HTTP 服务：几毫秒内到达的请求合并为一个批次，
+调用一次向量化的 fusion_predict，返回风险评分、风险等级和医疗建议（JSON）
+
+接口:
+    POST /predict   请求体为单个患者的 JSON（8个原始特征）
+    GET  /metrics   延迟统计（p50/p99）、批次统计和输入漂移监控摘要
+    GET  /drift     最近一次输入分布漂移评估（逐特征 PSI/KS，见 drift_monitor）
+    GET  /health    健康检查
+
+用法:
+    python risk_scoring_service.py --artifact model_artifact --port 8080
+    python risk_scoring_service.py --engine fusion_engine_dir --port 8080
+
+使用 --engine 时进程只导入 NumPy，不加载 pandas 和 scikit-learn
+模型产物或引擎包含训练分布概况时，每批输入都计入漂移监控，每 --drift-interval 秒评估一次
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections import deque
+
+import numpy as np
+
+from fusion_engine import RAW_FEATURES, FusionEngine
+from risk_scoring import assess_risk_levels, advice_codes, decode_advice
+from drift_monitor import DriftProfile, DriftMonitor
+from pipeline_telemetry import traced, annotate
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+
+def parse_patient(payload):
+    """
+    校验单个患者的请求体并把8个原始特征转为浮点数
+    缺少特征、取值不是有限数值（含 null、布尔值、无法转换的字符串）时抛出 ValueError，
+    保证进入批处理器的每一行都可以直接评分，一个错误请求不会影响同批的其它请求
+    """
+    if not isinstance(payload, dict):
+        raise ValueError('请求体应为 JSON 对象')
+    missing = [name for name in RAW_FEATURES if name not in payload]
+    if missing:
+        raise ValueError(f'缺少特征: {missing}')
+    patient = {}
+    for name in RAW_FEATURES:
+        value = payload[name]
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            patient[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'特征 {name} 的取值不是数值: {value!r}') from None
+        if not np.isfinite(patient[name]):
+            raise ValueError(f'特征 {name} 的取值不是有限数值: {value!r}')
+    return patient
+
+
+class LatencyRecorder:
+    """保留最近 window 个请求的延迟，计算分位数"""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.total_requests = 0
+        self.total_batches = 0
+
+    def record_request(self, seconds):
+        self.latencies.append(seconds)
+        self.total_requests += 1
+
+    def record_batch(self, size):
+        self.batch_sizes.append(size)
+        self.total_batches += 1
+
+    def snapshot(self):
+        """当前统计（毫秒）"""
+        stats = {'requests': self.total_requests, 'batches': self.total_batches}
+        if self.latencies:
+            latencies_ms = np.asarray(self.latencies) * 1000
+            p50, p99 = np.percentile(latencies_ms, [50, 99])
+            stats.update({'latency_p50_ms': round(float(p50), 3),
+                          'latency_p99_ms': round(float(p99), 3),
+                          'latency_max_ms': round(float(latencies_ms.max()), 3)})
+        if self.batch_sizes:
+            stats['mean_batch_size'] = round(float(np.mean(self.batch_sizes)), 2)
+        return stats
+
+
+class MicroBatcher:
+    """
+    请求微批处理器
+    第一个请求到达后最多等待 max_wait_ms 毫秒（或凑满 max_batch 个），再整批评分
+    system: 已加载模型的 DiabetesRiskPredictionSystem；提供 engine 时可为 None
+    engine: 可选的 FusionEngine；提供时用紧凑引擎代替 sklearn 模型评分
+    monitor: 可选的 DriftMonitor，每批输入计入分箱计数
+    """
+
+    def __init__(self, system, max_batch=256, max_wait_ms=2.0, metrics=None, engine=None, monitor=None):
+        self.system = system
+        self.engine = engine
+        self.monitor = monitor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics or LatencyRecorder()
+        self.queue = asyncio.Queue()
+
+    async def submit(self, patient_data):
+        """提交单个患者，等待所在批次评分完成"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((patient_data, future))
+        return await future
+
+    async def run(self):
+        """批处理主循环"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            patients = [item[0] for item in batch]
+            try:
+                # 推理放到线程池中执行，评分期间事件循环仍可接收新请求
+                results = await loop.run_in_executor(None, self._score, patients)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            self.metrics.record_batch(len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    @traced(name='score_batch')
+    def _score(self, patients):
+        """整批评分：一次向量化预测，风险等级和建议规则按列整批计算"""
+        annotate(rows=len(patients), engine=self.engine is not None)
+        X_raw = np.array([[float(p[name]) for name in RAW_FEATURES] for p in patients])
+        if self.monitor is not None:
+            self.monitor.update(X_raw)
+        if self.engine is not None:
+            predictions, risk_scores = self.engine.predict(X_raw)
+            operating_point = self.engine
+        else:
+            batch = self.system.predict_batch(X_raw)
+            predictions, risk_scores = batch['prediction'], batch['risk_score']
+            operating_point = self.system
+
+        # 风险等级和建议位掩码整批计算，每种位掩码只还原一次文字
+        risk_scores = np.asarray(risk_scores, dtype=float)
+        levels, _ = assess_risk_levels(risk_scores, operating_point.risk_thresholds)
+        codes = advice_codes(risk_scores, {name: X_raw[:, i] for i, name in enumerate(RAW_FEATURES)},
+                             operating_point.decision_threshold)
+        decoded = {code: decode_advice(code) for code in np.unique(codes).tolist()}
+
+        results = []
+        for prediction, risk_score, level, code in zip(np.asarray(predictions).tolist(), risk_scores.tolist(),
+                                                       levels.tolist(), codes.tolist()):
+            diagnosis, recommendations = decoded[code]
+            results.append({
+                'prediction': int(prediction),
+                'risk_score': risk_score,
+                'risk_level': level,
+                'diagnosis': diagnosis,
+                'recommendations': recommendations,
+                'advice_code': code
+            })
+        return results
+
+
+class RiskScoringServer:
+    """最小化的 HTTP/1.1 服务器（支持 keep-alive）"""
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.metrics = batcher.metrics
+        self.monitor = batcher.monitor
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                body = b''
+                if 'content-length' in headers:
+                    body = await reader.readexactly(int(headers['content-length']))
+
+                status, payload = await self.dispatch(method, target, body)
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write((f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                              f"Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                              ).encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        """路由请求，返回 (状态码, JSON对象)"""
+        path = target.split('?', 1)[0]
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/metrics':
+            stats = self.metrics.snapshot()
+            if self.monitor is not None:
+                stats['drift'] = self.monitor.snapshot()
+            return 200, stats
+        if path == '/drift':
+            if self.monitor is None:
+                return 404, {'error': '未开启漂移监控（模型中没有训练分布概况）'}
+            return 200, self.monitor.last_report or {'status': 'pending', **self.monitor.snapshot()}
+        if path != '/predict':
+            return 404, {'error': f'未知路径: {path}'}
+        if method != 'POST':
+            return 405, {'error': '仅支持 POST'}
+
+        start = time.perf_counter()
+        try:
+            patient_data = parse_patient(json.loads(body))
+        except ValueError as exc:
+            # json.JSONDecodeError 也是 ValueError
+            return 400, {'error': str(exc)}
+        try:
+            result = await self.batcher.submit(patient_data)
+        except Exception as exc:
+            return 500, {'error': str(exc)}
+        self.metrics.record_request(time.perf_counter() - start)
+        return 200, result
+
+
+def create_drift_monitor(system=None, engine=None, interval=60.0):
+    """从引擎元数据或已加载的系统取训练分布概况，创建漂移监控（没有概况时返回 None）"""
+    if engine is not None:
+        profile = engine.meta.get('drift_profile')
+        profile = DriftProfile.from_dict(profile) if profile else None
+    else:
+        profile = getattr(system, 'drift_profile', None)
+    return DriftMonitor(profile, interval=interval) if profile is not None else None
+
+
+async def evaluate_drift_periodically(monitor):
+    """每 monitor.interval 秒评估一次漂移（窗口行数不足时继续累积）"""
+    while True:
+        await asyncio.sleep(monitor.interval)
+        previous = monitor.last_report
+        report = monitor.evaluate()
+        if report is not previous and report['drifted']:
+            print(f"输入分布漂移（{report['status']}）: {', '.join(report['drifted'])}")
+
+
+async def serve(system, host='127.0.0.1', port=8080, max_batch=256, max_wait_ms=2.0, engine=None,
+                drift_interval=60.0):
+    """
+    启动评分服务（直到被取消）
+    drift_interval: 输入漂移评估间隔（秒），0 表示不监控
+    """
+    monitor = create_drift_monitor(system, engine, drift_interval) if drift_interval > 0 else None
+    batcher = MicroBatcher(system, max_batch=max_batch, max_wait_ms=max_wait_ms, engine=engine,
+                           monitor=monitor)
+    server = RiskScoringServer(batcher)
+    tasks = [asyncio.create_task(batcher.run())]
+    if monitor is not None:
+        tasks.append(asyncio.create_task(evaluate_drift_periodically(monitor)))
+    tcp_server = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"风险评分服务已启动: http://{host}:{port} "
+          f"(批大小上限 {max_batch}，等待窗口 {max_wait_ms} 毫秒，"
+          f"漂移监控 {f'每 {drift_interval:g} 秒' if monitor is not None else '关闭'})")
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def load_artifact_system(artifact_path, output_dir):
+    """
+    从模型产物加载评分用的系统
+    不生成图表（plot_mode='skip'）；服务本身不写入文件，output_dir 只是系统要求的输出目录
+    """
+    from diabetes_risk_prediction_system import DiabetesRiskPredictionSystem
+
+    system = DiabetesRiskPredictionSystem(output_dir=output_dir, plot_mode='skip')
+    system.load_artifact(artifact_path)
+    return system
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='糖尿病风险在线评分服务')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--artifact', help='模型产物目录（save_artifact 生成）')
+    source.add_argument('--engine', help='紧凑推理引擎目录（export_engine 生成）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch', type=int, default=256, help='单批最大请求数')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help='批次等待窗口（毫秒）')
+    parser.add_argument('--drift-interval', type=float, default=60.0,
+                        help='输入漂移评估间隔（秒），0 表示不监控')
+    args = parser.parse_args()
+
+    system, engine = None, None
+    # 系统的输出目录使用临时目录，不在当前目录下创建 output/
+    with tempfile.TemporaryDirectory(prefix='risk_scoring_') as output_dir:
+        if args.engine:
+            engine = FusionEngine.load(args.engine)
+        else:
+            system = load_artifact_system(args.artifact, output_dir)
+        try:
+            asyncio.run(serve(system, args.host, args.port, args.max_batch, args.max_wait_ms, engine,
+                              args.drift_interval))
+        except KeyboardInterrupt:
+            print("\n评分服务已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具
+模块均在仓库根目录（合成数据生成器在 benchmarks/ 下），这里加入导入路径；
+训练好的系统在整个测试会话中只构建一次（合成数据，不生成图表），
+会修改模型的测试用 build_system 另外构建
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def build_system(df, output_dir):
+    """在 df 上完成特征工程、基础模型训练和融合权重计算的系统"""
+    from diabetes_risk_prediction_system import DiabetesRiskPredictionSystem
+
+    system = DiabetesRiskPredictionSystem(output_dir=str(output_dir), plot_mode='skip')
+    system.prepare_data(system.feature_engineering(df))
+    system.build_base_models()
+    system.train_base_models()
+    system.calculate_fusion_weights()
+    return system
+
+
+@pytest.fixture(scope='session')
+def synthetic_data():
+    """清洗后 Pima 数据集结构的合成数据"""
+    from bench_pipeline import generate_synthetic_pima
+    return generate_synthetic_pima(800, seed=0)
+
+
+@pytest.fixture(scope='session')
+def trained_system(synthetic_data, tmp_path_factory):
+    """会话共享的已训练系统（测试不应修改其模型）"""
+    return build_system(synthetic_data, tmp_path_factory.mktemp('system'))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""模型产物的保存、加载和基于产物的启动流程"""
+
+import os
+
+import numpy as np
+
+from bench_pipeline import generate_synthetic_pima
+from diabetes_risk_prediction_system import (ARTIFACT_MANIFEST, ARTIFACT_MODELS, DiabetesRiskPredictionSystem,
+                                             main)
+from feature_transform import RAW_FEATURES
+
+
+def test_artifact_roundtrip(trained_system, synthetic_data, tmp_path):
+    """加载产物后预测与保存前一致，产物目录中不残留临时文件"""
+    path = str(tmp_path / 'artifact')
+    trained_system.save_artifact(path)
+    trained_system.save_artifact(path)
+    assert sorted(os.listdir(path)) == sorted([ARTIFACT_MODELS, ARTIFACT_MANIFEST])
+
+    system = DiabetesRiskPredictionSystem(output_dir=str(tmp_path), plot_mode='skip')
+    system.load_artifact(path)
+    patients = synthetic_data[RAW_FEATURES].iloc[:50]
+    np.testing.assert_array_equal(system.predict_batch(patients)['risk_score'],
+                                  trained_system.predict_batch(patients)['risk_score'])
+
+
+def test_prepare_evaluation_data_matches_prepare_data(trained_system, synthetic_data, tmp_path):
+    """产物的标准化器变换出的测试集与训练时 prepare_data 的测试集一致"""
+    path = str(tmp_path / 'artifact')
+    trained_system.save_artifact(path)
+
+    system = DiabetesRiskPredictionSystem(output_dir=str(tmp_path), plot_mode='skip')
+    system.load_artifact(path)
+    X_test, y_test = system.prepare_evaluation_data(synthetic_data)
+
+    assert system.X_train is None
+    np.testing.assert_allclose(X_test, trained_system.X_test, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(np.asarray(y_test), np.asarray(trained_system.y_test))
+
+
+def test_main_with_artifact_uses_artifact_scaler(tmp_path):
+    """数据在保存产物后变化时，main 加载产物不重新拟合标准化器，测试集按产物的标准化器变换"""
+    data_path = str(tmp_path / 'diabetes_data_cleaned.csv')
+    artifact_path = str(tmp_path / 'artifact')
+    generate_synthetic_pima(600, seed=0).to_csv(data_path, index=False)
+    trained = main(artifact_path=artifact_path, output_dir=str(tmp_path), plot_mode='skip',
+                   data_path=data_path)
+
+    generate_synthetic_pima(600, seed=1).to_csv(data_path, index=False)
+    loaded = main(artifact_path=artifact_path, output_dir=str(tmp_path), plot_mode='skip',
+                  data_path=data_path)
+
+    assert loaded.X_train is None
+    np.testing.assert_array_equal(loaded.scaler.mean_, trained.scaler.mean_)
+    reference = DiabetesRiskPredictionSystem(output_dir=str(tmp_path), plot_mode='skip')
+    reference.load_artifact(artifact_path)
+    np.testing.assert_array_equal(loaded.X_test, reference.prepare_evaluation_data(
+        reference.load_data(data_path))[0])
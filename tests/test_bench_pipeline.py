@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""流程基准与基线的比较"""
+
+import json
+
+import pytest
+
+from bench_pipeline import DEFAULT_BASELINE, STAGES, compare_with_baseline
+
+
+def _report(seconds, exponents=None):
+    return {'results': {'1000': {'train_base_models': {'seconds': seconds, 'peak_rss_mb': None}}},
+            'scaling_exponents': exponents or {}}
+
+
+@pytest.mark.parametrize('seconds, threshold, n_regressions', [
+    (1.2, 0.25, 0),   # 增幅在阈值内
+    (1.3, 0.25, 1),   # 超出阈值
+    (1.3, 0.5, 0),    # 放宽阈值
+    (0.04, 0.0, 0),   # 低于噪声下限的差异不判为回归
+])
+def test_compare_threshold(seconds, threshold, n_regressions):
+    baseline = _report(1.0 if seconds > 0.05 else 0.01)
+    regressions, n_compared = compare_with_baseline(_report(seconds), baseline, threshold)
+    assert n_compared == 1
+    assert len(regressions) == n_regressions
+
+
+def test_compare_scaling_exponent():
+    """扩展指数超过基线 + EXPONENT_TOLERANCE 时判为回归"""
+    baseline = _report(1.0, {'train_base_models@1000-10000': 1.0})
+    assert compare_with_baseline(_report(1.0, {'train_base_models@1000-10000': 1.2}), baseline, 0.25)[0] == []
+    assert len(compare_with_baseline(_report(1.0, {'train_base_models@1000-10000': 1.5}), baseline, 0.25)[0]) == 1
+
+
+def test_committed_baseline_covers_all_stages():
+    """提交的基线包含默认规模的全部阶段"""
+    with open(DEFAULT_BASELINE, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    assert baseline['results']
+    for stages in baseline['results'].values():
+        assert set(stages) == set(STAGES)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""自助法置信区间"""
+
+import numpy as np
+import pytest
+
+from bootstrap_ci import BOOTSTRAP_METRICS, bootstrap_confidence_intervals, point_metrics
+
+
+@pytest.fixture(scope='module')
+def labelled_scores():
+    """标签、评分（含并列值）和按 0.5 判定的预测标签"""
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 600)
+    scores = np.round(rng.random(600) * 0.6 + 0.3 * y_true, 2)
+    return y_true, (scores >= 0.5).astype(int), scores
+
+
+def test_intervals_independent_of_worker_count(labelled_scores):
+    """分批和随机流与进程数无关：不同 n_jobs 得到完全相同的区间"""
+    results = [bootstrap_confidence_intervals(*labelled_scores, n_bootstrap=1000, random_state=42, n_jobs=n_jobs)
+               for n_jobs in (1, 2, 3)]
+    assert results[0] == results[1] == results[2]
+
+
+def test_point_metrics_match_sklearn(labelled_scores):
+    """完整样本上的指标与 sklearn 一致（AUC 的并列评分计 0.5）"""
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    y_true, y_pred, scores = labelled_scores
+    metrics = point_metrics(y_true, y_pred, scores)
+    expected = {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred),
+        'recall': recall_score(y_true, y_pred),
+        'f1': f1_score(y_true, y_pred),
+        'roc_auc': roc_auc_score(y_true, scores)
+    }
+    for name in BOOTSTRAP_METRICS:
+        assert metrics[name] == pytest.approx(expected[name], abs=1e-12)
+
+
+def test_intervals_contain_estimate(labelled_scores):
+    """每个指标的区间包含完整样本上的估计值"""
+    intervals = bootstrap_confidence_intervals(*labelled_scores, n_bootstrap=500, n_jobs=1)
+    for name in BOOTSTRAP_METRICS:
+        interval = intervals[name]
+        assert interval['lower'] <= interval['estimate'] <= interval['upper']
+        assert interval['std'] > 0
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""概率校准查找表的单调性及与 scikit-learn 模型的一致性"""
+
+import numpy as np
+import pytest
+
+from calibration import ProbabilityCalibrator, brier_score
+
+
+@pytest.fixture(scope='module')
+def miscalibrated():
+    """过于保守的评分（真实概率的平方）及按真实概率抽样的标签"""
+    rng = np.random.default_rng(7)
+    probability = rng.beta(2, 3, 4000)
+    return probability ** 2, (rng.random(4000) < probability).astype(int)
+
+
+@pytest.mark.parametrize('method', ['isotonic', 'platt'])
+def test_monotone_and_better_calibrated(miscalibrated, method):
+    """节点递增、映射单调不减且在 [0, 1] 内；校准后 Brier 分数下降"""
+    scores, y = miscalibrated
+    calibrator = ProbabilityCalibrator.fit(scores, y, method=method)
+
+    assert (np.diff(calibrator.x) > 0).all()
+    assert (np.diff(calibrator.y) >= 0).all()
+    mapped = calibrator.transform(np.linspace(-0.5, 1.5, 2001))
+    assert (np.diff(mapped) >= 0).all()
+    assert mapped.min() >= 0 and mapped.max() <= 1
+    assert brier_score(y, calibrator.transform(scores)) < brier_score(y, scores)
+
+
+def test_isotonic_lookup_matches_sklearn(miscalibrated):
+    """查找表插值与 IsotonicRegression.predict 一致（含超出拟合范围的评分）"""
+    from sklearn.isotonic import IsotonicRegression
+
+    scores, y = miscalibrated
+    calibrator = ProbabilityCalibrator.fit(scores, y, method='isotonic')
+    isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip').fit(scores, y)
+
+    queries = np.r_[np.random.default_rng(8).random(5000), -0.1, 0.0, 1.0, 1.1]
+    np.testing.assert_allclose(calibrator.transform(queries), isotonic.predict(queries), rtol=0, atol=1e-12)
+
+
+def test_platt_lookup_matches_sklearn(miscalibrated):
+    """Platt 缩放的制表插值与 LogisticRegression 的 sigmoid 误差很小"""
+    from sklearn.linear_model import LogisticRegression
+
+    scores, y = miscalibrated
+    calibrator = ProbabilityCalibrator.fit(scores, y, method='platt')
+    platt = LogisticRegression(C=1e6).fit(scores[:, None], y)
+
+    queries = np.random.default_rng(9).random(5000)
+    np.testing.assert_allclose(calibrator.transform(queries), platt.predict_proba(queries[:, None])[:, 1],
+                               rtol=0, atol=1e-4)
+
+
+def test_roundtrip_and_unknown_method(miscalibrated):
+    scores, y = miscalibrated
+    calibrator = ProbabilityCalibrator.fit(scores, y)
+    restored = ProbabilityCalibrator.from_dict(calibrator.to_dict())
+
+    assert restored.method == 'isotonic'
+    np.testing.assert_array_equal(restored.transform(scores), calibrator.transform(scores))
+    with pytest.raises(ValueError):
+        ProbabilityCalibrator.fit(scores, y, method='beta')
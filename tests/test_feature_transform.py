@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""特征变换与 pandas 参考实现的一致性"""
+
+import numpy as np
+import pytest
+
+from bench_pipeline import generate_synthetic_pima
+from feature_transform import MODEL_FEATURES, RAW_FEATURES, FeatureTransformer
+
+
+def _reference(df):
+    """pandas 逐列计算交互特征（float32）"""
+    raw = df[RAW_FEATURES].astype(np.float32)
+    result = raw.copy()
+    result['BMI_Age'] = raw['BMI'] * raw['Age']
+    result['Glucose_BMI'] = raw['Glucose'] * raw['BMI']
+    result['Insulin_Glucose_Ratio'] = raw['Insulin'] / (raw['Glucose'] + np.float32(1e-6))
+    return result[MODEL_FEATURES].to_numpy()
+
+
+@pytest.fixture(scope='module')
+def patients():
+    return generate_synthetic_pima(1000, seed=6)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 97, 65536])
+def test_matches_pandas_reference(patients, chunk_rows):
+    """DataFrame 和数组输入、任意分块大小下与 pandas 参考结果逐位一致"""
+    transformer = FeatureTransformer(chunk_rows=chunk_rows)
+    expected = _reference(patients)
+
+    from_frame = transformer.transform(patients)
+    assert from_frame.dtype == np.float32 and from_frame.shape == (len(patients), len(MODEL_FEATURES))
+    np.testing.assert_array_equal(from_frame, expected)
+    np.testing.assert_array_equal(transformer.transform(patients[RAW_FEATURES].to_numpy()), expected)
+
+
+def test_single_patient_and_subset(patients):
+    """单个患者的字典和一维数组输入；输出列为子集时按给定顺序"""
+    expected = _reference(patients.iloc[:1])
+    patient = patients[RAW_FEATURES].iloc[0]
+    transformer = FeatureTransformer()
+    np.testing.assert_array_equal(transformer.transform(patient.to_dict()), expected)
+    np.testing.assert_array_equal(transformer.transform(patient.to_numpy()), expected)
+
+    subset = ['Glucose_BMI', 'Age', 'BMI']
+    columns = [MODEL_FEATURES.index(name) for name in subset]
+    np.testing.assert_array_equal(FeatureTransformer(subset).transform(patients), _reference(patients)[:, columns])
+
+
+def test_out_buffer_and_validation(patients):
+    """写入预分配的输出矩阵；形状或类型不符、未知特征时抛出 ValueError"""
+    out = np.empty((len(patients), len(MODEL_FEATURES)), dtype=np.float32)
+    assert FeatureTransformer().transform(patients, out=out) is out
+    np.testing.assert_array_equal(out, _reference(patients))
+
+    with pytest.raises(ValueError):
+        FeatureTransformer().transform(patients, out=np.empty((len(patients), 3), dtype=np.float32))
+    with pytest.raises(ValueError):
+        FeatureTransformer(['Glucose', 'HbA1c'])
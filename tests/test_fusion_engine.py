@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""紧凑推理引擎与 sklearn 融合预测的一致性"""
+
+import os
+
+import numpy as np
+import pytest
+
+from feature_transform import RAW_FEATURES
+from fusion_engine import FusionEngine
+
+
+@pytest.fixture
+def calibrated_system(trained_system):
+    """临时拟合概率校准的系统（测试结束后清除，不影响其他测试）"""
+    trained_system.fit_calibration()
+    yield trained_system
+    trained_system.invalidate_calibration()
+
+
+def test_engine_matches_fusion_predict(trained_system):
+    """引擎的融合评分与 fusion_predict 一致"""
+    engine = trained_system.export_engine()
+    expected = trained_system.fusion_predict(trained_system.X_test, cache=False)[1]
+
+    np.testing.assert_allclose(engine.predict_proba_scaled(trained_system.X_test), expected,
+                               rtol=0, atol=1e-6)
+
+
+def test_engine_matches_predict_batch_on_raw_features(trained_system, synthetic_data):
+    """原始特征输入时，引擎（含保存后内存映射加载）与 predict_batch 的评分和标签一致"""
+    patients = synthetic_data[RAW_FEATURES].iloc[:100]
+    expected = trained_system.predict_batch(patients)
+
+    path = os.path.join(trained_system.output_dir, 'engine')
+    for engine in (trained_system.export_engine(path), FusionEngine.load(path)):
+        labels, scores = engine.predict(patients.to_numpy())
+        np.testing.assert_allclose(scores, expected['risk_score'].to_numpy(), rtol=0, atol=1e-6)
+        np.testing.assert_array_equal(labels, expected['prediction'].to_numpy())
+
+
+def test_engine_applies_calibration(calibrated_system):
+    """导出时已拟合校准，引擎输出校准后的评分"""
+    engine = calibrated_system.export_engine()
+    expected = calibrated_system.fusion_predict(calibrated_system.X_test, cache=False)[1]
+
+    np.testing.assert_allclose(engine.predict_proba_scaled(calibrated_system.X_test), expected,
+                               rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('calibrated', [False, True])
+def test_explain_is_additive(trained_system, calibrated, request):
+    """每行 基准评分 + 各特征贡献之和 = 融合风险评分，且评分与 fusion_predict 一致"""
+    system = request.getfixturevalue('calibrated_system') if calibrated else trained_system
+    base, contributions, scores = system.export_engine().explain_scaled(system.X_test)
+
+    assert contributions.shape == system.X_test.shape
+    np.testing.assert_allclose(base + contributions.sum(axis=1), scores, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(scores, system.fusion_predict(system.X_test, cache=False)[1],
+                               rtol=0, atol=1e-6)
+
+
+def test_explain_batch_columns(trained_system, synthetic_data):
+    """explain_batch 的贡献列之和加基准评分等于 risk_score，前 k 个因素的贡献按降序排列"""
+    patients = synthetic_data[RAW_FEATURES].iloc[:50]
+    results = trained_system.explain_batch(patients, top_k=3)
+    feature_names = [str(name) for name in trained_system.feature_names]
+
+    np.testing.assert_allclose(results['base_value'] + results[feature_names].sum(axis=1),
+                               results['risk_score'], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(results['risk_score'], trained_system.predict_batch(patients)['risk_score'],
+                               rtol=0, atol=1e-6)
+    top = results[[f'factor_{k}_contribution' for k in (1, 2, 3)]].to_numpy()
+    assert (np.diff(top, axis=1) <= 0).all()
+
+
+def test_explainer_reuses_tree_exports(calibrated_system, synthetic_data):
+    """调整工作点、校准不重新导出树模型，解释结果仍与当前评分一致；树模型变化后重新导出"""
+    patients = synthetic_data[RAW_FEATURES].iloc[:50]
+    calibrated_system.explain_batch(patients, top_k=0)
+    tree_exports = calibrated_system._explainer[1]
+    exported = dict(tree_exports)
+    assert exported
+
+    calibrated_system.optimize_operating_point(target_recall=0.9)
+    calibrated_system.fit_calibration('platt')
+    results = calibrated_system.explain_batch(patients, top_k=0)
+
+    assert calibrated_system._explainer[1] is tree_exports
+    assert all(tree_exports[name] is exported[name] for name in exported)
+    np.testing.assert_allclose(results['risk_score'], calibrated_system.predict_batch(patients)['risk_score'],
+                               rtol=0, atol=1e-6)
+
+    calibrated_system.invalidate_prediction_cache(models_changed=True)
+    calibrated_system.explain_batch(patients, top_k=0)
+    assert calibrated_system._explainer[1] is not tree_exports
+
+
+@pytest.mark.parametrize('explain', [False, True])
+def test_batch_prediction_demo_explanation_opt_in(trained_system, explain, monkeypatch):
+    """默认不解释（不调用 explain_batch，没有 top_factors 列），explain=True 时给出主要风险因素"""
+    calls = []
+    explain_batch = trained_system.explain_batch
+    monkeypatch.setattr(trained_system, 'explain_batch', lambda *args, **kwargs: calls.append(1) or
+                        explain_batch(*args, **kwargs))
+
+    results = trained_system.batch_prediction_demo(explain=explain)
+
+    assert len(calls) == int(explain)
+    assert ('top_factors' in results.columns) == explain
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""逐次减半搜索的轮次和试验结果磁盘缓存"""
+
+import os
+
+import pytest
+
+from bench_pipeline import generate_synthetic_pima
+from feature_transform import FeatureTransformer
+from hyperparameter_search import TrialCache, halving_schedule, successive_halving
+
+SPACES = {'RandomForest': {'resource': ('n_estimators', 9),
+                           'params': {'max_depth': [2, 4], 'min_samples_leaf': [1, 4]}}}
+
+
+@pytest.fixture(scope='module')
+def search_data():
+    df = generate_synthetic_pima(300, seed=9)
+    return FeatureTransformer().transform(df), df['Outcome'].to_numpy()
+
+
+def _search(search_data, cache_dir, fingerprint='data-v1'):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    estimators = {'RandomForest': RandomForestClassifier(random_state=0),
+                  'LogisticRegression': LogisticRegression(max_iter=1000)}
+    X, y = search_data
+    return successive_halving(estimators, X, y, fingerprint, spaces=SPACES, n_candidates=4, eta=3,
+                              min_resource=3, n_splits=3, cache_dir=cache_dir, n_jobs=1)
+
+
+def _cached_flags(results):
+    return [trial['cached'] for result in results.values() for trial in result['trials']]
+
+
+def test_schedule():
+    """各轮资源几何递增，最后一轮为最大资源"""
+    schedule = halving_schedule(300, 25, 3)
+    assert schedule[-1] == 300
+    assert all(a < b for a, b in zip(schedule, schedule[1:]))
+    assert halving_schedule(9, 3, 3) == [3, 9]
+
+
+def test_rerun_reuses_disk_cache(search_data, tmp_path):
+    """相同数据和设置重复搜索时全部试验命中缓存，选出的参数和得分不变"""
+    cache_dir = str(tmp_path / 'cache')
+    first = _search(search_data, cache_dir)
+    # 第一轮 4 个候选，第二轮保留 ceil(4/3)=2 个；逻辑回归只评估一次
+    assert len(first['RandomForest']['trials']) == 6
+    assert not any(_cached_flags(first))
+    assert len(os.listdir(cache_dir)) == 7
+
+    second = _search(search_data, cache_dir)
+    assert all(_cached_flags(second))
+    for name, result in first.items():
+        assert second[name]['params'] == result['params']
+        assert (second[name]['roc_auc'], second[name]['f1']) == (result['roc_auc'], result['f1'])
+
+
+def test_changed_data_misses_cache(search_data, tmp_path):
+    """训练数据指纹变化后不使用旧结果"""
+    cache_dir = str(tmp_path / 'cache')
+    _search(search_data, cache_dir)
+    assert not any(_cached_flags(_search(search_data, cache_dir, fingerprint='data-v2')))
+
+
+def test_cache_key_ignores_n_jobs():
+    """n_jobs 等不影响结果的参数不计入缓存键，其他参数计入"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    cache = TrialCache(None, 'data', 3, 42)
+    key = cache.key('RandomForest', RandomForestClassifier(n_jobs=1))
+    assert key == cache.key('RandomForest', RandomForestClassifier(n_jobs=4))
+    assert key != cache.key('RandomForest', RandomForestClassifier(max_depth=3))
+    assert cache.get(key) is None
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""增量预处理的变化检测"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from bench_pipeline import generate_synthetic_pima
+from data_preprocessing import MANIFEST_NAME, ZERO_COLUMNS, incremental_preprocess
+
+
+def _write_partition(path, n_rows, seed):
+    """写入一个含零值缺失的分区"""
+    df = generate_synthetic_pima(n_rows, seed=seed)
+    df.loc[::7, 'Insulin'] = 0
+    df.loc[::11, 'SkinThickness'] = 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    """两个不同目录下的同名分区"""
+    paths = [str(tmp_path / 'day1' / 'part.csv'), str(tmp_path / 'day2' / 'part.csv')]
+    for seed, path in enumerate(paths):
+        _write_partition(path, 300, seed)
+    return paths
+
+
+def test_same_named_partitions_do_not_collide(partitions, tmp_path):
+    """同名分区各自输出到不同文件，输出中不再有零值"""
+    output_dir = str(tmp_path / 'out')
+    incremental_preprocess(partitions, output_dir)
+
+    outputs = sorted(name for name in os.listdir(output_dir) if name != MANIFEST_NAME)
+    assert len(outputs) == 2
+    total_rows = 0
+    for name in outputs:
+        cleaned = pd.read_csv(os.path.join(output_dir, name))
+        assert not (cleaned[ZERO_COLUMNS] == 0).any().any()
+        total_rows += len(cleaned)
+    assert total_rows == 600
+
+
+def test_rerun_skips_unchanged_partitions(partitions, tmp_path):
+    """未变化的分区重新运行时既不扫描也不重写"""
+    output_dir = str(tmp_path / 'out')
+    first = incremental_preprocess(partitions, output_dir)
+    assert len(first['scanned']) == 2 and len(first['rewritten']) == 2
+
+    second = incremental_preprocess(partitions, output_dir)
+    assert second['scanned'] == [] and second['rewritten'] == []
+    assert second['replacement_values'] == first['replacement_values']
+
+
+def test_changed_and_new_partitions_are_rescanned(partitions, tmp_path):
+    """只扫描变化和新增的分区；未变化的分区只在其零值列的替换值变化时重写"""
+    output_dir = str(tmp_path / 'out')
+    first = incremental_preprocess(partitions, output_dir)
+
+    _write_partition(partitions[1], 400, seed=5)
+    new_partition = str(tmp_path / 'day3' / 'part.csv')
+    _write_partition(new_partition, 200, seed=6)
+    result = incremental_preprocess(partitions + [new_partition], output_dir)
+
+    assert result['scanned'] == [partitions[1], new_partition]
+    # 第一个分区只有 Insulin 和 SkinThickness 含零值
+    affected = any(result['replacement_values'][col] != first['replacement_values'][col]
+                   for col in ('Insulin', 'SkinThickness'))
+    expected = [os.path.abspath(path) for path in partitions[1:] + [new_partition]]
+    if affected:
+        expected.insert(0, os.path.abspath(partitions[0]))
+    assert result['rewritten'] == expected
+    assert len([name for name in os.listdir(output_dir) if name != MANIFEST_NAME]) == 3
+
+
+def test_removed_partition_outputs_are_deleted(partitions, tmp_path):
+    """不再列出的分区从清单中移除，其清洗后的输出也被删除"""
+    output_dir = str(tmp_path / 'out')
+    incremental_preprocess(partitions, output_dir)
+
+    result = incremental_preprocess(partitions[:1], output_dir)
+    assert result['removed'] == [os.path.abspath(partitions[1])]
+    outputs = [name for name in os.listdir(output_dir) if name != MANIFEST_NAME]
+    assert len(outputs) == 1
+    assert len(pd.read_csv(os.path.join(output_dir, outputs[0]))) == 300
+
+
+def test_no_partitions_raises(tmp_path):
+    """没有输入分区时给出明确的错误"""
+    with pytest.raises(ValueError):
+        incremental_preprocess([], str(tmp_path / 'out'))
+
+
+def test_partitioned_output_feeds_load_data(partitions, tmp_path):
+    """分区模式的输出目录可以直接作为训练数据路径读取（合并全部分区）"""
+    from data_preprocessing import main
+    from diabetes_risk_prediction_system import DiabetesRiskPredictionSystem
+
+    partition_dir = tmp_path / 'parts'
+    partition_dir.mkdir()
+    for i, path in enumerate(partitions):
+        os.replace(path, partition_dir / f'part{i}.csv')
+    output_dir = str(tmp_path / 'output')
+    main(partition_dir=str(partition_dir), output_dir=output_dir, plot_mode='skip')
+
+    system = DiabetesRiskPredictionSystem(output_dir=output_dir, plot_mode='skip')
+    df = system.load_data(os.path.join(output_dir, 'diabetes_data_cleaned'))
+    assert len(df) == 600
+    assert not (df[ZERO_COLUMNS] == 0).any().any()
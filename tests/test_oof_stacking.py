@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""折外预测缓存与折模型（bagged 预测）的持久化"""
+
+import numpy as np
+import pytest
+
+from diabetes_risk_prediction_system import DiabetesRiskPredictionSystem
+
+
+@pytest.fixture(scope='module')
+def artifact(trained_system, tmp_path_factory):
+    """带折模型的模型产物目录及保存前的 bagged 评分"""
+    trained_system.compute_oof_predictions(n_splits=3)
+    expected = trained_system.fusion_predict(trained_system.X_test, bagged=True, cache=False)[1]
+    path = str(tmp_path_factory.mktemp('artifact'))
+    trained_system.save_artifact(path)
+    return path, expected
+
+
+def test_bagged_predict_after_load_artifact(trained_system, artifact, tmp_path):
+    """只加载产物（没有训练数据）时直接使用产物中的折模型"""
+    path, expected = artifact
+    system = DiabetesRiskPredictionSystem(output_dir=str(tmp_path), plot_mode='skip')
+    system.load_artifact(path)
+
+    scores = system.fusion_predict(trained_system.X_test, bagged=True, cache=False)[1]
+    np.testing.assert_array_equal(scores, expected)
+
+
+def test_loaded_fold_models_reused_with_training_data(synthetic_data, artifact, tmp_path):
+    """训练数据与产物一致时折外预测缓存命中，不重新训练折模型"""
+    path, expected = artifact
+    system = DiabetesRiskPredictionSystem(output_dir=str(tmp_path), plot_mode='skip')
+    system.prepare_data(system.feature_engineering(synthetic_data))
+    system.load_artifact(path)
+    fold_models = system.fold_models
+
+    scores = system.fusion_predict(system.X_test, bagged=True, cache=False)[1]
+    assert system.fold_models is fold_models
+    np.testing.assert_array_equal(scores, expected)
+    system.fit_meta_learner()
+    assert system.fold_models is fold_models
+
+
+def test_bagged_predict_rejects_stale_fold_models(trained_system, artifact, tmp_path):
+    """模型参数变化后，没有训练数据时不能使用旧折模型"""
+    system = DiabetesRiskPredictionSystem(output_dir=str(tmp_path), plot_mode='skip')
+    system.load_artifact(artifact[0])
+    system.models['LogisticRegression'].set_params(C=0.5)
+
+    with pytest.raises(ValueError):
+        system.fusion_predict(trained_system.X_test, bagged=True, cache=False)
+
+
+def test_oof_recomputed_after_parameter_change(trained_system):
+    """折外预测按模型参数缓存：参数不变时命中缓存，参数变化后重新计算"""
+    trained_system.compute_oof_predictions()
+    fold_models = trained_system.fold_models
+    trained_system.compute_oof_predictions()
+    assert trained_system.fold_models is fold_models
+
+    model = trained_system.models['LogisticRegression']
+    original = model.C
+    try:
+        model.set_params(C=original / 2)
+        trained_system.compute_oof_predictions()
+        assert trained_system.fold_models is not fold_models
+    finally:
+        model.set_params(C=original)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""决策阈值扫描、阈值选择和风险等级分界"""
+
+import numpy as np
+import pytest
+
+from operating_point import classification_metrics, fit_risk_bands, select_threshold, threshold_sweep
+
+
+@pytest.fixture(scope='module')
+def labelled_scores():
+    """含大量相同评分的标签和评分"""
+    rng = np.random.default_rng(0)
+    y = rng.random(500) < 0.35
+    scores = np.round(np.clip(0.3 * y + rng.normal(0.35, 0.2, 500), 0, 1), 2)
+    return y.astype(int), scores
+
+
+def test_sweep_matches_brute_force(labelled_scores):
+    """每个候选阈值的 TP/FP 与逐阈值按 评分 >= 阈值 计数一致"""
+    y, scores = labelled_scores
+    sweep = threshold_sweep(y, scores)
+
+    assert np.isinf(sweep['thresholds'][0])
+    np.testing.assert_array_equal(sweep['thresholds'][1:], np.unique(scores)[::-1])
+    for threshold, tp, fp in zip(sweep['thresholds'], sweep['tp'], sweep['fp']):
+        predicted = scores >= threshold
+        assert tp == (predicted & (y == 1)).sum()
+        assert fp == (predicted & (y == 0)).sum()
+
+
+def test_select_threshold_target_recall(labelled_scores):
+    """选出满足目标召回率的最高阈值，与按该阈值分类的指标一致"""
+    y, scores = labelled_scores
+    sweep = threshold_sweep(y, scores)
+    threshold, index = select_threshold(sweep, target_recall=0.9)
+
+    recall = classification_metrics(y, scores >= threshold)[1]['recall']
+    assert recall >= 0.9
+    assert recall == pytest.approx(sweep['recall'][index])
+    higher = np.unique(scores)[np.unique(scores) > threshold]
+    assert all(classification_metrics(y, scores >= t)[1]['recall'] < 0.9 for t in higher)
+
+
+@pytest.mark.parametrize('criterion', [{}, {'target_recall': 0.9}, {'cost_ratio': 5.0}])
+def test_zero_positives(criterion):
+    """没有阳性样本时阈值和风险等级分界为刚好高于最高评分的有限值（全部判为阴性）"""
+    scores = np.linspace(0.1, 0.8, 50)
+    sweep = threshold_sweep(np.zeros(50, dtype=int), scores)
+
+    threshold, _ = select_threshold(sweep, **criterion)
+    bands = fit_risk_bands(sweep)
+
+    assert np.isfinite(threshold) and threshold > scores.max()
+    assert not (scores >= threshold).any()
+    assert all(np.isfinite(bands)) and all(band > scores.max() for band in bands)
+
+
+def test_fit_risk_bands_ordered(labelled_scores):
+    """低/中分界满足召回率下限，中/高分界满足精确率下限，且低/中不高于中/高"""
+    y, scores = labelled_scores
+    low, high = fit_risk_bands(threshold_sweep(y, scores), low_recall=0.95, high_precision=0.7)
+
+    assert low <= high
+    assert classification_metrics(y, scores >= low)[1]['recall'] >= 0.95
+    assert classification_metrics(y, scores >= high)[1]['precision'] >= 0.7
+
+
+def test_sweep_rejects_empty():
+    with pytest.raises(ValueError):
+        threshold_sweep([], [])
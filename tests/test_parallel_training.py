@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""并行训练基础模型与顺序训练的一致性"""
+
+import numpy as np
+
+from bench_pipeline import generate_synthetic_pima
+from conftest import build_system
+
+
+def test_parallel_matches_sequential(tmp_path):
+    """进程池中训练的模型预测与顺序训练一致，随机森林的 n_jobs 训练后恢复"""
+    df = generate_synthetic_pima(400, seed=14)
+    sequential = build_system(df, tmp_path / 'sequential')
+    parallel = build_system(df, tmp_path / 'parallel')
+    n_jobs = {name: model.get_params().get('n_jobs') for name, model in parallel.models.items()}
+
+    times = parallel.train_base_models(parallel=True, n_jobs=2)
+
+    assert set(times) == set(parallel.models)
+    assert {name: model.get_params().get('n_jobs') for name, model in parallel.models.items()} == n_jobs
+    for name, model in parallel.models.items():
+        np.testing.assert_array_equal(model.predict_proba(parallel.X_test),
+                                      sequential.models[name].predict_proba(sequential.X_test), err_msg=name)
+    np.testing.assert_array_equal(parallel.fusion_predict(parallel.X_test, cache=False)[1],
+                                  sequential.fusion_predict(sequential.X_test, cache=False)[1])
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""批量预测与单个患者预测的一致性"""
+
+import numpy as np
+
+from feature_transform import RAW_FEATURES
+
+
+def test_predict_batch_matches_single_patient(trained_system, synthetic_data):
+    """向量化批量预测与逐个调用 predict_single_patient 的评分和标签一致"""
+    patients = synthetic_data[RAW_FEATURES].iloc[:40]
+    batch = trained_system.predict_batch(patients)
+
+    single = [trained_system.predict_single_patient(row.to_dict()) for _, row in patients.iterrows()]
+    labels = np.array([label for label, _ in single])
+    scores = np.array([score for _, score in single])
+
+    np.testing.assert_allclose(batch['risk_score'].to_numpy(), scores, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(batch['prediction'].to_numpy(), labels)
+    assert batch.index.equals(patients.index)
+
+
+def test_predict_batch_accepts_array(trained_system, synthetic_data):
+    """NumPy 数组输入（列顺序同 RAW_FEATURES）与 DataFrame 输入结果相同"""
+    patients = synthetic_data[RAW_FEATURES].iloc[:25]
+    from_frame = trained_system.predict_batch(patients)
+    from_array = trained_system.predict_batch(patients.to_numpy())
+
+    np.testing.assert_array_equal(from_frame['risk_score'].to_numpy(), from_array['risk_score'].to_numpy())
+    np.testing.assert_array_equal(from_frame['advice_code'].to_numpy(), from_array['advice_code'].to_numpy())
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""融合预测缓存的命中、失效和容量"""
+
+import numpy as np
+import pytest
+
+from diabetes_risk_prediction_system import PREDICTION_CACHE_SIZE
+
+
+@pytest.fixture
+def system(trained_system):
+    """清空缓存和计数的共享系统（测试只改融合权重，结束时恢复）"""
+    weights = dict(trained_system.fusion_weights)
+    trained_system.invalidate_prediction_cache()
+    trained_system.prediction_cache_stats.update(hits=0, misses=0)
+    yield trained_system
+    trained_system.fusion_weights = weights
+    trained_system.invalidate_prediction_cache()
+
+
+def test_hit_by_content(system):
+    """内容相同的输入（即使是另一份拷贝）命中缓存，返回同一组只读数组"""
+    first = system.fusion_predict(system.X_test)
+    second = system.fusion_predict(system.X_test.copy())
+
+    assert all(cached is computed for cached, computed in zip(second, first))
+    assert system.prediction_cache_stats == {'hits': 1, 'misses': 1}
+    assert not first[1].flags.writeable
+    with pytest.raises(ValueError):
+        first[1][0] = 0.0
+
+    changed = system.X_test.copy()
+    changed[0, 0] += 1.0
+    system.fusion_predict(changed)
+    assert system.prediction_cache_stats['misses'] == 2
+
+
+def test_invalidated_after_model_version_bump(system):
+    """融合权重变化并使缓存失效后重新计算，结果反映新的权重"""
+    _, before, probabilities = system.fusion_predict(system.X_test)
+    version = system._model_version
+
+    system.fusion_weights = {name: float(name == 'LogisticRegression') for name in system.models}
+    system.invalidate_prediction_cache()
+    _, after, _ = system.fusion_predict(system.X_test)
+
+    assert system._model_version == version + 1
+    assert system.prediction_cache_stats == {'hits': 0, 'misses': 2}
+    np.testing.assert_allclose(after, probabilities['LogisticRegression'])
+    assert not np.allclose(after, before)
+
+
+def test_key_includes_method_and_cache_bypass(system):
+    """融合方式不同不共用缓存；cache=False 不读写缓存"""
+    system.fusion_predict(system.X_test, method='weighted')
+    system.fusion_predict(system.X_test, method='voting')
+    assert system.prediction_cache_stats == {'hits': 0, 'misses': 2}
+
+    uncached = system.fusion_predict(system.X_test, cache=False)
+    assert uncached[1].flags.writeable
+    assert system.prediction_cache_stats == {'hits': 0, 'misses': 2}
+
+
+def test_lru_eviction(system):
+    """超过容量时淘汰最久未使用的条目"""
+    inputs = [system.X_test[i:i + 5] for i in range(PREDICTION_CACHE_SIZE + 1)]
+    for X in inputs:
+        system.fusion_predict(X)
+    assert len(system._prediction_cache) == PREDICTION_CACHE_SIZE
+
+    system.fusion_predict(inputs[-1])
+    system.fusion_predict(inputs[0])
+    assert system.prediction_cache_stats['hits'] == 1
+    assert system.prediction_cache_stats['misses'] == PREDICTION_CACHE_SIZE + 2
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""分位数草图的精确性、误差界和合并"""
+
+import numpy as np
+import pytest
+
+from quantile_sketch import QuantileSketch
+
+QUANTILES = np.linspace(0, 1, 41)
+
+
+def _sketch(values, capacity, chunks=10):
+    sketch = QuantileSketch(capacity)
+    for chunk in np.array_split(values, chunks):
+        sketch.update(chunk)
+    return sketch
+
+
+def test_exact_when_distinct_values_fit():
+    """不同取值个数不超过容量时，分位数与 np.quantile（线性插值）完全一致"""
+    values = np.random.default_rng(0).normal(120, 30, 50_000).round()
+    sketch = _sketch(values, capacity=2048)
+
+    np.testing.assert_allclose(sketch.quantile(QUANTILES), np.quantile(values, QUANTILES), rtol=0, atol=1e-9)
+    assert sketch.count == len(values)
+    assert sketch.count_outside(80, 160) == ((values < 80) | (values > 160)).sum()
+
+
+@pytest.mark.parametrize('capacity', [64, 256, 1024])
+def test_rank_error_bound(capacity):
+    """不同取值远多于容量时，估计分位数的秩误差不超过 2/capacity"""
+    values = np.random.default_rng(1).lognormal(4.8, 0.55, 200_000)
+    estimates = _sketch(values, capacity, chunks=37).quantile(QUANTILES)
+
+    ranks = np.searchsorted(np.sort(values), estimates, side='right') / len(values)
+    assert np.abs(ranks - QUANTILES).max() <= 2 / capacity
+    assert estimates[0] == values.min() and estimates[-1] == values.max()
+
+
+def test_merge_matches_single_sketch():
+    """分块草图合并后与整体草图在误差界内一致；空草图合并不改变结果"""
+    values = np.random.default_rng(2).normal(0, 1, 100_000)
+    whole = _sketch(values, capacity=512, chunks=1)
+    merged = QuantileSketch(512)
+    for chunk in np.array_split(values, 8):
+        merged.merge(_sketch(chunk, capacity=512, chunks=1))
+    merged.merge(QuantileSketch(512))
+
+    ranks = np.searchsorted(np.sort(values), merged.quantile(QUANTILES), side='right') / len(values)
+    assert np.abs(ranks - QUANTILES).max() <= 2 / 512
+    assert merged.count == whole.count == len(values)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+
+
+def test_roundtrip_and_nan():
+    """NaN 被忽略；to_dict/from_dict 往返后分位数不变；空草图返回 NaN"""
+    values = np.r_[np.arange(100.0), np.nan, np.nan]
+    sketch = _sketch(values, capacity=32)
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+
+    assert sketch.count == 100
+    np.testing.assert_array_equal(restored.quantile(QUANTILES), sketch.quantile(QUANTILES))
+    assert np.isnan(QuantileSketch().median())
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""增量更新（warm start）后融合权重和依赖组件的重新计算"""
+
+import numpy as np
+import pytest
+
+from bench_pipeline import generate_synthetic_pima
+from conftest import build_system
+
+
+@pytest.fixture
+def system(tmp_path):
+    """可被修改的已训练系统（折外预测用 3 折，之后的调用沿用该设置）"""
+    system = build_system(generate_synthetic_pima(500, seed=0), tmp_path)
+    system.compute_oof_predictions(n_splits=3)
+    return system
+
+
+@pytest.fixture(scope='module')
+def new_patients():
+    return generate_synthetic_pima(120, seed=3)
+
+
+def test_refresh_recomputes_weights(system, new_patients):
+    """更新后训练集扩充，融合权重按原来源重新计算，模型版本变化（预测缓存失效）"""
+    weights, version = dict(system.fusion_weights), system._model_version
+    n_train = len(system.X_train)
+    scores = system.fusion_predict(system.X_test)[1]
+
+    system.refresh_models(new_patients)
+
+    assert len(system.X_train) == n_train + len(new_patients)
+    assert system.fusion_weight_source == 'train'
+    assert system.fusion_weights != weights
+    assert system._model_version > version
+    assert not np.array_equal(system.fusion_predict(system.X_test)[1], scores)
+
+
+def test_refresh_replaces_tuning_weights(system, new_patients):
+    """来源为 'tuning' 时搜索得分是更新前的，更新后改用折外预测计算权重"""
+    system.tuning_results = {name: {'f1': 0.5} for name in system.models}
+    system.calculate_fusion_weights(source='tuning')
+
+    system.refresh_models(new_patients)
+
+    assert system.fusion_weight_source == 'oof'
+    assert set(system.oof_probabilities) == set(system.models)
+    assert all(weight != 0.5 for weight in system.fusion_weights.values())
+
+
+def test_refresh_refits_dependents(system, new_patients):
+    """校准映射、工作点和元学习器按更新前的设置重新拟合"""
+    system.calculate_fusion_weights(source='oof')
+    system.fit_calibration('isotonic')
+    system.optimize_operating_point(target_recall=0.9)
+    system.fit_meta_learner()
+    meta_learner = system.meta_learner
+
+    system.refresh_models(new_patients)
+
+    assert system.calibrator is not None and system.calibrator.method == 'isotonic'
+    assert system.operating_point['target_recall'] == 0.9
+    assert system.operating_point['recall'] >= 0.9
+    assert system.meta_learner is not None and system.meta_learner is not meta_learner
+
+
+def test_refresh_without_refit_clears_dependents(system, new_patients):
+    """refit_dependents=False 时清除校准映射、工作点和元学习器"""
+    system.fit_calibration('platt')
+    system.optimize_operating_point(target_recall=0.9)
+
+    system.refresh_models(new_patients, refit_dependents=False)
+
+    assert system.calibrator is None
+    assert system.operating_point is None
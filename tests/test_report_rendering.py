@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""图表渲染器的三种模式"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from report_rendering import FigureRenderer, render_risk_level_pie, render_risk_score_distribution
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _submit_figures(renderer):
+    rng = np.random.default_rng(0)
+    renderer.submit(render_risk_level_pie, 'pie.png', levels=['低风险', '中等风险', '高风险'], counts=[5, 3, 2])
+    renderer.submit(render_risk_score_distribution, 'scores.png', scores_negative=rng.random(50) * 0.6,
+                    scores_positive=0.4 + rng.random(30) * 0.6, threshold=0.45)
+
+
+def _assert_png(path):
+    with open(path, 'rb') as f:
+        assert f.read(8) == PNG_SIGNATURE
+
+
+@pytest.mark.parametrize('mode', ['now', 'defer'])
+def test_renders_files(tmp_path, mode):
+    """'now' 提交即在后台渲染，'defer' 在 finish 时才渲染；两者都在输出目录中生成全部图片"""
+    output_dir = str(tmp_path / 'figures')
+    renderer = FigureRenderer(output_dir, mode=mode, max_workers=1)
+    _submit_figures(renderer)
+    if mode == 'defer':
+        assert not os.path.exists(output_dir)
+
+    paths = renderer.close()
+
+    assert sorted(os.path.basename(path) for path in paths) == ['pie.png', 'scores.png']
+    for path in paths:
+        _assert_png(path)
+
+
+def test_skip_mode(tmp_path):
+    """'skip' 不渲染，也不创建输出目录"""
+    output_dir = str(tmp_path / 'figures')
+    with FigureRenderer(output_dir, mode='skip') as renderer:
+        assert not renderer.enabled
+        _submit_figures(renderer)
+    assert renderer.close() == []
+    assert not os.path.exists(output_dir)
+
+
+def test_invalid_mode(tmp_path):
+    with pytest.raises(ValueError):
+        FigureRenderer(str(tmp_path), mode='later')
+
+
+def test_import_does_not_load_matplotlib():
+    """主进程导入渲染模块不加载 matplotlib"""
+    code = "import sys, report_rendering; print('matplotlib' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == 'False'
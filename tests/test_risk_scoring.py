@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""风险等级与医疗建议规则表（单个患者与批量计算一致，位掩码解码）"""
+
+import numpy as np
+import pytest
+
+from bench_pipeline import generate_synthetic_pima
+from risk_scoring import (ADVICE_FOLLOWUP, ADVICE_RULES, DEFAULT_RECOMMENDATIONS, DIAGNOSES, RISK_LEVELS,
+                          advice_code, advice_codes, assess_risk_level, assess_risk_levels, decode_advice,
+                          generate_medical_advice)
+
+
+@pytest.mark.parametrize('code', range(2 * ADVICE_FOLLOWUP))
+def test_decode_advice_bits(code):
+    """每个置位对应一条建议（按规则表顺序），随访位决定诊断，没有指标规则触发时给出默认建议"""
+    diagnosis, recommendations = decode_advice(code)
+
+    expected = [message for bit, _, _, message in ADVICE_RULES if code & bit]
+    assert recommendations == (expected or DEFAULT_RECOMMENDATIONS)
+    assert diagnosis == DIAGNOSES[bool(code & ADVICE_FOLLOWUP)]
+
+
+def test_batch_matches_single_patient():
+    """批量位掩码和风险等级与逐个患者计算一致（含恰好等于阈值的指标和评分）"""
+    patients = generate_synthetic_pima(300, seed=8)
+    for _, name, threshold, _ in ADVICE_RULES:
+        patients.loc[::10, name] = threshold
+    scores = np.random.default_rng(8).random(len(patients))
+    scores[::7] = 0.5
+    scores[1::7] = 0.3
+    scores[2::7] = 0.6
+    thresholds = [0.3, 0.6]
+
+    codes = advice_codes(scores, patients, decision_threshold=0.5)
+    levels, _ = assess_risk_levels(scores, thresholds)
+    for score, code, level, (_, row) in zip(scores, codes, levels, patients.iterrows()):
+        patient = row.to_dict()
+        assert code == advice_code(score, patient, decision_threshold=0.5)
+        assert level == assess_risk_level(score, thresholds)[0]
+        advice = generate_medical_advice(score, patient, thresholds, decision_threshold=0.5)
+        assert (advice['advice_code'], advice['risk_level']) == (code, level)
+
+
+def test_boundaries_and_missing_columns():
+    """指标 > 阈值才触发规则，评分 >= 决策阈值才随访；等级分界归入较高等级；缺失的指标不触发"""
+    glucose_bit = next(bit for bit, name, _, _ in ADVICE_RULES if name == 'Glucose')
+    assert advice_code(0.5, {'Glucose': 140}) == ADVICE_FOLLOWUP
+    assert advice_code(0.4999, {'Glucose': 140.5}) == glucose_bit
+    assert assess_risk_level(0.3)[0] == RISK_LEVELS[1]
+    assert assess_risk_level(0.6)[0] == RISK_LEVELS[2]
+
+    codes = advice_codes([0.1, 0.9], {'Glucose': np.array([150, 100])})
+    np.testing.assert_array_equal(codes, [glucose_bit, ADVICE_FOLLOWUP])
+    assert codes.dtype == np.uint8
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""评分服务的请求校验和微批处理"""
+
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+from feature_transform import RAW_FEATURES
+from risk_scoring_service import MicroBatcher, RiskScoringServer, load_artifact_system, parse_patient
+
+
+@pytest.fixture
+def valid_patient(synthetic_data):
+    return {name: float(value) for name, value in synthetic_data[RAW_FEATURES].iloc[0].items()}
+
+
+@pytest.mark.parametrize('overrides', [
+    {'Glucose': 'abc'},
+    {'BMI': None},
+    {'Age': True},
+    {'Insulin': float('nan')},
+    {'Insulin': float('inf')},
+])
+def test_parse_patient_rejects_invalid_values(overrides, valid_patient):
+    """非数值（含 null、布尔值）和非有限值抛出 ValueError"""
+    with pytest.raises(ValueError):
+        parse_patient({**valid_patient, **overrides})
+
+
+@pytest.mark.parametrize('payload', [[1, 2, 3], 'Glucose', {'Glucose': 120.0}])
+def test_parse_patient_rejects_invalid_payload(payload):
+    """请求体不是 JSON 对象或缺少特征时抛出 ValueError"""
+    with pytest.raises(ValueError):
+        parse_patient(payload)
+
+
+def test_parse_patient_converts_numbers(valid_patient):
+    """数值字符串和整数转为浮点数，多余字段忽略"""
+    payload = {**valid_patient, 'Glucose': '120', 'Age': 45, 'note': 'x'}
+    patient = parse_patient(payload)
+    assert list(patient) == RAW_FEATURES
+    assert patient['Glucose'] == 120.0 and patient['Age'] == 45.0
+
+
+def _serve_requests(system, bodies):
+    """启动批处理器，并发发送请求，返回各请求的 (状态码, JSON对象)"""
+    async def run():
+        batcher = MicroBatcher(None, engine=system.export_engine(), max_wait_ms=20)
+        server = RiskScoringServer(batcher)
+        task = asyncio.create_task(batcher.run())
+        try:
+            return await asyncio.gather(*[server.dispatch('POST', '/predict', body) for body in bodies])
+        finally:
+            task.cancel()
+
+    return asyncio.run(run())
+
+
+def test_invalid_request_does_not_fail_batch(trained_system, synthetic_data):
+    """错误请求返回 400，同一微批中的有效请求正常评分，结果与 predict_batch 一致"""
+    patients = synthetic_data[RAW_FEATURES].iloc[:3]
+    valid = [json.dumps(row.to_dict()).encode() for _, row in patients.iterrows()]
+    invalid = [json.dumps({**patients.iloc[0].to_dict(), 'Glucose': 'abc'}).encode(), b'{"Glucose": NaN}',
+               b'not json']
+    responses = _serve_requests(trained_system, [valid[0], invalid[0], valid[1], invalid[1], valid[2], invalid[2]])
+
+    statuses = [status for status, _ in responses]
+    assert statuses == [200, 400, 200, 400, 200, 400]
+    scores = [payload['risk_score'] for status, payload in responses if status == 200]
+    np.testing.assert_allclose(scores, trained_system.predict_batch(patients)['risk_score'].to_numpy(),
+                               rtol=0, atol=1e-6)
+    assert all('error' in payload for status, payload in responses if status == 400)
+
+
+def test_dispatch_routes(trained_system):
+    """未知路径返回 404，/predict 的非 POST 请求返回 405"""
+    batcher = MicroBatcher(None, engine=trained_system.export_engine())
+    server = RiskScoringServer(batcher)
+    assert asyncio.run(server.dispatch('GET', '/health', b''))[0] == 200
+    assert asyncio.run(server.dispatch('GET', '/predict', b''))[0] == 405
+    assert asyncio.run(server.dispatch('GET', '/unknown', b''))[0] == 404
+
+
+def test_load_artifact_system_skips_plots_and_default_output(trained_system, synthetic_data, tmp_path,
+                                                             monkeypatch):
+    """--artifact 加载的系统不生成图表，不在当前目录下创建默认输出目录"""
+    artifact_path = str(tmp_path / 'artifact')
+    trained_system.save_artifact(artifact_path)
+    workdir = tmp_path / 'cwd'
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    system = load_artifact_system(artifact_path, str(tmp_path / 'service'))
+
+    assert not system.renderer.enabled
+    assert os.listdir(workdir) == []
+    patients = synthetic_data[RAW_FEATURES].iloc[:10]
+    np.testing.assert_array_equal(system.predict_batch(patients)['risk_score'],
+                                  trained_system.predict_batch(patients)['risk_score'])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""流式（分块两遍）预处理与内存中预处理的一致性"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bench_pipeline import generate_synthetic_pima
+from data_preprocessing import ZERO_COLUMNS, detect_outliers, handle_zero_values, stream_preprocess
+
+
+@pytest.fixture(scope='module')
+def raw_path(tmp_path_factory):
+    """含零值缺失的原始数据"""
+    df = generate_synthetic_pima(2000, seed=5)
+    for step, col in zip((3, 5, 7, 11, 13), ZERO_COLUMNS):
+        df.loc[::step, col] = 0
+    path = str(tmp_path_factory.mktemp('raw') / 'diabetes_data.csv')
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('chunksize', [333, 5000])
+def test_stream_matches_in_memory(raw_path, tmp_path, chunksize):
+    """替换值、清洗后数据、异常值边界和个数与一次性读入内存处理的结果一致"""
+    df = pd.read_csv(raw_path)
+    df_cleaned, expected_replacements = handle_zero_values(df, output_path=str(tmp_path / 'memory.csv'))
+    expected_outliers = detect_outliers(df_cleaned, output_dir=str(tmp_path))
+
+    stream_path = str(tmp_path / 'stream.csv')
+    replacements, zero_stats, outliers = stream_preprocess(raw_path, stream_path, chunksize=chunksize)
+
+    assert replacements == pytest.approx(expected_replacements)
+    assert {col: stats['count'] for col, stats in zero_stats.items()} == \
+        {col: int((df[col] == 0).sum()) for col in ZERO_COLUMNS}
+    pd.testing.assert_frame_equal(pd.read_csv(stream_path), pd.read_csv(str(tmp_path / 'memory.csv')))
+    assert set(outliers) == set(expected_outliers)
+    for col, report in outliers.items():
+        expected = expected_outliers[col]
+        assert report['count'] == expected['count'], col
+        np.testing.assert_allclose([report['lower_bound'], report['upper_bound']],
+                                   [expected['lower_bound'], expected['upper_bound']], rtol=1e-12)